@@ -1,12 +1,29 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from datetime import datetime
+import os
 import time
 
+# Engines and Plotly figures are imported per page, see PAGE MODULES below
+from srk_prognose.cache import SimulationCache, multi_cache_key, single_cache_key
+from srk_prognose.config import (
+    COMPARE_N_SIMULATIONS,
+    CONVERGENCE_REPLICATIONS,
+    CONVERGENCE_SIMULATIONS,
+    EMPIRICAL_DONATION_MEAN,
+    EMPIRICAL_DONORS_MEAN,
+    MAX_SIMULATIONS,
+    N_SIMULATIONS,
+    OPTIMIZER_SIMULATIONS,
+    SIMULATION_DEADLINE,
+    SIMULATION_SAMPLER,
+    SENSITIVITY_CHANGE,
+    SIMULATION_SEED,
+    TARGET_NPV_STANDARD_ERROR,
+)
+from srk_prognose.sampling import SAMPLERS
+from srk_prognose.timing import SpanRecorder, configure_logging, span
+
 #####################################################################
 # CONFIGURATION
 #####################################################################
@@ -19,21 +36,38 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Fixed parameters for MVP
-DISCOUNT_RATE = 0.03  # 3% annual discount rate
-N_SIMULATIONS = 5  # Increased from 500 for better accuracy
-
-# Empirical parameters for GS (National)
-EMPIRICAL_DONORS_MEAN = 3.5
-EMPIRICAL_DONORS_STD = 0.75
-EMPIRICAL_DONATION_MEAN = 261.48  # Annual donation
-EMPIRICAL_DONATION_STD = 320.87
-EMPIRICAL_RETENTION = {
-    1: (83.0, 0.7),      # Year 1: 83.0% retention, 0.7% std dev
-    2: (81.9, 0.7),      # Year 2: 81.9% y-o-y
-    3: (85.3, 0.7)       # Year 3+: 85.3% y-o-y stable
+PREVIEW_INTERVAL = 0.1  # Seconds between live chart updates while a simulation runs
+SAMPLER_LABELS = {
+    "mc": "Monte Carlo",
+    "antithetic": "Antithetische Paare",
+    "sobol": "Quasi-Monte-Carlo (Sobol)",
+}
+OBJECTIVE_LABELS = {
+    "mean": "Erwarteter Kapitalwert",
+    "p10": "Vorsichtiger Kapitalwert (10%-Perzentil)",
+}
+TIMING_LABELS = {
+    "simulation": "Simulation (inkl. Live-Vorschau)",
+    "simulate": "Monte-Carlo-Kern",
+    "aggregate": "Aggregation (Mittelwerte, Perzentile)",
+    "sensitivity": "Sensitivitätsanalyse",
+    "optimizer": "Zeitplan-Optimierung",
+    "convergence_report": "Konvergenzbericht",
+    "figures": "Plotly-Figuren erstellen",
+    "chart_render": "Diagramme ausgeben",
+    "table_render": "Tabellen ausgeben (inkl. Styler)",
+    "other": "Streamlit, Eingaben und Rest",
+}
+# ColorBrewer stops of the matplotlib colormaps of the detail tables; color_scale
+# interpolates them like Styler.background_gradient, which imports matplotlib
+TABLE_COLOR_SCALES = {
+    "RdYlGn": ["#a50026", "#d73027", "#f46d43", "#fdae61", "#fee08b", "#ffffbf", "#d9ef8b", "#a6d96a", "#66bd63", "#1a9850", "#006837"],
+    "Blues": ["#f7fbff", "#deebf7", "#c6dbef", "#9ecae1", "#6baed6", "#4292c6", "#2171b5", "#08519c", "#08306b"],
+    "Reds": ["#fff5f0", "#fee0d2", "#fcbba1", "#fc9272", "#fb6a4a", "#ef3b2c", "#cb181d", "#a50f15", "#67000d"],
 }
-EPSILON = 0.0001
+
+# JSON timing log lines on stderr; SRK_PROGNOSE_LOG_LEVEL=DEBUG also logs every single span
+configure_logging(os.environ.get("SRK_PROGNOSE_LOG_LEVEL", "INFO"))
 
 # Modern color palette
 COLORS = {
@@ -248,6 +282,13 @@ if "params" not in st.session_state:
     st.session_state.params = {}
 if "campaigns" not in st.session_state:
     st.session_state.campaigns = []
+if "seed" not in st.session_state:
+    st.session_state.seed = SIMULATION_SEED
+if "sampler" not in st.session_state:
+    st.session_state.sampler = SIMULATION_SAMPLER
+
+# Span timers of this rerun, logged as one JSON line when the results are done
+page_run = SpanRecorder("page_run", page=st.session_state.page).start()
 
 def display_header():
     """Creates header with logo"""
@@ -283,6 +324,8 @@ display_header()
 # NAVIGATION
 #####################################################################
 if st.session_state.page == "home":
+    # A page opened from here commits the inputs it shows
+    st.session_state.pop("committed_page", None)
     st.write("### 📊 Analyseart auswählen")
     st.write("Wählen Sie die passende Analyse für Ihre Fundraising-Planung:")
     
@@ -299,6 +342,41 @@ if st.session_state.page == "home":
                 st.session_state.page = page
                 st.rerun()
 
+#####################################################################
+# PAGE MODULES
+#####################################################################
+# The home page only shows the navigation, so the simulation engines and the
+# figures (Plotly builds its validators on first use) are imported once a
+# page needs them; a fresh server process starts with the home page
+if st.session_state.page != "home":
+    from charts import (
+        create_comparison_donor_figure,
+        create_comparison_figure,
+        create_comparison_revenue_figure,
+        create_multi_year_cumulative_figure,
+        create_multi_year_visualization,
+        create_scenario_figure,
+        create_single_cumulative_figure,
+        create_single_donor_figure,
+        create_single_revenue_figure,
+        create_tornado_figure,
+    )
+    from srk_prognose.expected import expected_metrics, expected_multi_year_metrics
+    from srk_prognose.model import (
+        calculate_scenario_comparison,
+        iter_metrics,
+        iter_multi_year_metrics,
+        single_campaign,
+    )
+    from srk_prognose.simulation import campaign_arrays, portfolio_years
+if st.session_state.page in ("single", "multi"):
+    from srk_prognose.convergence import convergence_report
+if st.session_state.page == "single":
+    from srk_prognose.sensitivity import tornado_analysis
+    from srk_prognose.surface import ResponseSurface
+elif st.session_state.page == "multi":
+    from srk_prognose.optimizer import OBJECTIVES, optimize_schedule
+
 #####################################################################
 # PARAMETER INPUTS WITH IMPROVED STYLING
 #####################################################################
@@ -391,7 +469,7 @@ if st.session_state.page != "home":
             </div>
             """, unsafe_allow_html=True)
         
-        st.session_state.params = {
+        draft = {
             "type": "single",
             "booth_days": booth_days,
             "annual_donation": annual_donation,
@@ -426,11 +504,15 @@ if st.session_state.page != "home":
             
             with cc1:
                 st.markdown("**📅 Zeitplanung**")
+                # Defaults are seeded into the session state instead of value=,
+                # so that apply_optimized_plan can set these inputs
+                st.session_state.setdefault(f"m_start_{i}", float(i))
+                st.session_state.setdefault(f"m_days_{i}", 1000.0)
                 start_year = st.number_input("Startjahr", 
-                    min_value=0.0, max_value=10.0, value=float(i), step=1.0, key=f"m_start_{i}",
+                    min_value=0.0, max_value=10.0, step=1.0, key=f"m_start_{i}",
                     help="In welchem Jahr startet diese Kampagne? (0 = dieses Jahr)")
                 days = st.number_input("Dialogertage", 
-                    min_value=10.0, max_value=5000.0, value=1000.0, step=25.0, key=f"m_days_{i}",
+                    min_value=10.0, max_value=5000.0, step=25.0, key=f"m_days_{i}",
                     help="Anzahl der Einsatztage für diese Kampagne")
                 
                 # Investment preview for this campaign
@@ -482,7 +564,7 @@ if st.session_state.page != "home":
                 "booth_cost_per_day": booth_cost,
             })
         
-        st.session_state.campaigns = campaigns
+        draft = campaigns
         
         # Show total investment summary
         total_investment = sum(c["booth_days"] * c["booth_cost_per_day"] for c in campaigns)
@@ -571,409 +653,450 @@ if st.session_state.page != "home":
                     "donors_per_day": donors_per_day,
                     "booth_cost": booth_cost,
                 }
-        st.session_state.params = {
+        draft = {
             "duration": duration,
             "scenario1": scenarios["scenario1"],
             "scenario2": scenarios["scenario2"],
         }
 
+    with st.expander("🔬 Simulationseinstellungen"):
+        sampler_label = st.selectbox(
+            "Stichprobenverfahren",
+            [SAMPLER_LABELS[sampler] for sampler in SAMPLERS],
+            index=SAMPLERS.index(SIMULATION_SAMPLER),
+            key="sampler_select",
+            help="Quasi-Monte-Carlo und antithetische Paare liefern mit gleich vielen Simulationen genauere Ergebnisse"
+        )
+        draft_sampler = next(sampler for sampler in SAMPLERS if SAMPLER_LABELS[sampler] == sampler_label)
+        st.toggle("⏱️ Zeitmessung anzeigen", value=False, key="debug_timing",
+            help="Zeigt unter den Ergebnissen, wofür die Zeit dieses Durchlaufs gebraucht wurde")
+
+    # Only committed inputs reach the engine: editing a widget (the sampler
+    # included) reruns the page with the current (cached) results,
+    # "Berechnen" commits the edited inputs. A page is committed right away
+    # when it is opened.
+    committed_key = "campaigns" if st.session_state.page == "multi" else "params"
+    pending_notice = st.empty()
+    submitted = st.button("🧮 Berechnen", key="submit_parameters", type="primary", use_container_width=True,
+        help="Simuliert die Ergebnisse mit den aktuellen Eingaben")
+    if submitted or st.session_state.pop("commit_requested", False) or st.session_state.get("committed_page") != st.session_state.page:
+        st.session_state[committed_key] = draft
+        st.session_state.sampler = draft_sampler
+        st.session_state.committed_page = st.session_state.page
+    elif draft != st.session_state[committed_key] or draft_sampler != st.session_state.sampler:
+        pending_notice.warning("✏️ Eingaben geändert: Die Ergebnisse gelten noch für die zuletzt berechneten Parameter. Mit «Berechnen» aktualisieren.")
+
 #####################################################################
-# FIXED CALCULATION FUNCTIONS WITH MORE REALISTIC ASSUMPTIONS
+# RESULT CACHE
 #####################################################################
 
-def calculate_npv(cash_flows, discount_rate=DISCOUNT_RATE):
-    """Calculate Net Present Value of cash flows"""
-    years = np.arange(len(cash_flows))
-    discount_factors = (1 + discount_rate) ** (-years)
-    return np.sum(cash_flows * discount_factors)
-
-def calculate_payback_period(cumulative_discounted, cumulative_undiscounted):
-    """Calculate both simple and discounted payback periods"""
-    simple_payback = next((i for i, x in enumerate(cumulative_undiscounted) if x > 0), None)
-    disc_payback = next((i for i, x in enumerate(cumulative_discounted) if x > 0), None)
-    return simple_payback, disc_payback
-
-def calculate_roi_metrics(total_revenue, total_investment, npv):
-    """Calculate various ROI metrics"""
-    simple_roi = ((total_revenue - total_investment) / total_investment) * 100 if total_investment > 0 else 0
-    npv_roi = (npv / total_investment) * 100 if total_investment > 0 else 0
-    revenue_multiple = total_revenue / total_investment if total_investment > 0 else 0
-    return simple_roi, npv_roi, revenue_multiple
-
-def calculate_metrics(booth_days, retention_rate, donors_per_day, booth_cost, annual_donation, n_simulations=N_SIMULATIONS):
-    """
-    Calculate campaign metrics with empirical parameters
-    """
-    # Determine if using empirical values
-    using_empirical_donors = abs(donors_per_day - EMPIRICAL_DONORS_MEAN) < EPSILON
-    using_empirical_donation = abs(annual_donation - EMPIRICAL_DONATION_MEAN) < EPSILON
-    using_empirical_retention = abs(retention_rate - EMPIRICAL_RETENTION[1][0]) < EPSILON
-    
-    actual_donors = EMPIRICAL_DONORS_MEAN if using_empirical_donors else donors_per_day
-    actual_donation = EMPIRICAL_DONATION_MEAN if using_empirical_donation else annual_donation
-    
-    booth_days_int = int(booth_days)
-    total_investment = float(booth_days) * float(booth_cost)
-    
-    # Storage for simulation results
-    all_npvs = []
-    all_cumulative_discounted = []
-    all_cumulative_undiscounted = []
-    all_donors = []
-    all_revenue = []
-    
-    for _ in range(n_simulations):
-        # Sample initial donors
-        daily_donors = np.random.normal(actual_donors, EMPIRICAL_DONORS_STD, booth_days_int)
-        daily_donors = np.maximum(daily_donors, 0)
-        initial_donors = int(np.sum(daily_donors))
-        
-        # Initialize arrays for 11 years (0-10)
-        year_donors = np.zeros(11)
-        year_revenue = np.zeros(11)
-        cash_flows = np.zeros(11)
-        
-        # Year 0: Investment AND limited donations
-        cash_flows[0] = -total_investment
-        year_donors[0] = initial_donors
-        
-        # Only 2-3 months of donations in year 0 due to processing delay
-        months_of_donation_year0 = np.random.uniform(2.0, 3.0) / 12.0
-        donation_sample = np.random.normal(actual_donation, EMPIRICAL_DONATION_STD)
-        donation_sample = max(donation_sample, 50)
-        year_revenue[0] = initial_donors * donation_sample * months_of_donation_year0
-        cash_flows[0] += year_revenue[0]
-        
-        # Subsequent years with retention
-        curr_donors = initial_donors
-        for year in range(1, 11):
-            # Apply retention
-            if using_empirical_retention:
-                if year == 1:
-                    ret_mean, ret_std = EMPIRICAL_RETENTION[1]
-                elif year == 2:
-                    ret_mean, ret_std = EMPIRICAL_RETENTION[2]
-                else:
-                    ret_mean, ret_std = EMPIRICAL_RETENTION[3]
-            else:
-                ret_mean = retention_rate
-                ret_std = EMPIRICAL_RETENTION[1][1]
-            
-            retention_decimal = np.random.normal(ret_mean / 100, ret_std / 100)
-            retention_decimal = min(1, max(0, retention_decimal))
-            
-            curr_donors = int(curr_donors * retention_decimal)
-            year_donors[year] = curr_donors
-            
-            # Full year donations
-            donation_sample = np.random.normal(actual_donation, EMPIRICAL_DONATION_STD)
-            donation_sample = max(donation_sample, 50)
-            year_revenue[year] = curr_donors * donation_sample
-            cash_flows[year] = year_revenue[year]
-        
-        # Calculate NPV
-        npv = calculate_npv(cash_flows)
-        all_npvs.append(npv)
-        
-        # Calculate cumulative cash flows
-        cumulative_undiscounted = np.cumsum(cash_flows)
-        
-        # Calculate discounted cumulative
-        discounted_cash_flows = cash_flows * ((1 + DISCOUNT_RATE) ** (-np.arange(11)))
-        cumulative_discounted = np.cumsum(discounted_cash_flows)
-        
-        all_cumulative_discounted.append(cumulative_discounted)
-        all_cumulative_undiscounted.append(cumulative_undiscounted)
-        all_donors.append(year_donors)
-        all_revenue.append(year_revenue)
-    
-    # Calculate statistics
-    results_array = np.array(all_cumulative_discounted)
-    donors_array = np.array(all_donors)
-    revenue_array = np.array(all_revenue)
-    
-    mean_cum_disc = np.mean(results_array, axis=0)
-    mean_cum_undisc = np.mean(all_cumulative_undiscounted, axis=0)
-    lower = np.percentile(results_array, 10, axis=0)
-    upper = np.percentile(results_array, 90, axis=0)
-    mean_don = np.mean(donors_array, axis=0)
-    mean_rev = np.mean(revenue_array, axis=0)
-    
-    return mean_don, mean_rev, total_investment, mean_cum_disc, lower, upper, mean_cum_undisc, np.mean(all_npvs)
-
-def calculate_multi_year_metrics(campaigns, n_simulations=N_SIMULATIONS):
-    """
-    Multi-campaign Monte Carlo simulation
-    """
-    if not campaigns:
-        return {
-            "mean_cumulative": np.zeros(10),
-            "lower_ci": np.zeros(10),
-            "upper_ci": np.zeros(10),
-            "campaign_contributions": [],
-            "yearly_donors": np.zeros(10),
-            "yearly_revenue": np.zeros(10),
-            "mean_npv": 0,
-            "total_investment": 0
-        }
+@st.cache_resource
+def get_simulation_cache():
+    """Process-wide simulation cache that survives Streamlit reruns"""
+    return SimulationCache()
+
+@st.cache_resource
+def get_response_surface():
+    """Precomputed single-campaign response surface (None if it has not been built)"""
+    return ResponseSurface.load()
+
+def cached_calculate_scenario_comparison(campaigns1, campaigns2, n_simulations=COMPARE_N_SIMULATIONS, seed=None, sampler="mc"):
+    """calculate_scenario_comparison with a progress bar, memoized on both normalized campaign lists (None if cancelled)"""
+    return cached_with_progress(
+        ("compare", multi_cache_key(campaigns1, n_simulations, seed, sampler=sampler), multi_cache_key(campaigns2, n_simulations, seed, sampler=sampler)),
+        lambda progress: calculate_scenario_comparison(campaigns1, campaigns2, n_simulations, seed, sampler, progress),
+        "Vergleiche Szenarien"
+    )
 
-    # Determine the max simulation duration
-    max_year = int(max(float(c["start_year"]) for c in campaigns) + 10)
-    
-    all_results = []
-    all_npvs = []
-    campaign_contributions = []
-
-    for _ in range(n_simulations):
-        yearly_donors = np.zeros(max_year + 1)
-        yearly_revenue = np.zeros(max_year + 1)
-        yearly_cash_flows = np.zeros(max_year + 1)
-        sim_campaign_metrics = []
-
-        for camp in campaigns:
-            camp_start_year = int(float(camp["start_year"]))
-            booth_days_int = int(float(camp["booth_days"]))
-            investment = float(camp["booth_days"]) * float(camp["booth_cost_per_day"])
-            
-            # Investment in start year
-            yearly_cash_flows[camp_start_year] -= investment
-            
-            # Determine if using empirical data
-            using_empirical_donors = abs(float(camp["donors_per_day"]) - EMPIRICAL_DONORS_MEAN) < EPSILON
-            using_empirical_donation = abs(float(camp["annual_donation"]) - EMPIRICAL_DONATION_MEAN) < EPSILON
-            using_empirical_retention = abs(float(camp["retention_rate"]) - EMPIRICAL_RETENTION[1][0]) < EPSILON
-            
-            actual_donors = EMPIRICAL_DONORS_MEAN if using_empirical_donors else float(camp["donors_per_day"])
-            actual_donation = EMPIRICAL_DONATION_MEAN if using_empirical_donation else float(camp["annual_donation"])
+def cached_convergence_report(campaigns, n_simulations=N_SIMULATIONS, seed=None):
+    """convergence_report of a campaign plan, memoized on the normalized campaign list"""
+    return get_simulation_cache().get_or_compute(
+        ("convergence", multi_cache_key(campaigns, n_simulations, seed)),
+        lambda: convergence_report(campaign_arrays(campaigns), portfolio_years(campaigns), n_simulations, seed=seed)
+    )
 
-            # Simulate daily donor acquisition
-            daily_donors = np.random.normal(actual_donors, EMPIRICAL_DONORS_STD, booth_days_int)
-            daily_donors = np.maximum(daily_donors, 0)
-            initial_donors = int(np.sum(daily_donors))
+def cached_tornado_analysis(booth_days, retention_rate, donors_per_day, booth_cost, annual_donation, change=SENSITIVITY_CHANGE, n_simulations=N_SIMULATIONS, seed=None, sampler="mc"):
+    """tornado_analysis of a single campaign, memoized on the normalized parameters"""
+    return get_simulation_cache().get_or_compute(
+        ("tornado", single_cache_key(booth_days, retention_rate, donors_per_day, booth_cost, annual_donation, n_simulations, seed, sampler=sampler), change),
+        lambda: tornado_analysis(single_campaign(booth_days, retention_rate, donors_per_day, booth_cost, annual_donation), change, n_simulations, seed, sampler)
+    )
 
-            camp_donors = np.zeros(max_year + 1)
-            camp_revenue = np.zeros(max_year + 1)
-            
-            # Year 0 (acquisition year) - only 2-3 months of donations
-            camp_donors[camp_start_year] = initial_donors
-            months_of_donation = np.random.uniform(2.0, 3.0) / 12.0
-            donation_sample = np.random.normal(actual_donation, EMPIRICAL_DONATION_STD)
-            first_year_revenue = initial_donors * max(donation_sample, 50) * months_of_donation
-            camp_revenue[camp_start_year] = first_year_revenue
-            yearly_revenue[camp_start_year] += first_year_revenue
-            yearly_cash_flows[camp_start_year] += first_year_revenue
-
-            # Subsequent years
-            curr_donors = initial_donors
-            for yr in range(camp_start_year + 1, min(camp_start_year + 11, max_year + 1)):
-                year_since_start = yr - camp_start_year
-                
-                # Retention rate logic
-                if using_empirical_retention:
-                    if year_since_start == 1:
-                        ret_mean, ret_std = EMPIRICAL_RETENTION[1]
-                    elif year_since_start == 2:
-                        ret_mean, ret_std = EMPIRICAL_RETENTION[2]
-                    else:
-                        ret_mean, ret_std = EMPIRICAL_RETENTION[3]
-                else:
-                    ret_mean = float(camp["retention_rate"])
-                    ret_std = EMPIRICAL_RETENTION[1][1]
+def cached_optimize_schedule(campaigns, bounds, budget, year_cap=None, objective="mean", n_simulations=OPTIMIZER_SIMULATIONS, seed=None, sampler="mc"):
+    """optimize_schedule of a campaign plan, memoized on the plan, bounds and constraints"""
+    return get_simulation_cache().get_or_compute(
+        (
+            "optimize",
+            multi_cache_key(campaigns, n_simulations, seed, sampler=sampler),
+            tuple((tuple(b["start_year"]), tuple(b["booth_days"])) for b in bounds),
+            budget,
+            year_cap,
+            objective,
+        ),
+        lambda: optimize_schedule(campaigns, bounds, budget, year_cap, objective, n_simulations, seed, sampler)
+    )
 
-                retention_decimal = np.random.normal(ret_mean / 100, ret_std / 100)
-                retention_decimal = min(1, max(0, retention_decimal))
-                
-                curr_donors = int(curr_donors * retention_decimal)
-                if curr_donors < 1:
-                    break
-
-                camp_donors[yr] = curr_donors
-                donation_sample = np.random.normal(actual_donation, EMPIRICAL_DONATION_STD)
-                revenue = curr_donors * max(donation_sample, 50)
-                camp_revenue[yr] = revenue
-                
-                yearly_donors[yr] += curr_donors
-                yearly_revenue[yr] += revenue
-                yearly_cash_flows[yr] += revenue
-
-            sim_campaign_metrics.append({
-                "donors": camp_donors,
-                "revenue": camp_revenue,
-                "investment": investment,
-            })
+def start_progress(label):
+    """
+    Progress bar with a cancel button in a placeholder; returns the
+    placeholder and progress(completed paths, total paths), which updates the
+    bar with the throughput and the remaining time extrapolated from it (at
+    most every PREVIEW_INTERVAL seconds)
+    """
+    status = st.empty()
+    with status.container():
+        bar = st.progress(0.0, text=f"🔄 {label}...")
+        st.button("⏹️ Berechnung abbrechen", key="cancel_simulation")
+    started = time.perf_counter()
+    last_update = [0.0]
+
+    def progress(completed, total):
+        now = time.perf_counter()
+        if now - last_update[0] < PREVIEW_INTERVAL and completed < total:
+            return
+        last_update[0] = now
+        rate = completed / max(now - started, 1e-9)
+        eta = (total - completed) / rate if rate else 0.0
+        bar.progress(
+            min(completed / total, 1.0) if total else 1.0,
+            text=f"🔄 {label}: {completed:,} von {total:,} Simulationen · {rate:,.0f} Simulationen/s · noch ca. {eta:.1f} s"
+        )
 
-        # Calculate NPV
-        npv = calculate_npv(yearly_cash_flows)
-        all_npvs.append(npv)
-        
-        # Calculate cumulative
-        cumulative_cash_flows = np.cumsum(yearly_cash_flows)
-        discounted_cash_flows = yearly_cash_flows * ((1 + DISCOUNT_RATE) ** (-np.arange(len(yearly_cash_flows))))
-        cumulative_discounted = np.cumsum(discounted_cash_flows)
-        
-        all_results.append(cumulative_discounted)
-        campaign_contributions.append(sim_campaign_metrics)
-
-    # Compute final statistics
-    results_array = np.array(all_results)
-    mean_cumulative = np.mean(results_array, axis=0)
-    lower_ci = np.percentile(results_array, 10, axis=0)
-    upper_ci = np.percentile(results_array, 90, axis=0)
-
-    # Average campaign contributions
-    avg_campaign_contrib = []
-    for i in range(len(campaigns)):
-        donors_across_sims = np.array([sim[i]["donors"] for sim in campaign_contributions])
-        revenue_across_sims = np.array([sim[i]["revenue"] for sim in campaign_contributions])
-        avg_campaign_contrib.append({
-            "donors": np.mean(donors_across_sims, axis=0),
-            "revenue": np.mean(revenue_across_sims, axis=0),
-            "investment": campaign_contributions[0][i]["investment"]
-        })
+    return status, progress
 
-    # Compute yearly totals
-    all_yearly_donors = []
-    all_yearly_revenue = []
-    for sim_contrib in campaign_contributions:
-        combined_donors = np.sum([m["donors"] for m in sim_contrib], axis=0)
-        combined_revenue = np.sum([m["revenue"] for m in sim_contrib], axis=0)
-        all_yearly_donors.append(combined_donors)
-        all_yearly_revenue.append(combined_revenue)
-    
-    total_investment = sum(float(c["booth_days"]) * float(c["booth_cost_per_day"]) for c in campaigns)
-
-    return {
-        "mean_cumulative": mean_cumulative,
-        "lower_ci": lower_ci,
-        "upper_ci": upper_ci,
-        "campaign_contributions": avg_campaign_contrib,
-        "yearly_donors": np.mean(all_yearly_donors, axis=0),
-        "yearly_revenue": np.mean(all_yearly_revenue, axis=0),
-        "mean_npv": np.mean(all_npvs),
-        "total_investment": total_investment
-    }
+def simulation_cancelled():
+    """True in the rerun triggered by the cancel button of a running simulation"""
+    return bool(st.session_state.get("cancel_simulation"))
 
-def create_multi_year_visualization(results, campaigns):
+def stream_with_cache(key, run, render_preview, label, estimate=None):
     """
-    Creates comprehensive visualization of multi-year campaign results
+    Return the cached (precision, result) pair for key. On a miss, consume the
+    progressive results of run(progress) with a progress bar and render each
+    partial result with render_preview (at most every PREVIEW_INTERVAL
+    seconds) into a placeholder that is cleared at the end, then cache and
+    return the final pair.
+    estimate, if given, returns an instant approximate result that is shown
+    (with precision None) before the first batch is done.
+    If the run was cancelled, the last partial pair is returned uncached with
+    precision["cancelled"] set, or None if no batch had finished.
     """
-    years = np.arange(len(results["mean_cumulative"]))
-
-    # 1) Cumulative Net Figure
-    cumulative_fig = go.Figure()
-
-    # Add confidence band
-    cumulative_fig.add_trace(go.Scatter(
-        x=np.concatenate([years, years[::-1]]),
-        y=np.concatenate([results["upper_ci"], results["lower_ci"][::-1]]),
-        fill="toself",
-        fillcolor="rgba(244, 36, 52, 0.1)",
-        line=dict(color="rgba(255,255,255,0)"),
-        name="80% Konfidenzintervall",
-        showlegend=True
-    ))
-
-    # Add mean total line
-    cumulative_fig.add_trace(go.Scatter(
-        x=years,
-        y=results["mean_cumulative"],
-        mode="lines+markers",
-        name="Erwarteter Nettoertrag (diskontiert)",
-        line=dict(color="#F42434", width=3),
-        marker=dict(size=8)
-    ))
-
-    # Add investment line
-    cumulative_fig.add_hline(
-        y=-results["total_investment"],
-        line_dash="dot",
-        line_color="#666666",
-        annotation_text=f"Gesamtinvestition: CHF {results['total_investment']:,.0f}",
-        annotation_position="right"
-    )
+    cache = get_simulation_cache()
+    with span("simulation") as fields:
+        cached = cache.get(key)
+        fields["cached"] = cached is not None
+        if cached is not None:
+            return cached
+
+        if simulation_cancelled():
+            # The cancelled run was stopped by this rerun; keep what it had
+            fields["cancelled"] = True
+            partial = st.session_state.pop("partial_results", None)
+            if partial is None or partial[0] != key:
+                return None
+            precision, results = partial[1]
+            return dict(precision, cancelled=True), results
+
+        status, progress = start_progress(label)
+        preview = st.empty()
+        last_render = 0.0
+        if estimate is not None:
+            with preview.container():
+                render_preview(None, estimate())
+            last_render = time.perf_counter()
+        for precision, results in run(progress):
+            st.session_state.partial_results = (key, (precision, results))
+            if time.perf_counter() - last_render >= PREVIEW_INTERVAL:
+                with preview.container():
+                    render_preview(precision, results)
+                last_render = time.perf_counter()
+        status.empty()
+        preview.empty()
+        st.session_state.pop("partial_results", None)
+        fields["n_simulations"] = precision["n_simulations"]
+        return cache.put(key, (precision, results))
+
+def cached_with_progress(key, compute, label):
+    """
+    Return the cached result for key, or compute(progress) with a progress bar
+    and cache it. Returns None if the run was cancelled (nothing is kept).
+    """
+    cache = get_simulation_cache()
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    if simulation_cancelled():
+        return None
+    status, progress = start_progress(label)
+    result = compute(progress)
+    status.empty()
+    return cache.put(key, result)
+
+def render_cancelled():
+    """Notice for a run cancelled before any result was available; ends the page run"""
+    st.warning("⏹️ Die Berechnung wurde abgebrochen, bevor ein Zwischenergebnis vorlag.")
+    st.button("🔄 Neu berechnen", key="restart_simulation")
+    page_run.fields["cancelled"] = True
+    page_run.finish()
+    st.stop()
+
+def result_caption(precision):
+    """Caption with the precision of a result, or a notice if the run was cancelled"""
+    if precision.get("cancelled"):
+        st.warning(f"⏹️ Berechnung abgebrochen: Zwischenergebnis nach {precision_text(precision)}.")
+        st.button("🔄 Neu berechnen", key="restart_simulation")
+    else:
+        st.caption(f"Basierend auf {precision_text(precision)}")
 
-    # Add break-even line
-    cumulative_fig.add_hline(
-        y=0,
-        line_dash="dash",
-        line_color="gray",
-        annotation_text="Break-Even",
-        annotation_position="left"
-    )
+def render_chart(fig):
+    """Full-width Plotly chart, timed as the chart_render span"""
+    with span("chart_render"):
+        st.plotly_chart(fig, use_container_width=True)
 
-    # Add individual campaign contributions
-    colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FECA57']
-    for idx, contrib in enumerate(results["campaign_contributions"]):
-        camp_net = np.cumsum(contrib["revenue"]) - contrib["investment"]
-        cumulative_fig.add_trace(go.Scatter(
-            x=years,
-            y=camp_net,
-            mode="lines",
-            name=f"Kampagne {idx+1}",
-            line=dict(color=colors[idx % len(colors)], dash="dot"),
-            opacity=0.7
-        ))
-
-    cumulative_fig.update_layout(
-        title="Kumulierter Nettoertrag pro Jahr<br><sub>Mit 3% jährlicher Diskontierung</sub>",
-        xaxis_title="Jahre",
-        yaxis_title="CHF",
-        template="plotly_white",
-        height=450,
-        hovermode='x unified'
-    )
+def render_table(data, **kwargs):
+    """Full-width dataframe (or Styler), timed as the table_render span"""
+    with span("table_render"):
+        st.dataframe(data, use_container_width=True, **kwargs)
+
+def color_scale(column, cmap, vmin, vmax):
+    """
+    CSS of a background gradient over a table column (for Styler.apply),
+    with light text on dark cells like Styler.background_gradient
+    """
+    stops = np.array([[int(color[i:i + 2], 16) for i in (1, 3, 5)] for color in TABLE_COLOR_SCALES[cmap]], dtype=float)
+    position = np.clip((np.asarray(column, dtype=float) - vmin) / ((vmax - vmin) or 1), 0, 1) * (len(stops) - 1)
+    rgb = np.column_stack([np.interp(position, np.arange(len(stops)), stops[:, c]) for c in range(3)])
+    linear = np.where(rgb / 255 <= 0.03928, rgb / 255 / 12.92, ((rgb / 255 + 0.055) / 1.055) ** 2.4)
+    luminance = linear @ [0.2126, 0.7152, 0.0722]
+    return [
+        f"background-color: #{r:02x}{g:02x}{b:02x}; color: {'#f1f1f1' if dark else '#000000'}"
+        for (r, g, b), dark in zip(np.round(rgb).astype(int), luminance < 0.408)
+    ]
 
-    # 2) Donors Figure
-    donors_fig = go.Figure()
-    donors_fig.add_trace(go.Scatter(
-        x=years,
-        y=results["yearly_donors"],
-        mode="lines+markers",
-        name="Gesamt SpenderInnen",
-        line=dict(color="#F42434", width=3),
-        fill='tozeroy',
-        fillcolor='rgba(244,36,52,0.1)'
-    ))
+def render_timing_panel(recorder):
+    """Debug panel with the span breakdown of the current rerun"""
+    with st.expander("⏱️ Zeitmessung dieses Durchlaufs", expanded=True):
+        total_ms = recorder.seconds * 1000
+        render_table(pd.DataFrame([
+            {
+                "Abschnitt": "\u2003" * row["depth"] + TIMING_LABELS.get(row["span"], row["span"]),
+                "Aufrufe": row["count"],
+                "Zeit (ms)": f"{row['ms']:,.1f}",
+                "Anteil": f"{row['ms'] / total_ms:.0%}" if row["depth"] == 0 else "",
+            }
+            for row in recorder.breakdown()
+        ]), hide_index=True)
+        st.caption(f"Gesamt: {total_ms:,.0f} ms. Eingerückte Abschnitte sind in der Zeile darüber enthalten.")
+
+def render_kpi_cards(kpi_data):
+    """Render (label, value, sublabel, explanation) tuples as a row of KPI cards"""
+    st.markdown('<div class="metric-grid">', unsafe_allow_html=True)
     
-    # Add individual campaigns
-    for idx, c in enumerate(results["campaign_contributions"]):
-        donors_fig.add_trace(go.Scatter(
-            x=years,
-            y=c["donors"],
-            mode="lines",
-            name=f"Kampagne {idx+1}",
-            line=dict(color=colors[idx % len(colors)], dash="dot"),
-            opacity=0.7
-        ))
+    cols = st.columns(len(kpi_data))
+    for col, (label, value, sublabel, explanation) in zip(cols, kpi_data):
+        with col:
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-label">{label}</div>
+                <div class="metric-value">{value}</div>
+                <div class="metric-sublabel">{sublabel}</div>
+                <div class="metric-explanation">{explanation}</div>
+            </div>
+            """, unsafe_allow_html=True)
     
-    donors_fig.update_layout(
-        title="SpenderInnenentwicklung",
-        xaxis_title="Jahre",
-        yaxis_title="Anzahl SpenderInnen",
-        template="plotly_white",
-        height=350
-    )
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def single_kpis(inv, cum_disc, revenue, npv):
+    """Break-even year, ROI, total revenue and revenue multiple of a single campaign"""
+    break_even = next((i for i, x in enumerate(cum_disc) if x > 0), 10)
+    roi = (npv / inv) * 100 if inv > 0 else 0
+    total_revenue = np.sum(revenue)
+    revenue_multiple = total_revenue / inv if inv > 0 else 0
+    return break_even, roi, total_revenue, revenue_multiple
+
+def single_kpi_data(break_even, npv, roi, revenue_multiple):
+    """KPI cards of the single campaign page"""
+    kpi_data = [
+        ("Amortisation (diskontiert)", 
+         f"{break_even:.1f} Jahre", 
+         "Zeitwert berücksichtigt",
+         "Ab diesem Zeitpunkt haben Sie Ihre komplette Investition wieder eingespielt und beginnen Gewinn zu machen."),
+        ("Kapitalwert (NPV)", 
+         f"CHF {npv:,.0f}", 
+         "Barwert nach 10 Jahren",
+         "Der heutige Wert aller zukünftigen Einnahmen minus Ihrer Investition. Ein positiver Wert bedeutet: Die Investition lohnt sich!"),
+        ("ROI", 
+         f"{roi:.0f}%", 
+         "Return on Investment",
+         f"Ihre Gesamtrendite: Pro 100 CHF Investition erhalten Sie {roi:.0f} CHF zusätzlich zurück."),
+        ("Umsatzmultiplikator", 
+         f"{revenue_multiple:.1f}x", 
+         "Einnahmen/Investition",
+         f"Sie generieren das {revenue_multiple:.1f}-fache Ihrer Investition an Spendeneinnahmen.")
+    ]
+    return kpi_data
+
+def precision_text(precision):
+    """Path count and achieved NPV precision of a simulation run"""
+    return f"{precision['n_simulations']:,} Simulationen, Kapitalwert auf ± CHF {precision['npv_standard_error']:,.0f} genau (Standardfehler)"
+
+def render_single_preview(precision, results):
+    """Live KPI cards and cumulative chart while a single campaign is simulated"""
+    donors, revenue, inv, cum_disc, lower, upper, cum_undisc, npv = results
+    break_even, roi, total_revenue, revenue_multiple = single_kpis(inv, cum_disc, revenue, npv)
+    if precision is None:
+        st.markdown('<div class="calculation-progress">⚡ Sofortschätzung ohne Simulation, die Simulation läuft...</div>', unsafe_allow_html=True)
+    else:
+        st.markdown(f'<div class="calculation-progress">Vorschau nach {precision_text(precision)}</div>', unsafe_allow_html=True)
+    render_kpi_cards(single_kpi_data(break_even, npv, roi, revenue_multiple))
+    render_chart(create_single_cumulative_figure(inv, cum_disc, lower, upper, cum_undisc, cache=False))
+
+def multi_kpis(results):
+    """Break-even year, ROI and total revenue of a campaign plan"""
+    cum = results["mean_cumulative"]
+    total_invest = results["total_investment"]
+    break_even = next((i for i, x in enumerate(cum) if x > 0), len(cum) - 1)
+    roi = (results["mean_npv"] / total_invest) * 100 if total_invest else 0
+    total_revenue = sum(results["yearly_revenue"])
+    return break_even, roi, total_revenue
+
+def multi_kpi_data(break_even, npv, roi, total_invest, n_campaigns):
+    """KPI cards of the multi-year page"""
+    kpi_data = [
+        ("Amortisation", 
+         f"{break_even:.1f} Jahre", 
+         "Diskontiert",
+         "Nach dieser Zeit haben alle Kampagnen zusammen ihre Kosten wieder eingespielt."),
+        ("Kapitalwert (NPV)", 
+         f"CHF {npv:,.0f}", 
+         "Nach 10 Jahren",
+         "Der Gesamtwert aller Kampagnen in heutigen Franken."),
+        ("ROI", 
+         f"{roi:.0f}%", 
+         "Return on Investment",
+         f"Die Gesamtrendite über alle Kampagnen."),
+        ("Gesamtinvestition", 
+         f"CHF {total_invest:,.0f}", 
+         f"{n_campaigns} Kampagnen",
+         "Die Summe aller Kampagneninvestitionen über die Jahre verteilt.")
+    ]
+    return kpi_data
 
-    # 3) Revenue Figure
-    revenue_fig = go.Figure()
-    revenue_fig.add_trace(go.Bar(
-        x=years,
-        y=results["yearly_revenue"],
-        name="Gesamt Ertrag",
-        marker_color="#F42434",
-        text=[f"CHF {int(v):,}" if v > 1000 else "" for v in results["yearly_revenue"]],
-        textposition="outside"
-    ))
-    
-    revenue_fig.update_layout(
-        title="Jährlicher Spendenertrag",
-        xaxis_title="Jahre",
-        yaxis_title="CHF",
-        template="plotly_white",
-        height=350
-    )
+def render_multi_preview(precision, results):
+    """Live KPI cards and cumulative chart while a campaign plan is simulated"""
+    break_even, roi, total_revenue = multi_kpis(results)
+    if precision is None:
+        st.markdown('<div class="calculation-progress">⚡ Erwartungswerte ohne Simulation, die Simulation der Bandbreite läuft...</div>', unsafe_allow_html=True)
+    else:
+        st.markdown(f'<div class="calculation-progress">Vorschau nach {precision_text(precision)}</div>', unsafe_allow_html=True)
+    render_kpi_cards(multi_kpi_data(break_even, results["mean_npv"], roi, results["total_investment"], len(results["campaign_investment"])))
+    render_chart(create_multi_year_cumulative_figure(results, cache=False))
 
-    return cumulative_fig, donors_fig, revenue_fig
+def render_convergence_report(campaigns):
+    """Expander comparing the precision of all samplers for a campaign plan"""
+    with st.expander("🔬 Konvergenzbericht"):
+        st.markdown(f"""
+        Standardfehler jedes Stichprobenverfahrens bei {CONVERGENCE_SIMULATIONS:,} Simulationen,
+        geschätzt aus {CONVERGENCE_REPLICATIONS} unabhängigen Wiederholungen. Die Effizienz gibt an,
+        wie viele Male mehr Simulationen Monte Carlo für die gleiche Genauigkeit braucht.
+        """)
+        if not st.button("Bericht erstellen", key="convergence_report"):
+            return
+
+        with span("convergence_report"):
+            rows = cached_convergence_report(campaigns, CONVERGENCE_SIMULATIONS, st.session_state.seed)
+        report_df = pd.DataFrame([
+            {
+                "Verfahren": SAMPLER_LABELS[row["sampler"]],
+                "Ø Kapitalwert": f"CHF {row['mean_npv']:,.0f}",
+                "Standardfehler NPV": f"CHF {row['npv_standard_error']:,.0f}",
+                "Effizienz NPV": f"{row['npv_efficiency']:,.1f}×",
+                "Standardfehler 10/90%-Band": f"CHF {row['band_standard_error']:,.0f}",
+                "Effizienz Band": f"{row['band_efficiency']:,.1f}×",
+            }
+            for row in rows
+        ])
+        render_table(report_df, hide_index=True)
+
+def apply_optimized_plan(plan):
+    """Button callback: copy start years and booth days of an optimized plan into the campaign inputs and commit them"""
+    for i, campaign in enumerate(plan):
+        st.session_state[f"m_start_{i}"] = campaign["start_year"]
+        st.session_state[f"m_days_{i}"] = campaign["booth_days"]
+    st.session_state.commit_requested = True
+
+def render_schedule_optimizer(campaigns):
+    """Expander that searches start years and booth days within a budget"""
+    with st.expander("🧮 Zeitplan optimieren"):
+        st.markdown("""
+        Sucht Startjahre und Dialogertage, die den Kapitalwert innerhalb des Budgets maximieren.
+        Spendererwartung, Verbleib und Tageskosten der Kampagnen bleiben unverändert.
+        """)
+        total_investment = sum(c["booth_days"] * c["booth_cost_per_day"] for c in campaigns)
+        oc1, oc2, oc3 = st.columns(3)
+        with oc1:
+            budget = st.number_input("Gesamtbudget (CHF)", min_value=0.0, value=float(total_investment), step=50_000.0, key="opt_budget")
+        with oc2:
+            year_cap = st.number_input("Liquiditätsgrenze pro Jahr (CHF)", min_value=0.0, value=0.0, step=50_000.0, key="opt_year_cap",
+                help="Höchstens so viel Investition aller Kampagnen, die im selben Jahr starten (0 = keine Grenze)")
+        with oc3:
+            objective_label = st.selectbox("Ziel", [OBJECTIVE_LABELS[o] for o in OBJECTIVES], index=0, key="opt_objective",
+                help="Der vorsichtige Kapitalwert wird in 9 von 10 Szenarien erreicht")
+        objective = next(o for o in OBJECTIVES if OBJECTIVE_LABELS[o] == objective_label)
+
+        bounds_df = st.data_editor(
+            pd.DataFrame([
+                {"Kampagne": f"Kampagne {i+1}", "Startjahr von": 0, "Startjahr bis": 10, "Tage von": 10, "Tage bis": 5000}
+                for i in range(len(campaigns))
+            ]),
+            column_config={
+                "Startjahr von": st.column_config.NumberColumn(min_value=0, max_value=10, step=1),
+                "Startjahr bis": st.column_config.NumberColumn(min_value=0, max_value=10, step=1),
+                "Tage von": st.column_config.NumberColumn(min_value=10, max_value=5000, step=1),
+                "Tage bis": st.column_config.NumberColumn(min_value=10, max_value=5000, step=1),
+            },
+            disabled=["Kampagne"],
+            hide_index=True,
+            use_container_width=True,
+            key="opt_bounds"
+        )
+        if not st.button("Optimieren", key="optimize_schedule"):
+            return
+
+        bounds = [
+            {
+                "start_year": (int(row["Startjahr von"]), max(int(row["Startjahr von"]), int(row["Startjahr bis"]))),
+                "booth_days": (float(row["Tage von"]), max(float(row["Tage von"]), float(row["Tage bis"]))),
+            }
+            for _, row in bounds_df.iterrows()
+        ]
+        with span("optimizer"):
+            result = cached_optimize_schedule(campaigns, bounds, budget, year_cap or None, objective, seed=st.session_state.seed, sampler=st.session_state.sampler)
+
+        if not result["feasible"]:
+            st.warning("⚠️ Kein Zeitplan erfüllt Budget und Liquiditätsgrenze innerhalb der Grenzen. Angezeigt wird der Plan mit der kleinsten Überschreitung.")
+        baseline = result["baseline"]
+        rc1, rc2, rc3 = st.columns(3)
+        rc1.metric("Kapitalwert (optimiert)", f"CHF {result['mean_npv']:,.0f}", f"CHF {result['mean_npv'] - baseline['mean_npv']:+,.0f}")
+        rc2.metric("10%-Perzentil (optimiert)", f"CHF {result['npv_p10']:,.0f}", f"CHF {result['npv_p10'] - baseline['npv_p10']:+,.0f}")
+        rc3.metric("Investition (optimiert)", f"CHF {result['total_investment']:,.0f}", help=f"Budget: CHF {budget:,.0f}")
+
+        render_table(pd.DataFrame([
+            {
+                "Kampagne": f"Kampagne {i+1}",
+                "Startjahr (bisher)": int(old["start_year"]),
+                "Startjahr (optimiert)": int(new["start_year"]),
+                "Dialogertage (bisher)": int(old["booth_days"]),
+                "Dialogertage (optimiert)": int(new["booth_days"]),
+                "Investition (optimiert)": f"CHF {new['booth_days'] * new['booth_cost_per_day']:,.0f}",
+            }
+            for i, (old, new) in enumerate(zip(campaigns, result["campaigns"]))
+        ]), hide_index=True)
+        st.caption(
+            f"{result['n_candidates']:,} Zeitpläne auf {OPTIMIZER_SIMULATIONS:,} gemeinsamen Simulationen verglichen. "
+            "Die Veränderung bezieht sich auf den bisherigen Plan auf denselben Simulationen."
+            + ("" if baseline["feasible"] else " Der bisherige Plan hält Budget oder Liquiditätsgrenze nicht ein.")
+        )
+        st.button("Optimierten Plan übernehmen", key="apply_optimized_plan", on_click=apply_optimized_plan, args=(result["campaigns"],))
 
 def create_marketing_insights(results, params):
     """Generate insights for marketing professionals"""
@@ -1058,25 +1181,25 @@ if st.session_state.page != "home":
     if st.session_state.page == "single":
         p = st.session_state.params
         
-        # Add calculation progress indicator
-        calculation_message = st.empty()
-        calculation_message.markdown('<div class="calculation-progress">🔄 Berechne realistische Prognose mit 750 Simulationen... (ca. 20 Sekunden)</div>', unsafe_allow_html=True)
-        
-        donors, revenue, inv, cum_disc, lower, upper, cum_undisc, npv = calculate_metrics(
-            p["booth_days"],
-            p["retention_rate"],
-            p["donors_per_day"],
-            p["booth_cost"],
-            p["annual_donation"]
+        single_args = (p["booth_days"], p["retention_rate"], p["donors_per_day"], p["booth_cost"], p["annual_donation"])
+        adaptive = dict(n_simulations=MAX_SIMULATIONS, seed=st.session_state.seed, target_se=TARGET_NPV_STANDARD_ERROR, deadline=SIMULATION_DEADLINE, sampler=st.session_state.sampler)
+        surface = get_response_surface()
+        streamed = stream_with_cache(
+            single_cache_key(*single_args, **adaptive),
+            lambda progress: iter_metrics(*single_args, **adaptive, progress=progress),
+            render_single_preview,
+            "Berechne Prognose",
+            # The response surface also has the band; the closed form only has the mean
+            estimate=(lambda: surface.estimate(*single_args)) if surface else (lambda: expected_metrics(*single_args))
         )
-        
-        calculation_message.empty()
+        if streamed is None:
+            render_cancelled()
+        precision, (donors, revenue, inv, cum_disc, lower, upper, cum_undisc, npv) = streamed
+        result_caption(precision)
+        page_run.fields.update(params=p, n_simulations=precision["n_simulations"])
 
         # Compute KPIs
-        break_even = next((i for i, x in enumerate(cum_disc) if x > 0), 10)
-        roi = (npv / inv) * 100 if inv > 0 else 0
-        total_revenue = np.sum(revenue)
-        revenue_multiple = total_revenue / inv if inv > 0 else 0
+        break_even, roi, total_revenue, revenue_multiple = single_kpis(inv, cum_disc, revenue, npv)
 
         # Display simple summary first
         create_simple_summary(inv, npv, total_revenue, break_even, roi)
@@ -1100,97 +1223,11 @@ if st.session_state.page != "home":
                 """, unsafe_allow_html=True)
 
         # KPI Cards with explanations
-        st.markdown('<div class="metric-grid">', unsafe_allow_html=True)
-        
-        kpi_data = [
-            ("Amortisation (diskontiert)", 
-             f"{break_even:.1f} Jahre", 
-             "Zeitwert berücksichtigt",
-             "Ab diesem Zeitpunkt haben Sie Ihre komplette Investition wieder eingespielt und beginnen Gewinn zu machen."),
-            ("Kapitalwert (NPV)", 
-             f"CHF {npv:,.0f}", 
-             "Barwert nach 10 Jahren",
-             "Der heutige Wert aller zukünftigen Einnahmen minus Ihrer Investition. Ein positiver Wert bedeutet: Die Investition lohnt sich!"),
-            ("ROI", 
-             f"{roi:.0f}%", 
-             "Return on Investment",
-             f"Ihre Gesamtrendite: Pro 100 CHF Investition erhalten Sie {roi:.0f} CHF zusätzlich zurück."),
-            ("Umsatzmultiplikator", 
-             f"{revenue_multiple:.1f}x", 
-             "Einnahmen/Investition",
-             f"Sie generieren das {revenue_multiple:.1f}-fache Ihrer Investition an Spendeneinnahmen.")
-        ]
-        
-        cols = st.columns(len(kpi_data))
-        for col, (label, value, sublabel, explanation) in zip(cols, kpi_data):
-            with col:
-                st.markdown(f"""
-                <div class="metric-card">
-                    <div class="metric-label">{label}</div>
-                    <div class="metric-value">{value}</div>
-                    <div class="metric-sublabel">{sublabel}</div>
-                    <div class="metric-explanation">{explanation}</div>
-                </div>
-                """, unsafe_allow_html=True)
-        
-        st.markdown('</div>', unsafe_allow_html=True)
+        render_kpi_cards(single_kpi_data(break_even, npv, roi, revenue_multiple))
 
         # Plot: cumulative net with confidence
         years = np.arange(0, 11)
-        fig_cum = go.Figure()
-        
-        # Add investment line
-        fig_cum.add_trace(go.Scatter(
-            x=years,
-            y=[-inv] * len(years),
-            mode="lines",
-            name="Investition",
-            line=dict(color="#666666", width=2, dash="dot"),
-        ))
-        
-        # Add confidence band
-        fig_cum.add_trace(go.Scatter(
-            x=np.concatenate([years, years[::-1]]),
-            y=np.concatenate([upper, lower[::-1]]),
-            fill="toself",
-            fillcolor="rgba(244,36,52,0.1)",
-            line=dict(color="rgba(255,255,255,0)"),
-            name="80% Konfidenzbereich",
-        ))
-        
-        # Add mean discounted line
-        fig_cum.add_trace(go.Scatter(
-            x=years,
-            y=cum_disc,
-            mode="lines+markers",
-            name="Erwarteter Nettoertrag (diskontiert)",
-            line=dict(color="#F42434", width=3),
-            marker=dict(size=8)
-        ))
-        
-        # Add undiscounted line for comparison
-        fig_cum.add_trace(go.Scatter(
-            x=years,
-            y=cum_undisc,
-            mode="lines",
-            name="Nettoertrag (nominal)",
-            line=dict(color="#F42434", width=2, dash="dash"),
-            opacity=0.5
-        ))
-        
-        # Add break-even line
-        fig_cum.add_hline(y=0, line_dash="solid", line_color="green", line_width=1,
-                         annotation_text="Break-Even", annotation_position="left")
-        
-        fig_cum.update_layout(
-            title="Kumulierter Nettoertrag über 10 Jahre<br><sub>Mit 3% jährlicher Diskontierung</sub>",
-            xaxis_title="Jahre nach Kampagnenstart",
-            yaxis_title="CHF",
-            template="plotly_white",
-            height=450,
-            hovermode='x unified'
-        )
-        st.plotly_chart(fig_cum, use_container_width=True)
+        render_chart(create_single_cumulative_figure(inv, cum_disc, lower, upper, cum_undisc))
 
         # Explanation box
         with st.expander("💡 Was bedeuten diese Begriffe?"):
@@ -1211,57 +1248,17 @@ if st.session_state.page != "home":
         # Donors + Revenue side by side
         c1, c2 = st.columns(2)
         with c1:
-            fig_d = go.Figure()
-            fig_d.add_trace(go.Scatter(
-                x=years,
-                y=donors,
-                mode="lines+markers",
-                name="Aktive SpenderInnen",
-                line=dict(color="#F42434", width=2),
-                fill='tozeroy',
-                fillcolor='rgba(244,36,52,0.1)',
-                marker=dict(size=6)
-            ))
-            fig_d.update_layout(
-                title="Aktive SpenderInnen pro Jahr",
-                xaxis_title="Jahre",
-                yaxis_title="SpenderInnen",
-                template="plotly_white",
-                height=350
-            )
-            st.plotly_chart(fig_d, use_container_width=True)
+            render_chart(create_single_donor_figure(donors))
             
         with c2:
-            # Create annotations for small values
-            text_values = []
-            for i, v in enumerate(revenue):
-                if v > 10000:  # Only show for significant values
-                    text_values.append(f"CHF {int(v/1000)}k")
-                else:
-                    text_values.append("")
-            
-            fig_r = go.Figure()
-            fig_r.add_trace(go.Bar(
-                x=years,
-                y=revenue,
-                name="Spendeneinnahmen",
-                marker_color="#F42434",
-                text=text_values,
-                textposition="outside"
-            ))
-            
-            # Highlight year 0 with different color
-            colors = ['#FFCDD2'] + ['#F42434'] * 10
-            fig_r.update_traces(marker_color=colors)
-            
-            fig_r.update_layout(
-                title="Jährliche Spendeneinnahmen<br><sub>Jahr 0: nur 2-3 Monate Spenden</sub>",
-                xaxis_title="Jahre",
-                yaxis_title="CHF",
-                template="plotly_white",
-                height=350
-            )
-            st.plotly_chart(fig_r, use_container_width=True)
+            render_chart(create_single_revenue_figure(revenue))
+
+        # Sensitivity: all low/high variants in one run on shared random numbers
+        st.markdown("##### 🌪️ Was beeinflusst den Kapitalwert am stärksten?")
+        change = st.slider("Veränderung je Parameter (±%)", 5, 30, int(SENSITIVITY_CHANGE * 100), step=5, key="tornado_change")
+        with span("sensitivity"):
+            analysis = cached_tornado_analysis(*single_args, change=change / 100, seed=st.session_state.seed, sampler=st.session_state.sampler)
+        render_chart(create_tornado_figure(analysis))
 
         # Detailed data table
         with st.expander("📋 Detaillierte Jahresübersicht"):
@@ -1283,7 +1280,8 @@ if st.session_state.page != "home":
             })
             
             # Add background gradient for cumulative discounted
-            styled_df = styled_df.background_gradient(
+            styled_df = styled_df.apply(
+                color_scale,
                 subset=['Kumuliert (diskontiert)'], 
                 cmap='RdYlGn', 
                 vmin=-inv, 
@@ -1291,23 +1289,33 @@ if st.session_state.page != "home":
             )
             
             # Add background gradient for revenue
-            styled_df = styled_df.background_gradient(
+            styled_df = styled_df.apply(
+                color_scale,
                 subset=['Spendeneinnahmen'], 
                 cmap='Blues', 
                 vmin=0, 
                 vmax=max(revenue)
             )
             
-            st.dataframe(styled_df, use_container_width=True)
+            render_table(styled_df)
+
+        render_convergence_report([single_campaign(*single_args)])
 
     # B) MEHRJÄHRIGE KAMPAGNE
     elif st.session_state.page == "multi":
-        calculation_message = st.empty()
-        calculation_message.markdown('<div class="calculation-progress">🔄 Berechne Mehrjahresprognose mit 750 Simulationen... (ca. 25 Sekunden)</div>', unsafe_allow_html=True)
-        
-        results = calculate_multi_year_metrics(st.session_state.campaigns)
-        
-        calculation_message.empty()
+        adaptive = dict(n_simulations=MAX_SIMULATIONS, seed=st.session_state.seed, target_se=TARGET_NPV_STANDARD_ERROR, deadline=SIMULATION_DEADLINE, sampler=st.session_state.sampler)
+        streamed = stream_with_cache(
+            multi_cache_key(st.session_state.campaigns, **adaptive),
+            lambda progress: iter_multi_year_metrics(st.session_state.campaigns, **adaptive, progress=progress),
+            render_multi_preview,
+            "Berechne Mehrjahresprognose",
+            estimate=(lambda: expected_multi_year_metrics(st.session_state.campaigns)) if st.session_state.campaigns else None
+        )
+        if streamed is None:
+            render_cancelled()
+        precision, results = streamed
+        result_caption(precision)
+        page_run.fields.update(campaigns=st.session_state.campaigns, n_simulations=precision["n_simulations"])
         
         cum = results["mean_cumulative"]
         lower = results["lower_ci"]
@@ -1316,9 +1324,7 @@ if st.session_state.page != "home":
         npv = results["mean_npv"]
 
         # Break-even, ROI
-        break_even = next((i for i, x in enumerate(cum) if x > 0), len(cum) - 1)
-        roi = (npv / total_invest) * 100 if total_invest else 0
-        total_revenue = sum(results["yearly_revenue"])
+        break_even, roi, total_revenue = multi_kpis(results)
 
         # Display simple summary first
         create_simple_summary(total_invest, npv, total_revenue, break_even, roi)
@@ -1362,50 +1368,17 @@ if st.session_state.page != "home":
                 """, unsafe_allow_html=True)
 
         # KPI Cards with explanations
-        st.markdown('<div class="metric-grid">', unsafe_allow_html=True)
-        
-        kpi_data = [
-            ("Amortisation", 
-             f"{break_even:.1f} Jahre", 
-             "Diskontiert",
-             "Nach dieser Zeit haben alle Kampagnen zusammen ihre Kosten wieder eingespielt."),
-            ("Kapitalwert (NPV)", 
-             f"CHF {npv:,.0f}", 
-             "Nach 10 Jahren",
-             "Der Gesamtwert aller Kampagnen in heutigen Franken."),
-            ("ROI", 
-             f"{roi:.0f}%", 
-             "Return on Investment",
-             f"Die Gesamtrendite über alle Kampagnen."),
-            ("Gesamtinvestition", 
-             f"CHF {total_invest:,.0f}", 
-             f"{len(st.session_state.campaigns)} Kampagnen",
-             "Die Summe aller Kampagneninvestitionen über die Jahre verteilt.")
-        ]
-        
-        cols = st.columns(len(kpi_data))
-        for col, (label, value, sublabel, explanation) in zip(cols, kpi_data):
-            with col:
-                st.markdown(f"""
-                <div class="metric-card">
-                    <div class="metric-label">{label}</div>
-                    <div class="metric-value">{value}</div>
-                    <div class="metric-sublabel">{sublabel}</div>
-                    <div class="metric-explanation">{explanation}</div>
-                </div>
-                """, unsafe_allow_html=True)
-        
-        st.markdown('</div>', unsafe_allow_html=True)
+        render_kpi_cards(multi_kpi_data(break_even, npv, roi, total_invest, len(st.session_state.campaigns)))
 
         # Plots
         cumulative_fig, donors_fig, revenue_fig = create_multi_year_visualization(results, st.session_state.campaigns)
-        st.plotly_chart(cumulative_fig, use_container_width=True)
+        render_chart(cumulative_fig)
 
         c1, c2 = st.columns(2)
         with c1:
-            st.plotly_chart(donors_fig, use_container_width=True)
+            render_chart(donors_fig)
         with c2:
-            st.plotly_chart(revenue_fig, use_container_width=True)
+            render_chart(revenue_fig)
 
         # Detailed breakdown
         with st.expander("📋 Kampagnenübersicht"):
@@ -1431,14 +1404,15 @@ if st.session_state.page != "home":
             })
             
             # Add background gradient for investment
-            styled_camp_df = styled_camp_df.background_gradient(
+            styled_camp_df = styled_camp_df.apply(
+                color_scale,
                 subset=['Investition'], 
                 cmap='Reds', 
                 vmin=0, 
                 vmax=camp_df['Investition'].max()
             )
             
-            st.dataframe(styled_camp_df, use_container_width=True)
+            render_table(styled_camp_df)
             
             # Add yearly breakdown
             st.write("##### Jährliche Übersicht")
@@ -1458,14 +1432,19 @@ if st.session_state.page != "home":
             })
             
             # Add gradients
-            styled_yearly_df = styled_yearly_df.background_gradient(
+            styled_yearly_df = styled_yearly_df.apply(
+                color_scale,
                 subset=['Kumuliert (diskontiert)'], 
                 cmap='RdYlGn', 
                 vmin=-total_invest, 
                 vmax=yearly_df['Kumuliert (diskontiert)'].max()
             )
             
-            st.dataframe(styled_yearly_df, use_container_width=True)
+            render_table(styled_yearly_df)
+
+        if st.session_state.campaigns:
+            render_schedule_optimizer(st.session_state.campaigns)
+            render_convergence_report(st.session_state.campaigns)
 
     # C) SZENARIENVERGLEICH
     elif st.session_state.page == "compare":
@@ -1495,13 +1474,13 @@ if st.session_state.page != "home":
                 "booth_cost_per_day": sc2["booth_cost"],
             })
 
-        calculation_message = st.empty()
-        calculation_message.markdown('<div class="calculation-progress">🔄 Vergleiche Szenarien mit 750 Simulationen... (ca. 35 Sekunden)</div>', unsafe_allow_html=True)
-        
-        results1 = calculate_multi_year_metrics(campaigns1)
-        results2 = calculate_multi_year_metrics(campaigns2)
-        
-        calculation_message.empty()
+        # Both scenarios share their random numbers, so the difference is precise
+        with span("simulation"):
+            comparison = cached_calculate_scenario_comparison(campaigns1, campaigns2, seed=st.session_state.seed, sampler=st.session_state.sampler)
+        if comparison is None:
+            render_cancelled()
+        results1, results2, npv_diff = comparison
+        page_run.fields.update(params=par, n_simulations=COMPARE_N_SIMULATIONS)
 
         net1 = results1["mean_npv"]
         net2 = results2["mean_npv"]
@@ -1516,12 +1495,13 @@ if st.session_state.page != "home":
         total_rev1 = sum(results1["yearly_revenue"])
         total_rev2 = sum(results2["yearly_revenue"])
 
-        # Winner determination
-        if net1 > net2 * 1.1:
+        # Winner determination: at least 10% more NPV, and the confidence
+        # interval of the difference must exclude zero
+        if net1 > net2 * 1.1 and npv_diff["upper"] < 0:
             winner_text = "🏆 Szenario 1 ist deutlich profitabler"
             winner_color = "#E53935"
             winner_num = 1
-        elif net2 > net1 * 1.1:
+        elif net2 > net1 * 1.1 and npv_diff["lower"] > 0:
             winner_text = "🏆 Szenario 2 ist deutlich profitabler"
             winner_color = "#00ACC1"
             winner_num = 2
@@ -1576,6 +1556,7 @@ if st.session_state.page != "home":
             <div style="margin-top: 0.5rem;">
                 <strong>Amortisation:</strong> {'+' if diff_break > 0 else ''}{diff_break:.1f} Jahre<br>
                 <strong>NPV:</strong> {'+' if diff_npv > 0 else ''}CHF {diff_npv:,.0f}<br>
+                <span class="help-text">95%-KI: CHF {npv_diff["lower"]:,.0f} bis {npv_diff["upper"]:,.0f}</span><br>
                 <strong>ROI:</strong> {'+' if diff_roi > 0 else ''}{diff_roi:.1f}%<br>
                 <strong>Investition:</strong> {'+' if diff_inv > 0 else ''}CHF {diff_inv:,.0f}
             </div>
@@ -1598,66 +1579,7 @@ if st.session_state.page != "home":
         st.markdown('</div>', unsafe_allow_html=True)
 
         # Comparison visualization
-        years1 = np.arange(len(results1["mean_cumulative"]))
-        years2 = np.arange(len(results2["mean_cumulative"]))
-        years = np.arange(min(len(years1), len(years2)))
-        
-        # Combined comparison chart
-        fig_compare = go.Figure()
-        
-        # Add confidence bands
-        fig_compare.add_trace(go.Scatter(
-            x=np.concatenate([years, years[::-1]]),
-            y=np.concatenate([results1["upper_ci"][:len(years)], results1["lower_ci"][:len(years)][::-1]]),
-            fill="toself",
-            fillcolor="rgba(229, 57, 53, 0.1)",
-            line=dict(color="rgba(255,255,255,0)"),
-            showlegend=False,
-            hoverinfo='skip'
-        ))
-        
-        fig_compare.add_trace(go.Scatter(
-            x=np.concatenate([years, years[::-1]]),
-            y=np.concatenate([results2["upper_ci"][:len(years)], results2["lower_ci"][:len(years)][::-1]]),
-            fill="toself",
-            fillcolor="rgba(0, 172, 193, 0.1)",
-            line=dict(color="rgba(255,255,255,0)"),
-            showlegend=False,
-            hoverinfo='skip'
-        ))
-        
-        # Add main lines
-        fig_compare.add_trace(go.Scatter(
-            x=years,
-            y=results1["mean_cumulative"][:len(years)],
-            mode='lines+markers',
-            name='Szenario 1',
-            line=dict(color='#E53935', width=3),
-            marker=dict(size=8)
-        ))
-        
-        fig_compare.add_trace(go.Scatter(
-            x=years,
-            y=results2["mean_cumulative"][:len(years)],
-            mode='lines+markers',
-            name='Szenario 2',
-            line=dict(color='#00ACC1', width=3),
-            marker=dict(size=8)
-        ))
-        
-        # Add break-even line
-        fig_compare.add_hline(y=0, line_dash="dash", line_color="gray",
-                            annotation_text="Break-Even", annotation_position="left")
-        
-        fig_compare.update_layout(
-            title="Szenarienvergleich: Kumulierter Nettoertrag<br><sub>Mit 3% jährlicher Diskontierung</sub>",
-            xaxis_title="Jahre",
-            yaxis_title="CHF (diskontiert)",
-            template="plotly_white",
-            height=450,
-            hovermode='x unified'
-        )
-        st.plotly_chart(fig_compare, use_container_width=True)
+        render_chart(create_comparison_figure(results1, results2))
 
         # Side-by-side scenario details
         c1, c2 = st.columns(2)
@@ -1665,116 +1587,21 @@ if st.session_state.page != "home":
         with c1:
             # Scenario 1 details
             st.markdown("### 📊 Szenario 1 Details")
-            fig_s1 = go.Figure()
-            fig_s1.add_trace(go.Scatter(
-                x=years1,
-                y=results1["mean_cumulative"],
-                mode="lines+markers",
-                name="Nettoertrag",
-                line=dict(color="#E53935", width=2),
-                fill='tonexty',
-                fillcolor='rgba(229, 57, 53, 0.1)'
-            ))
-            fig_s1.add_trace(go.Scatter(
-                x=years1,
-                y=[-inv1] * len(years1),
-                mode="lines",
-                name="Investition",
-                line=dict(color="#666666", width=1, dash="dot")
-            ))
-            fig_s1.update_layout(
-                title="Szenario 1: Nettoertrag",
-                xaxis_title="Jahre",
-                yaxis_title="CHF",
-                template="plotly_white",
-                height=300
-            )
-            st.plotly_chart(fig_s1, use_container_width=True)
+            render_chart(create_scenario_figure(results1, "Szenario 1: Nettoertrag", "#E53935", "rgba(229, 57, 53, 0.1)"))
         
         with c2:
             # Scenario 2 details
             st.markdown("### 📊 Szenario 2 Details")
-            fig_s2 = go.Figure()
-            fig_s2.add_trace(go.Scatter(
-                x=years2,
-                y=results2["mean_cumulative"],
-                mode="lines+markers",
-                name="Nettoertrag",
-                line=dict(color="#00ACC1", width=2),
-                fill='tonexty',
-                fillcolor='rgba(0, 172, 193, 0.1)'
-            ))
-            fig_s2.add_trace(go.Scatter(
-                x=years2,
-                y=[-inv2] * len(years2),
-                mode="lines",
-                name="Investition",
-                line=dict(color="#666666", width=1, dash="dot")
-            ))
-            fig_s2.update_layout(
-                title="Szenario 2: Nettoertrag",
-                xaxis_title="Jahre",
-                yaxis_title="CHF",
-                template="plotly_white",
-                height=300
-            )
-            st.plotly_chart(fig_s2, use_container_width=True)
+            render_chart(create_scenario_figure(results2, "Szenario 2: Nettoertrag", "#00ACC1", "rgba(0, 172, 193, 0.1)"))
 
         # Donor and revenue comparison
         col1, col2 = st.columns(2)
         
         with col1:
-            # Donors comparison
-            fig_d = go.Figure()
-            fig_d.add_trace(go.Scatter(
-                x=years,
-                y=results1["yearly_donors"][:len(years)],
-                mode="lines",
-                name="SpenderInnen (S1)",
-                line=dict(color="#E53935", width=2)
-            ))
-            fig_d.add_trace(go.Scatter(
-                x=years,
-                y=results2["yearly_donors"][:len(years)],
-                mode="lines",
-                name="SpenderInnen (S2)",
-                line=dict(color="#00ACC1", width=2)
-            ))
-            fig_d.update_layout(
-                title="Aktive SpenderInnen im Vergleich",
-                xaxis_title="Jahre",
-                yaxis_title="Anzahl SpenderInnen",
-                template="plotly_white",
-                height=300
-            )
-            st.plotly_chart(fig_d, use_container_width=True)
+            render_chart(create_comparison_donor_figure(results1, results2))
         
         with col2:
-            # Revenue comparison
-            fig_r = go.Figure()
-            fig_r.add_trace(go.Bar(
-                x=years,
-                y=results1["yearly_revenue"][:len(years)],
-                name="Ertrag (S1)",
-                marker_color="#E53935",
-                opacity=0.7
-            ))
-            fig_r.add_trace(go.Bar(
-                x=years,
-                y=results2["yearly_revenue"][:len(years)],
-                name="Ertrag (S2)",
-                marker_color="#00ACC1",
-                opacity=0.7
-            ))
-            fig_r.update_layout(
-                title="Jährliche Spendeneinnahmen im Vergleich",
-                xaxis_title="Jahre",
-                yaxis_title="CHF",
-                template="plotly_white",
-                height=300,
-                barmode="group"
-            )
-            st.plotly_chart(fig_r, use_container_width=True)
+            render_chart(create_comparison_revenue_figure(results1, results2))
 
         # Management summary
         with st.expander("📋 Entscheidungshilfe für Management"):
@@ -1829,8 +1656,13 @@ if st.session_state.page != "home":
                     return 'background-color: #FFCDD2'
                 return ''
             
-            styled_comparison = comparison_df.style.applymap(highlight_better, subset=['Differenz'])
-            st.dataframe(styled_comparison, use_container_width=True)
+            styled_comparison = comparison_df.style.map(highlight_better, subset=['Differenz'])
+            render_table(styled_comparison)
+
+page_run.fields["sampler"] = st.session_state.sampler
+page_run.finish()
+if st.session_state.page != "home" and st.session_state.get("debug_timing"):
+    render_timing_panel(page_run)
 
 #####################################################################
 # 6) NAVIGATION BACK TO HOME
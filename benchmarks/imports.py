@@ -0,0 +1,95 @@
+"""
+Import-time budget of the app's cold start.
+
+    python -m benchmarks.imports                # check every page
+    python -m benchmarks.imports --page home    # only the home page
+
+Runs every page once in a fresh interpreter, the way a new server process
+serves its first request (Streamlit's AppTest, with -X importtime), and sums
+the imports that the page run triggers. Streamlit itself, numpy and pandas
+are loaded before the script runs and are not counted. The exit code is 1 if
+a page exceeds its budget, loads a module the app does not use or fails.
+
+Most of the result pages' time is scipy.stats (Sobol sampler), Plotly's
+chart serialization and pandas' Styler, which imports matplotlib.pyplot
+whenever matplotlib is installed.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds of imports per page run; the home page only needs the navigation
+IMPORT_BUDGETS = {
+    "home": 0.05,
+    "single": 2.5,
+    "multi": 2.5,
+    "compare": 2.5,
+}
+# Modules the app does not use; importing them only slows down the cold start
+UNUSED_MODULES = ("plotly.express", "plotly.subplots")
+
+_RUN_MARKER = "-- page run --"
+_PAGE_SCRIPT = f"""
+import json, sys
+from streamlit.testing.v1 import AppTest
+
+# AppTest loads matplotlib for itself; forget it so that a page loading it is counted
+for name in [name for name in sys.modules if name.split(".")[0] == "matplotlib"]:
+    del sys.modules[name]
+at = AppTest.from_file("app.py", default_timeout=300)
+at.session_state["page"] = sys.argv[1]
+print({_RUN_MARKER!r}, file=sys.stderr, flush=True)
+at.run()
+print({_RUN_MARKER!r}, file=sys.stderr, flush=True)
+print(json.dumps({{"modules": sorted(sys.modules), "exceptions": [e.message for e in at.exception]}}))
+"""
+
+def import_seconds(importtime_lines):
+    """Total time of the outermost imports in -X importtime output lines"""
+    total = 0
+    for line in importtime_lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Names are indented by two spaces per nesting level
+        if len(name) - len(name.lstrip()) == 1:
+            total += int(cumulative)
+    return total / 1e6
+
+def measure_page(page):
+    """(import seconds, loaded modules, exception messages) of one page run in a fresh interpreter"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PAGE_SCRIPT, page],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    run_lines = completed.stderr.split(_RUN_MARKER)[1].splitlines()
+    result = json.loads(completed.stdout.splitlines()[-1])
+    return import_seconds(run_lines), result["modules"], result["exceptions"]
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.imports", description="Check the import time of every app page on a cold start.")
+    parser.add_argument("--page", choices=IMPORT_BUDGETS, action="append", help="Only check this page (repeatable)")
+    args = parser.parse_args(argv)
+
+    failures = []
+    print(f"{'page':<10} {'imports (s)':>12} {'budget (s)':>11}")
+    for page in args.page or IMPORT_BUDGETS:
+        seconds, modules, exceptions = measure_page(page)
+        print(f"{page:<10} {seconds:>12.3f} {IMPORT_BUDGETS[page]:>11.3f}")
+        if seconds > IMPORT_BUDGETS[page]:
+            failures.append(f"{page}: imports take {seconds:.3f} s, budget {IMPORT_BUDGETS[page]:.3f} s")
+        for module in UNUSED_MODULES:
+            if module in modules:
+                failures.append(f"{page}: loads {module}")
+        failures.extend(f"{page}: {message}" for message in exceptions)
+    for failure in failures:
+        print(f"FAILED {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
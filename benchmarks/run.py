@@ -0,0 +1,203 @@
+"""
+Benchmarks of the simulation engines and the page render paths.
+
+    python -m benchmarks.run                  # run all cases, compare with the baseline
+    python -m benchmarks.run --filter single  # only cases whose name contains "single"
+    python -m benchmarks.run --update         # store the results as the new baseline
+
+Run from the repository root. Every case runs once to warm up (imports,
+Plotly's lazy validators), once with tracemalloc for its peak memory (Python
+and numpy allocations of this process; pool workers of large runs are not
+included), then --repeats times for the latencies.
+Reported are p50/p95 latency and the throughput in simulated paths per
+second at p50. Timings depend on the machine, so the stored baseline is only
+meaningful on the machine it was recorded on; it records the platform to
+make that visible. With a baseline, the exit code is 1 if any case got
+slower or uses more memory than the tolerance allows.
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from srk_prognose.config import COMPARE_N_SIMULATIONS, N_SIMULATIONS, SIMULATION_SAMPLER, SIMULATION_SEED
+from srk_prognose.model import calculate_metrics, calculate_multi_year_metrics, calculate_scenario_comparison
+from srk_prognose.sampling import SAMPLERS
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_REPEATS = 5
+DEFAULT_TOLERANCE = 0.25  # Allowed relative slowdown / memory growth against the baseline
+COMPARE_SHIFT_SUM_SIMULATIONS = 16_384  # Same NPV difference standard error as COMPARE_N_SIMULATIONS on the full engine (Sobol sampler)
+
+def _campaign(start_year, booth_days=1000.0):
+    """Campaign dict with the default inputs of the app"""
+    return {
+        "start_year": start_year,
+        "booth_days": booth_days,
+        "annual_donation": 261.48,
+        "retention_rate": 83.0,
+        "donors_per_day": 3.5,
+        "booth_cost_per_day": 830.0,
+    }
+
+def benchmark_cases(sampler=SIMULATION_SAMPLER, seed=SIMULATION_SEED):
+    """
+    (name, simulated paths, function) of every benchmark case. Building the
+    list runs nothing: any setup happens on a case's first call.
+    """
+    cases = []
+    for booth_days in (10, 1000, 5000):
+        for n_simulations in (100, 1_000, 10_000, 100_000):
+            cases.append((
+                f"single/days={booth_days}/n={n_simulations}",
+                n_simulations,
+                lambda b=booth_days, n=n_simulations: calculate_metrics(b, 83.0, 3.5, 830.0, 261.48, n, seed, sampler),
+            ))
+
+    # Million-path run with streaming percentile sketches (constant memory)
+    cases.append((
+        "single/days=1000/n=1000000/sketch",
+        1_000_000,
+        lambda: calculate_metrics(1000, 83.0, 3.5, 830.0, 261.48, 1_000_000, seed, sampler, sketch=True),
+    ))
+
+    # Staggered plans: campaign i starts in year i
+    for n_campaigns in (1, 2, 5, 10):
+        campaigns = [_campaign(i) for i in range(n_campaigns)]
+        cases.append((
+            f"multi/campaigns={n_campaigns}/n={N_SIMULATIONS}",
+            N_SIMULATIONS,
+            lambda c=campaigns: calculate_multi_year_metrics(c, N_SIMULATIONS, seed, sampler),
+        ))
+
+    # The compare page's longest case: one campaign per year for 15 years in both scenarios
+    plan1 = [_campaign(year) for year in range(15)]
+    plan2 = [_campaign(year, booth_days=1500.0) for year in range(15)]
+    cases.append((
+        f"compare/years=15/n={COMPARE_N_SIMULATIONS}",
+        2 * COMPARE_N_SIMULATIONS,
+        lambda: calculate_scenario_comparison(plan1, plan2, COMPARE_N_SIMULATIONS, seed, sampler),
+    ))
+    # Shift-and-sum engine with the paths it needs for the same confidence interval of the difference
+    cases.append((
+        f"compare/years=15/n={COMPARE_SHIFT_SUM_SIMULATIONS}/shift-sum",
+        2 * COMPARE_SHIFT_SUM_SIMULATIONS,
+        lambda: calculate_scenario_comparison(plan1, plan2, COMPARE_SHIFT_SUM_SIMULATIONS, seed, sampler, shift_sum=True),
+    ))
+
+    # Figure construction only: the results are simulated on the first
+    # (warm-up) call of a figure case, so filtered-out cases cost nothing
+    @functools.lru_cache(maxsize=None)
+    def figure_inputs():
+        plan = [_campaign(i) for i in range(10)]
+        return calculate_multi_year_metrics(plan, N_SIMULATIONS, seed, sampler), plan
+
+    def build_figures():
+        from charts import clear_figure_cache, create_multi_year_visualization
+
+        clear_figure_cache()
+        return create_multi_year_visualization(*figure_inputs())
+
+    def build_cached_figures():
+        from charts import create_multi_year_visualization
+
+        return create_multi_year_visualization(*figure_inputs())
+
+    cases.append(("charts/multi_year_visualization/campaigns=10", 0, build_figures))
+    cases.append(("charts/multi_year_visualization/campaigns=10/cached", 0, build_cached_figures))
+    return cases
+
+def run_case(function, n_paths, repeats):
+    """Peak memory (MB), p50/p95 latency (s) and paths/s of one case"""
+    function()
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - started)
+    p50, p95 = np.percentile(latencies, [50, 95])
+    return {
+        "p50_s": float(p50),
+        "p95_s": float(p95),
+        "paths_per_s": n_paths / p50 if n_paths else None,
+        "peak_mb": peak / 2 ** 20,
+    }
+
+def machine_info():
+    """Platform the results were measured on"""
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+def regressions(results, baseline, tolerance):
+    """Messages for every case that is slower or uses more memory than the baseline allows"""
+    messages = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        for key, label in (("p50_s", "p50 latency"), ("peak_mb", "peak memory")):
+            if result[key] > reference[key] * (1 + tolerance):
+                messages.append(f"{name}: {label} {result[key]:.4g} vs. baseline {reference[key]:.4g} (+{result[key] / reference[key] - 1:.0%})")
+    return messages
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Benchmark the simulation engines and charts.")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this text")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help=f"Timed runs per case (default: {DEFAULT_REPEATS})")
+    parser.add_argument("--sampler", choices=SAMPLERS, default=SIMULATION_SAMPLER, help=f"Random number sampler (default: {SIMULATION_SAMPLER})")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help=f"Allowed relative regression (default: {DEFAULT_TOLERANCE})")
+    parser.add_argument("--update", action="store_true", help="Store the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    results = {}
+    print(f"{'case':<48} {'p50 (s)':>10} {'p95 (s)':>10} {'paths/s':>12} {'peak (MB)':>10}")
+    for name, n_paths, function in benchmark_cases(args.sampler):
+        if args.filter not in name:
+            continue
+        result = results[name] = run_case(function, n_paths, args.repeats)
+        paths_per_s = f"{result['paths_per_s']:,.0f}" if result["paths_per_s"] else "-"
+        print(f"{name:<48} {result['p50_s']:>10.4f} {result['p95_s']:>10.4f} {paths_per_s:>12} {result['peak_mb']:>10.1f}")
+
+    if args.update:
+        stored = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                stored = json.load(f)["cases"]
+        stored.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump({"machine": machine_info(), "sampler": args.sampler, "cases": stored}, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline stored yet (run with --update)")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["machine"] != machine_info() or baseline["sampler"] != args.sampler:
+        print("Note: the baseline was recorded on another machine or with another sampler")
+    messages = regressions(results, baseline["cases"], args.tolerance)
+    for message in messages:
+        print(f"REGRESSION {message}")
+    return 1 if messages else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
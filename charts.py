@@ -0,0 +1,509 @@
+"""
+Plotly figures of the result pages.
+Only builds figures from result arrays and dicts (no Streamlit), so they can
+be benchmarked and tested without running the app.
+
+Figures are cached on a hash of their inputs, so a rerun with unchanged
+results reuses them instead of rebuilding and validating every trace. Values
+are rounded (CHF to whole francs) and long traces thinned to a point budget
+to keep the JSON that is sent to the browser on every rerun small; long or
+many traces are drawn with WebGL (Scattergl).
+"""
+import functools
+import hashlib
+
+import numpy as np
+import plotly.graph_objects as go
+
+from srk_prognose.cache import SimulationCache
+from srk_prognose.timing import timed
+
+FIGURE_CACHE_SIZE = 64  # Figures kept per server process
+FIGURE_POINT_BUDGET = 2_000  # Max points of all line traces of one figure
+SCATTERGL_MIN_POINTS = 200  # Traces at least this long are drawn with WebGL ...
+SCATTERGL_MIN_TRACES = 12  # ... and so are figures with at least this many traces
+
+SENSITIVITY_LABELS = {
+    "donors_per_day": "Ø Spender/Tag",
+    "annual_donation": "Spendenbetrag/Person",
+    "retention_rate": "Verbleibsquote (alle Jahre)",
+    "retention_year_1": "Verbleibsquote Jahr 1",
+    "retention_year_2": "Verbleibsquote Jahr 2",
+    "retention_year_3": "Verbleibsquote Jahr 3+",
+    "booth_cost": "Kosten pro Tag",
+    "discount_rate": "Diskontsatz",
+}
+
+_figure_cache = SimulationCache(FIGURE_CACHE_SIZE)
+
+def _fingerprint(value, digest):
+    """Feed a (nested) figure input into a hash"""
+    if isinstance(value, np.ndarray):
+        digest.update(f"array{value.dtype}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        digest.update(b"dict")
+        for key in sorted(value, key=str):
+            digest.update(str(key).encode())
+            _fingerprint(value[key], digest)
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"seq{len(value)}".encode())
+        for item in value:
+            _fingerprint(item, digest)
+    else:
+        digest.update(repr(value).encode())
+
+def cached_figure(function):
+    """
+    Cache a figure function on a hash of its arguments (figures are shared, do
+    not modify them). cache=False builds the figure without storing it, for
+    figures that are shown once such as live previews.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, cache=True):
+        if not cache:
+            return function(*args)
+        digest = hashlib.blake2b(function.__qualname__.encode(), digest_size=16)
+        _fingerprint(args, digest)
+        return _figure_cache.get_or_compute(digest.hexdigest(), lambda: function(*args))
+    return wrapper
+
+def figure_cache_stats():
+    """Size and hit/miss counters of the figure cache"""
+    return _figure_cache.stats()
+
+def clear_figure_cache():
+    """Drop all cached figures, e.g. to time their construction"""
+    _figure_cache.clear()
+
+def _chf(values):
+    """CHF values rounded to whole francs (shorter JSON)"""
+    return np.round(np.asarray(values, dtype=float)).astype(np.int64)
+
+def _count(values):
+    """Donor counts rounded to one decimal"""
+    return np.round(np.asarray(values, dtype=float), 1)
+
+def _thin(n_points, n_traces):
+    """Indices of the points kept per trace so that n_traces traces fit FIGURE_POINT_BUDGET"""
+    per_trace = max(FIGURE_POINT_BUDGET // max(n_traces, 1), 2)
+    if n_points <= per_trace:
+        return np.arange(n_points)
+    return np.unique(np.round(np.linspace(0, n_points - 1, per_trace)).astype(int))
+
+def _scatter(n_points, n_traces):
+    """Scatter trace class for a figure: WebGL for long horizons or many traces"""
+    if n_points >= SCATTERGL_MIN_POINTS or n_traces >= SCATTERGL_MIN_TRACES:
+        return go.Scattergl
+    return go.Scatter
+
+def _band(scatter, years, upper, lower, **style):
+    """Filled polygon between the upper and lower percentile curves"""
+    return scatter(
+        x=np.r_[years, years[::-1]],
+        y=_chf(np.r_[upper, lower[::-1]]),
+        fill="toself",
+        line=dict(color="rgba(255,255,255,0)"),
+        **style
+    )
+
+@timed("figures")
+@cached_figure
+def create_single_cumulative_figure(inv, cum_disc, lower, upper, cum_undisc):
+    """Cumulative net revenue of a single campaign with its 80% band"""
+    years = np.arange(0, 11)
+    scatter = _scatter(len(years), 4)
+    fig_cum = go.Figure()
+    
+    # Add investment line
+    fig_cum.add_trace(scatter(
+        x=years,
+        y=_chf([-inv] * len(years)),
+        mode="lines",
+        name="Investition",
+        line=dict(color="#666666", width=2, dash="dot"),
+    ))
+    
+    # Add confidence band
+    fig_cum.add_trace(_band(
+        scatter, years, upper, lower,
+        fillcolor="rgba(244,36,52,0.1)",
+        name="80% Konfidenzbereich",
+    ))
+    
+    # Add mean discounted line
+    fig_cum.add_trace(scatter(
+        x=years,
+        y=_chf(cum_disc),
+        mode="lines+markers",
+        name="Erwarteter Nettoertrag (diskontiert)",
+        line=dict(color="#F42434", width=3),
+        marker=dict(size=8)
+    ))
+    
+    # Add undiscounted line for comparison
+    fig_cum.add_trace(scatter(
+        x=years,
+        y=_chf(cum_undisc),
+        mode="lines",
+        name="Nettoertrag (nominal)",
+        line=dict(color="#F42434", width=2, dash="dash"),
+        opacity=0.5
+    ))
+    
+    # Add break-even line
+    fig_cum.add_hline(y=0, line_dash="solid", line_color="green", line_width=1,
+                     annotation_text="Break-Even", annotation_position="left")
+    
+    fig_cum.update_layout(
+        title="Kumulierter Nettoertrag über 10 Jahre<br><sub>Mit 3% jährlicher Diskontierung</sub>",
+        xaxis_title="Jahre nach Kampagnenstart",
+        yaxis_title="CHF",
+        template="plotly_white",
+        height=450,
+        hovermode='x unified'
+    )
+    return fig_cum
+
+@timed("figures")
+@cached_figure
+def create_single_donor_figure(donors):
+    """Active donors per year of a single campaign"""
+    years = np.arange(len(donors))
+    fig_d = go.Figure()
+    fig_d.add_trace(_scatter(len(years), 1)(
+        x=years,
+        y=_count(donors),
+        mode="lines+markers",
+        name="Aktive SpenderInnen",
+        line=dict(color="#F42434", width=2),
+        fill='tozeroy',
+        fillcolor='rgba(244,36,52,0.1)',
+        marker=dict(size=6)
+    ))
+    fig_d.update_layout(
+        title="Aktive SpenderInnen pro Jahr",
+        xaxis_title="Jahre",
+        yaxis_title="SpenderInnen",
+        template="plotly_white",
+        height=350
+    )
+    return fig_d
+
+@timed("figures")
+@cached_figure
+def create_single_revenue_figure(revenue):
+    """Yearly revenue of a single campaign, year 0 (2-3 months only) highlighted"""
+    years = np.arange(len(revenue))
+    # Only label significant values
+    text_values = [f"CHF {int(v/1000)}k" if v > 10000 else "" for v in revenue]
+    fig_r = go.Figure()
+    fig_r.add_trace(go.Bar(
+        x=years,
+        y=_chf(revenue),
+        name="Spendeneinnahmen",
+        marker_color=['#FFCDD2'] + ['#F42434'] * (len(years) - 1),
+        text=text_values,
+        textposition="outside"
+    ))
+    fig_r.update_layout(
+        title="Jährliche Spendeneinnahmen<br><sub>Jahr 0: nur 2-3 Monate Spenden</sub>",
+        xaxis_title="Jahre",
+        yaxis_title="CHF",
+        template="plotly_white",
+        height=350
+    )
+    return fig_r
+
+@timed("figures")
+@cached_figure
+def create_multi_year_cumulative_figure(results):
+    """
+    Cumulative net revenue of a campaign plan with its 80% band and the
+    contribution of every campaign
+    """
+    years = np.arange(len(results["mean_cumulative"]))
+    n_campaigns = len(results["campaign_investment"])
+    scatter = _scatter(len(years), n_campaigns + 2)
+    keep = _thin(len(years), n_campaigns + 3)
+    cumulative_fig = go.Figure()
+
+    # Add confidence band
+    cumulative_fig.add_trace(_band(
+        scatter, years[keep], results["upper_ci"][keep], results["lower_ci"][keep],
+        fillcolor="rgba(244, 36, 52, 0.1)",
+        name="80% Konfidenzintervall",
+        showlegend=True
+    ))
+
+    # Add mean total line
+    cumulative_fig.add_trace(scatter(
+        x=years[keep],
+        y=_chf(results["mean_cumulative"][keep]),
+        mode="lines+markers",
+        name="Erwarteter Nettoertrag (diskontiert)",
+        line=dict(color="#F42434", width=3),
+        marker=dict(size=8)
+    ))
+
+    # Add investment line
+    cumulative_fig.add_hline(
+        y=-results["total_investment"],
+        line_dash="dot",
+        line_color="#666666",
+        annotation_text=f"Gesamtinvestition: CHF {results['total_investment']:,.0f}",
+        annotation_position="right"
+    )
+
+    # Add break-even line
+    cumulative_fig.add_hline(
+        y=0,
+        line_dash="dash",
+        line_color="gray",
+        annotation_text="Break-Even",
+        annotation_position="left"
+    )
+
+    # Add individual campaign contributions
+    colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FECA57']
+    camp_nets = np.cumsum(results["campaign_revenue"], axis=1) - results["campaign_investment"][:, None]
+    for idx, camp_net in enumerate(camp_nets):
+        cumulative_fig.add_trace(scatter(
+            x=years[keep],
+            y=_chf(camp_net[keep]),
+            mode="lines",
+            name=f"Kampagne {idx+1}",
+            line=dict(color=colors[idx % len(colors)], dash="dot"),
+            opacity=0.7
+        ))
+
+    cumulative_fig.update_layout(
+        title="Kumulierter Nettoertrag pro Jahr<br><sub>Mit 3% jährlicher Diskontierung</sub>",
+        xaxis_title="Jahre",
+        yaxis_title="CHF",
+        template="plotly_white",
+        height=450,
+        hovermode='x unified'
+    )
+    return cumulative_fig
+
+@timed("figures")
+@cached_figure
+def create_multi_year_visualization(results, campaigns):
+    """
+    Creates comprehensive visualization of multi-year campaign results
+    """
+    years = np.arange(len(results["mean_cumulative"]))
+    n_campaigns = len(results["campaign_investment"])
+
+    # 1) Cumulative Net Figure
+    cumulative_fig = create_multi_year_cumulative_figure(results)
+
+    # 2) Donors Figure
+    colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FECA57']
+    scatter = _scatter(len(years), n_campaigns + 1)
+    keep = _thin(len(years), n_campaigns + 1)
+    donors_fig = go.Figure()
+    donors_fig.add_trace(scatter(
+        x=years[keep],
+        y=_count(results["yearly_donors"][keep]),
+        mode="lines+markers",
+        name="Gesamt SpenderInnen",
+        line=dict(color="#F42434", width=3),
+        fill='tozeroy',
+        fillcolor='rgba(244,36,52,0.1)'
+    ))
+    
+    # Add individual campaigns
+    for idx, camp_donors in enumerate(results["campaign_donors"]):
+        donors_fig.add_trace(scatter(
+            x=years[keep],
+            y=_count(camp_donors[keep]),
+            mode="lines",
+            name=f"Kampagne {idx+1}",
+            line=dict(color=colors[idx % len(colors)], dash="dot"),
+            opacity=0.7
+        ))
+    
+    donors_fig.update_layout(
+        title="SpenderInnenentwicklung",
+        xaxis_title="Jahre",
+        yaxis_title="Anzahl SpenderInnen",
+        template="plotly_white",
+        height=350
+    )
+
+    # 3) Revenue Figure
+    revenue_fig = go.Figure()
+    revenue_fig.add_trace(go.Bar(
+        x=years,
+        y=_chf(results["yearly_revenue"]),
+        name="Gesamt Ertrag",
+        marker_color="#F42434",
+        text=[f"CHF {int(v):,}" if v > 1000 else "" for v in results["yearly_revenue"]],
+        textposition="outside"
+    ))
+    
+    revenue_fig.update_layout(
+        title="Jährlicher Spendenertrag",
+        xaxis_title="Jahre",
+        yaxis_title="CHF",
+        template="plotly_white",
+        height=350
+    )
+
+    return cumulative_fig, donors_fig, revenue_fig
+
+@timed("figures")
+@cached_figure
+def create_comparison_figure(results1, results2):
+    """Cumulative net revenue of two scenarios with their 80% bands, over their common years"""
+    n_years = min(len(results1["mean_cumulative"]), len(results2["mean_cumulative"]))
+    years = np.arange(n_years)
+    scatter = _scatter(n_years, 4)
+    fig_compare = go.Figure()
+
+    # Add confidence bands
+    for results, fillcolor in ((results1, "rgba(229, 57, 53, 0.1)"), (results2, "rgba(0, 172, 193, 0.1)")):
+        fig_compare.add_trace(_band(
+            scatter, years, results["upper_ci"][:n_years], results["lower_ci"][:n_years],
+            fillcolor=fillcolor,
+            showlegend=False,
+            hoverinfo='skip'
+        ))
+
+    # Add main lines
+    for results, name, color in ((results1, 'Szenario 1', '#E53935'), (results2, 'Szenario 2', '#00ACC1')):
+        fig_compare.add_trace(scatter(
+            x=years,
+            y=_chf(results["mean_cumulative"][:n_years]),
+            mode='lines+markers',
+            name=name,
+            line=dict(color=color, width=3),
+            marker=dict(size=8)
+        ))
+
+    # Add break-even line
+    fig_compare.add_hline(y=0, line_dash="dash", line_color="gray",
+                        annotation_text="Break-Even", annotation_position="left")
+
+    fig_compare.update_layout(
+        title="Szenarienvergleich: Kumulierter Nettoertrag<br><sub>Mit 3% jährlicher Diskontierung</sub>",
+        xaxis_title="Jahre",
+        yaxis_title="CHF (diskontiert)",
+        template="plotly_white",
+        height=450,
+        hovermode='x unified'
+    )
+    return fig_compare
+
+@timed("figures")
+@cached_figure
+def create_scenario_figure(results, title, color, fillcolor):
+    """Cumulative net revenue and total investment of one scenario"""
+    years = np.arange(len(results["mean_cumulative"]))
+    scatter = _scatter(len(years), 2)
+    fig = go.Figure()
+    fig.add_trace(scatter(
+        x=years,
+        y=_chf(results["mean_cumulative"]),
+        mode="lines+markers",
+        name="Nettoertrag",
+        line=dict(color=color, width=2),
+        fill='tonexty',
+        fillcolor=fillcolor
+    ))
+    fig.add_trace(scatter(
+        x=years,
+        y=_chf([-results["total_investment"]] * len(years)),
+        mode="lines",
+        name="Investition",
+        line=dict(color="#666666", width=1, dash="dot")
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis_title="Jahre",
+        yaxis_title="CHF",
+        template="plotly_white",
+        height=300
+    )
+    return fig
+
+@timed("figures")
+@cached_figure
+def create_comparison_donor_figure(results1, results2):
+    """Active donors per year of two scenarios"""
+    n_years = min(len(results1["yearly_donors"]), len(results2["yearly_donors"]))
+    years = np.arange(n_years)
+    scatter = _scatter(n_years, 2)
+    fig_d = go.Figure()
+    for results, name, color in ((results1, "SpenderInnen (S1)", "#E53935"), (results2, "SpenderInnen (S2)", "#00ACC1")):
+        fig_d.add_trace(scatter(
+            x=years,
+            y=_count(results["yearly_donors"][:n_years]),
+            mode="lines",
+            name=name,
+            line=dict(color=color, width=2)
+        ))
+    fig_d.update_layout(
+        title="Aktive SpenderInnen im Vergleich",
+        xaxis_title="Jahre",
+        yaxis_title="Anzahl SpenderInnen",
+        template="plotly_white",
+        height=300
+    )
+    return fig_d
+
+@timed("figures")
+@cached_figure
+def create_comparison_revenue_figure(results1, results2):
+    """Yearly revenue of two scenarios as grouped bars"""
+    n_years = min(len(results1["yearly_revenue"]), len(results2["yearly_revenue"]))
+    years = np.arange(n_years)
+    fig_r = go.Figure()
+    for results, name, color in ((results1, "Ertrag (S1)", "#E53935"), (results2, "Ertrag (S2)", "#00ACC1")):
+        fig_r.add_trace(go.Bar(
+            x=years,
+            y=_chf(results["yearly_revenue"][:n_years]),
+            name=name,
+            marker_color=color,
+            opacity=0.7
+        ))
+    fig_r.update_layout(
+        title="Jährliche Spendeneinnahmen im Vergleich",
+        xaxis_title="Jahre",
+        yaxis_title="CHF",
+        template="plotly_white",
+        height=300,
+        barmode="group"
+    )
+    return fig_r
+
+@timed("figures")
+@cached_figure
+def create_tornado_figure(analysis):
+    """Tornado chart of the NPV change when each input moves down / up"""
+    rows = analysis["rows"][::-1]  # Largest swing at the top
+    change = analysis["change"] * 100
+    labels = [SENSITIVITY_LABELS[row["parameter"]] for row in rows]
+
+    fig = go.Figure()
+    for direction, color, key in (("low", "#00ACC1", "delta_low"), ("high", "#F42434", "delta_high")):
+        sign = "−" if direction == "low" else "+"
+        fig.add_trace(go.Bar(
+            y=labels,
+            x=_chf([row[key] for row in rows]),
+            orientation="h",
+            name=f"Parameter {sign}{change:.0f}%",
+            marker_color=color,
+            customdata=[[row[f"{direction}_value"], row["base_value"]] for row in rows],
+            hovertemplate="%{y}: %{customdata[1]:,.4g} → %{customdata[0]:,.4g}<br>Δ Kapitalwert: CHF %{x:,.0f}<extra></extra>"
+        ))
+    fig.update_layout(
+        title=f"Einfluss auf den Kapitalwert bei ±{change:.0f}% je Parameter<br><sub>Basis: CHF {analysis['base_npv']:,.0f}</sub>",
+        xaxis_title="Δ Kapitalwert (CHF)",
+        barmode="overlay",
+        template="plotly_white",
+        height=80 + 45 * len(rows)
+    )
+    return fig
@@ -0,0 +1,7 @@
+"""
+Headless financial model of the SRK Prognose Tool.
+srk_prognose.model holds the NPV, payback and ROI helpers and the simulation
+engines; app.py is only the Streamlit UI on top of it. Nothing in this package
+imports Streamlit or Plotly, so it can be used by process pool workers,
+benchmarks and command line tools.
+"""
@@ -0,0 +1,221 @@
+"""
+Running aggregates of a simulation that grows batch by batch
+"""
+import math
+import time
+
+import numpy as np
+
+from .config import CONFIDENCE_Z, SIMULATION_BATCH_SIZE
+from .sampling import batch_groups
+from .simulation import BatchWorkspace, batch_streams, run_batches
+from .sketch import QuantileSketch
+from .timing import span
+
+def _group_sums(values, first_batch, groups):
+    """Sums and counts of per-path values by group, batch first_batch + i of them in group (first_batch + i) mod groups"""
+    group = (first_batch + np.arange(len(values)) // SIMULATION_BATCH_SIZE) % groups
+    return np.bincount(group, values, groups), np.bincount(group, minlength=groups)
+
+def _group_standard_error(sums, counts):
+    """Standard error of the mean from the means of independent groups; inf until every group has paths"""
+    if not counts.all():
+        return math.inf
+    return float(np.std(sums / counts, ddof=1) / math.sqrt(len(counts)))
+
+class RunningAggregate:
+    """
+    Path count, summed donors/revenue/cash flows and the per-path cumulative
+    discounted cash flows (needed for the percentile bands) of a simulation.
+    With sketch=True the per-path values are not kept: the percentile bands
+    come from a streaming QuantileSketch, so memory stays constant however
+    many paths are added. Sketched percentiles are approximate (well within
+    the Monte Carlo error) and depend slightly on how the paths were added.
+    Paths must be added in batch order; for samplers whose paths are not
+    independent the NPV standard error comes from the batch groups of
+    sampling.batch_groups.
+    """
+
+    def __init__(self, n_campaigns, n_years, sketch=False, sampler="mc"):
+        self.n_paths = 0
+        self.n_batches = 0
+        self.sums = {
+            "donors": np.zeros((n_campaigns, n_years)),
+            "revenue": np.zeros((n_campaigns, n_years)),
+            "cash_flows": np.zeros(n_years),
+        }
+        self._cumulative_sum = np.zeros(n_years)
+        self._cumulative = []
+        self._sketch = QuantileSketch(n_years) if sketch else None
+        # Running mean and sum of squared deviations of the per-path NPV
+        self._npv_mean = 0.0
+        self._npv_m2 = 0.0
+        # Summed NPV and path count of every batch group
+        groups = batch_groups(sampler)
+        self._group_sums = np.zeros(groups) if groups else None
+        self._group_counts = np.zeros(groups, dtype=np.int64) if groups else None
+
+    def _add_npv_statistics(self, n_batch, batch_mean, batch_m2):
+        """Merge the NPV mean and squared deviations of other paths (Chan et al. parallel variance update)"""
+        delta = batch_mean - self._npv_mean
+        n_total = self.n_paths + n_batch
+        self._npv_mean += delta * n_batch / n_total
+        self._npv_m2 += batch_m2 + delta ** 2 * self.n_paths * n_batch / n_total
+        self.n_paths = n_total
+
+    def add(self, sums, cumulative, npvs=None):
+        """
+        Add the sums and cumulative paths of one or more simulated batches.
+        npvs, per-path values whose mean estimates the NPV, default to the
+        last cumulative year; they only feed the standard error.
+        """
+        if npvs is None:
+            npvs = cumulative[:, -1]
+        batch_mean = np.mean(npvs)
+        if self._group_sums is not None:
+            sums_by_group, counts_by_group = _group_sums(npvs, self.n_batches, len(self._group_sums))
+            self._group_sums += sums_by_group
+            self._group_counts += counts_by_group
+        self.n_batches += -(-len(npvs) // SIMULATION_BATCH_SIZE)
+        self._add_npv_statistics(len(npvs), batch_mean, np.sum((npvs - batch_mean) ** 2))
+        for key, value in sums.items():
+            self.sums[key] += value
+        self._cumulative_sum += np.sum(cumulative, axis=0)
+        if self._sketch is not None:
+            self._sketch.add(cumulative)
+        else:
+            self._cumulative.append(cumulative)
+
+    def merge(self, other):
+        """Add the paths of another aggregate of the same plan and sampler (e.g. the next pool shard)"""
+        if not other.n_paths:
+            return
+        if self._group_sums is not None:
+            # Batch i of other is batch n_batches + i of the merged run
+            self._group_sums += np.roll(other._group_sums, self.n_batches)
+            self._group_counts += np.roll(other._group_counts, self.n_batches)
+        self.n_batches += other.n_batches
+        self._add_npv_statistics(other.n_paths, other._npv_mean, other._npv_m2)
+        for key, value in other.sums.items():
+            self.sums[key] += value
+        self._cumulative_sum += other._cumulative_sum
+        if self._sketch is not None:
+            self._sketch.merge(other._sketch)
+        else:
+            self._cumulative.extend(other._cumulative)
+
+    def mean(self, key):
+        """Mean donors/revenue (campaigns x years) or cash flows (years) per path"""
+        return self.sums[key] / self.n_paths
+
+    @property
+    def mean_cumulative(self):
+        """Mean cumulative discounted cash flow per year"""
+        return self._cumulative_sum / self.n_paths
+
+    @property
+    def cumulative(self):
+        """Cumulative discounted cash flows of all paths so far (paths x years)"""
+        if self._sketch is not None:
+            raise ValueError("A sketched aggregate does not keep the per-path cash flows")
+        if len(self._cumulative) > 1:
+            self._cumulative = [np.concatenate(self._cumulative)]
+        return self._cumulative[0]
+
+    @property
+    def npv_standard_error(self):
+        """Standard error of the mean NPV over the paths so far"""
+        if self._group_sums is not None:
+            return _group_standard_error(self._group_sums, self._group_counts)
+        if self.n_paths < 2:
+            return math.inf
+        return math.sqrt(self._npv_m2 / (self.n_paths - 1) / self.n_paths)
+
+    def percentile(self, q):
+        """Per-year percentile of the cumulative discounted cash flow"""
+        if self._sketch is not None:
+            return self._sketch.percentile(q)
+        return np.percentile(self.cumulative, q, axis=0)
+
+def _expected_paths(aggregate, n_simulations, target_se, deadline, min_simulations, paths_per_second, elapsed):
+    """
+    Paths an adaptive run is expected to end with: the NPV standard error
+    falls with the square root of the path count, and the paths still
+    possible before the deadline follow from the measured throughput
+    """
+    expected = n_simulations
+    if target_se is not None and math.isfinite(aggregate.npv_standard_error):
+        needed = aggregate.n_paths * (aggregate.npv_standard_error / target_se) ** 2
+        expected = min(expected, max(min_simulations, math.ceil(needed)))
+    if deadline is not None and paths_per_second is not None:
+        expected = min(expected, aggregate.n_paths + int(paths_per_second * max(deadline - elapsed, 0)))
+    return max(expected, aggregate.n_paths)
+
+def iter_aggregates(params, n_years, n_simulations, seed, target_se=None, deadline=None, min_simulations=SIMULATION_BATCH_SIZE, sampler="mc", progress=None, sketch=False):
+    """
+    Simulate batch by batch and yield the running aggregate after each batch.
+    Batches use the same seeded streams as a full run, so the last aggregate
+    equals the result of simulating all paths at once.
+
+    Adaptive mode: with target_se (CHF) and/or deadline (seconds) the run
+    stops early, once at least min_simulations paths are done, as soon as the
+    standard error of the mean NPV reaches target_se or the deadline has
+    passed. n_simulations is then the upper limit of paths. The standard
+    error comes from the sampler's batch groups if its paths are not
+    independent (sampling.batch_groups), so such runs cannot stop on
+    target_se before every group has a batch.
+
+    progress(completed paths, expected paths) is called after every batch.
+    In adaptive mode the expected total is re-estimated every time from the
+    standard error so far and the measured throughput.
+    With sketch the aggregate keeps percentile sketches instead of the paths.
+    """
+    aggregate = RunningAggregate(len(params["booth_days"]), n_years, sketch, sampler)
+    started = None
+    started_paths = 0
+    workspace = BatchWorkspace(len(params["booth_days"]), n_years)
+    buffer = np.empty((SIMULATION_BATCH_SIZE, n_years)) if sketch else None
+    for n_paths, batch_seed in batch_streams(seed, n_simulations):
+        # A sketch copies what it keeps, so its batches can share one buffer
+        cumulative = buffer[:n_paths] if sketch else np.empty((n_paths, n_years))
+        with span("simulate"):
+            aggregate.add(run_batches(params, n_years, [(n_paths, batch_seed)], cumulative, sampler, workspace=workspace), cumulative)
+        if progress is not None:
+            elapsed = time.perf_counter() - started if started is not None else 0.0
+            paths_per_second = (aggregate.n_paths - started_paths) / elapsed if elapsed > 0 else None
+            progress(aggregate.n_paths, _expected_paths(aggregate, n_simulations, target_se, deadline, min_simulations, paths_per_second, elapsed))
+        yield aggregate
+
+        # The clock starts after the first batch, which absorbs one-off
+        # warm-up costs such as importing scipy for the Sobol sampler
+        if started is None:
+            started = time.perf_counter()
+            started_paths = aggregate.n_paths
+
+        if aggregate.n_paths < min_simulations:
+            continue
+        if target_se is not None and aggregate.npv_standard_error <= target_se:
+            return
+        if deadline is not None and time.perf_counter() - started >= deadline:
+            return
+
+def npv_difference(npvs_a, npvs_b, sampler="mc"):
+    """
+    Mean and confidence interval of the per-path NPV difference a - b of two
+    plans simulated with the same seed and sampler. Paths are paired (common
+    random numbers), so the interval is much narrower than for independent
+    runs.
+    """
+    differences = npvs_a - npvs_b
+    mean = float(np.mean(differences))
+    groups = batch_groups(sampler)
+    if groups:
+        standard_error = _group_standard_error(*_group_sums(differences, 0, groups))
+    else:
+        standard_error = float(np.std(differences, ddof=1) / math.sqrt(len(differences))) if len(differences) > 1 else math.inf
+    return {
+        "mean": mean,
+        "standard_error": standard_error,
+        "lower": mean - CONFIDENCE_Z * standard_error,
+        "upper": mean + CONFIDENCE_Z * standard_error,
+    }
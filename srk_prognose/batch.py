@@ -0,0 +1,201 @@
+"""
+Batch evaluation of campaign plans from the command line.
+
+    python -m srk_prognose.batch plans.csv -o results.csv
+    python -m srk_prognose.batch plans.csv -o results.parquet --format parquet
+
+The plan file has one campaign per row with the columns start_year,
+booth_days, donors_per_day, annual_donation, retention_rate and
+booth_cost_per_day. Rows with the same plan_id form one plan and must be
+consecutive; without a plan_id column every row is a single-campaign plan.
+Plans are read and evaluated in chunks across a process pool and results
+are written as they come in, so memory stays flat however long the file is.
+Every plan is simulated from the same seed, which makes their results
+directly comparable (common random numbers).
+"""
+import argparse
+import csv
+import itertools
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .cache import CAMPAIGN_KEYS
+from .config import BATCH_CHUNK_SIZE, N_SIMULATIONS, SIMULATION_SAMPLER, SIMULATION_SEED
+from .model import calculate_multi_year_metrics, calculate_payback_period
+from .parallel import _pool_context
+from .sampling import SAMPLERS
+
+RESULT_COLUMNS = (
+    "plan_id",
+    "n_campaigns",
+    "total_investment",
+    "total_revenue",
+    "npv",
+    "npv_p10",
+    "npv_p90",
+    "roi_percent",
+    "payback_years",
+    "discounted_payback_years",
+)
+
+def _campaign_from_row(path, line, row):
+    """Campaign dict of one plan file row; ValueError naming file and line if a value is not a finite number"""
+    campaign = {}
+    for key in CAMPAIGN_KEYS:
+        try:
+            campaign[key] = float(row[key])
+        except (TypeError, ValueError):
+            campaign[key] = math.nan
+        if not math.isfinite(campaign[key]):
+            raise ValueError(f"{path}, line {line}: {key} must be a number, got {row[key]!r}")
+    return campaign
+
+def read_plans(path):
+    """Yield (plan_id, campaigns) for every plan of a plan file, one at a time"""
+    with open(path, newline="") as f:
+        rows = csv.DictReader(f)
+        missing = [key for key in CAMPAIGN_KEYS if key not in (rows.fieldnames or ())]
+        if missing:
+            raise ValueError(f"{path}: missing columns {', '.join(missing)}")
+
+        # (row number, file line, row); the line is taken before groupby reads ahead
+        numbered = ((number, rows.line_num, row) for number, row in enumerate(rows, start=1))
+        if "plan_id" in rows.fieldnames:
+            plans = itertools.groupby(numbered, key=lambda item: item[2]["plan_id"])
+        else:
+            plans = ((str(number), [(number, line, row)]) for number, line, row in numbered)
+        for plan_id, group in plans:
+            yield plan_id, [_campaign_from_row(path, line, row) for _, line, row in group]
+
+def evaluate_plan(plan_id, campaigns, n_simulations, seed, sampler):
+    """Result row of one plan: investment, revenue, NPV with its 10/90 band, ROI and payback"""
+    # Plans are already spread over the workers, so each plan runs in-process
+    results = calculate_multi_year_metrics(campaigns, n_simulations, seed, sampler, max_workers=1)
+    n_years = len(results["mean_cumulative"])
+    start_years = np.array([int(c["start_year"]) for c in campaigns])
+    investments = np.array([c["booth_days"] * c["booth_cost_per_day"] for c in campaigns])
+    cash_flows = results["yearly_revenue"] - np.bincount(start_years, weights=investments, minlength=n_years)
+    payback, discounted_payback = calculate_payback_period(results["mean_cumulative"], np.cumsum(cash_flows))
+    total_investment = results["total_investment"]
+    return {
+        "plan_id": plan_id,
+        "n_campaigns": len(campaigns),
+        "total_investment": total_investment,
+        "total_revenue": float(np.sum(results["yearly_revenue"])),
+        "npv": float(results["mean_npv"]),
+        "npv_p10": float(results["lower_ci"][-1]),
+        "npv_p90": float(results["upper_ci"][-1]),
+        "roi_percent": float(results["mean_npv"] / total_investment * 100) if total_investment > 0 else 0.0,
+        "payback_years": payback,
+        "discounted_payback_years": discounted_payback,
+    }
+
+def _evaluate_chunk(chunk, n_simulations, seed, sampler):
+    """Worker entry point: evaluate a list of (plan_id, campaigns) pairs"""
+    return [evaluate_plan(plan_id, campaigns, n_simulations, seed, sampler) for plan_id, campaigns in chunk]
+
+class CsvResultWriter:
+    """Writes result rows to a CSV file, flushed after every chunk"""
+
+    def __init__(self, path):
+        self._file = open(path, "w", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=RESULT_COLUMNS)
+        self._writer.writeheader()
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+class ParquetResultWriter:
+    """Writes result rows to a Parquet file, one row group per chunk (needs pyarrow)"""
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output needs pyarrow (pip install pyarrow)") from None
+        self._pa = pa
+        self._schema = pa.schema([
+            ("plan_id", pa.string()),
+            ("n_campaigns", pa.int64()),
+            ("total_investment", pa.float64()),
+            ("total_revenue", pa.float64()),
+            ("npv", pa.float64()),
+            ("npv_p10", pa.float64()),
+            ("npv_p90", pa.float64()),
+            ("roi_percent", pa.float64()),
+            ("payback_years", pa.int64()),
+            ("discounted_payback_years", pa.int64()),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows):
+        self._writer.write_table(self._pa.Table.from_pylist(rows, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+def _chunks(iterable, size):
+    """Split an iterable into lists of at most size items"""
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+def run_batch(plans_path, output_path, output_format="csv", n_simulations=N_SIMULATIONS, seed=SIMULATION_SEED, sampler=SIMULATION_SAMPLER, max_workers=None, chunk_size=BATCH_CHUNK_SIZE):
+    """
+    Evaluate all plans of plans_path and stream the result rows to output_path.
+    Chunks of plans are split across the worker processes; at most one round
+    of chunks is in flight, so memory does not grow with the number of plans.
+    Returns the number of evaluated plans.
+    """
+    workers = max_workers or os.cpu_count() or 1
+    writer = ParquetResultWriter(output_path) if output_format == "parquet" else CsvResultWriter(output_path)
+    n_plans = 0
+    try:
+        if workers < 2:
+            for chunk in _chunks(read_plans(plans_path), chunk_size):
+                writer.write(_evaluate_chunk(chunk, n_simulations, seed, sampler))
+                n_plans += len(chunk)
+            return n_plans
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as executor:
+            worker_chunk_size = max(1, chunk_size // workers)
+            for chunk in _chunks(read_plans(plans_path), chunk_size):
+                futures = [
+                    executor.submit(_evaluate_chunk, part, n_simulations, seed, sampler)
+                    for part in _chunks(chunk, worker_chunk_size)
+                ]
+                for future in futures:
+                    writer.write(future.result())
+                n_plans += len(chunk)
+        return n_plans
+    finally:
+        writer.close()
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(prog="python -m srk_prognose.batch", description="Evaluate campaign plans from a CSV file.")
+    parser.add_argument("plans", help="CSV file with one campaign per row (optional plan_id column groups rows into plans)")
+    parser.add_argument("-o", "--output", required=True, help="Result file")
+    parser.add_argument("--format", choices=("csv", "parquet"), help="Result format (default: from the output file extension)")
+    parser.add_argument("--simulations", type=int, default=N_SIMULATIONS, help=f"Simulated paths per plan (default: {N_SIMULATIONS})")
+    parser.add_argument("--seed", type=int, default=SIMULATION_SEED, help="Seed shared by all plans")
+    parser.add_argument("--sampler", choices=SAMPLERS, default=SIMULATION_SAMPLER, help=f"Random number sampler (default: {SIMULATION_SAMPLER})")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=BATCH_CHUNK_SIZE, help=f"Plans per round (default: {BATCH_CHUNK_SIZE})")
+    args = parser.parse_args(argv)
+
+    output_format = args.format or ("parquet" if args.output.endswith(".parquet") else "csv")
+    n_plans = run_batch(args.plans, args.output, output_format, args.simulations, args.seed, args.sampler, args.workers, args.chunk_size)
+    print(f"{n_plans} plans written to {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Bounded LRU cache for simulation results and the cache keys of the engines
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .config import N_SIMULATIONS, SIMULATION_CACHE_SIZE
+
+CAMPAIGN_KEYS = ("start_year", "booth_days", "donors_per_day", "annual_donation", "retention_rate", "booth_cost_per_day")
+
+class SimulationCache:
+    """
+    Bounded LRU cache for simulation results with hit/miss counters.
+    Cached results are shared between reruns and sessions, so their arrays are
+    made read-only.
+    """
+
+    def __init__(self, maxsize=SIMULATION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached result for key (None on a miss)"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, result):
+        """Store a result, evicting the least recently used entries, and return it"""
+        result = _freeze_arrays(result)
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def get_or_compute(self, key, compute):
+        """Return the cached result for key, computing and storing it on a miss"""
+        result = self.get(key)
+        if result is None:
+            result = self.put(key, compute())
+        return result
+
+    def clear(self):
+        """Drop all entries (the counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Current size and hit/miss counters"""
+        with self._lock:
+            return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+def _freeze_arrays(result):
+    """Mark all numpy arrays in a (nested) result as read-only"""
+    if isinstance(result, np.ndarray):
+        result.flags.writeable = False
+    elif isinstance(result, dict):
+        for value in result.values():
+            _freeze_arrays(value)
+    elif isinstance(result, (list, tuple)):
+        for value in result:
+            _freeze_arrays(value)
+    return result
+
+def _normalize_value(value):
+    """Round float parameters so that equal widget values map to the same key"""
+    return round(float(value), 6)
+
+def single_cache_key(booth_days, retention_rate, donors_per_day, booth_cost, annual_donation, n_simulations=N_SIMULATIONS, seed=None, target_se=None, deadline=None, sampler="mc"):
+    """Cache key of a calculate_metrics call (or an adaptive iter_metrics run)"""
+    return (
+        "single",
+        tuple(_normalize_value(v) for v in (booth_days, donors_per_day, annual_donation, retention_rate, booth_cost)),
+        int(n_simulations),
+        seed,
+        target_se,
+        deadline,
+        sampler,
+    )
+
+def multi_cache_key(campaigns, n_simulations=N_SIMULATIONS, seed=None, target_se=None, deadline=None, sampler="mc"):
+    """Cache key of a calculate_multi_year_metrics call (or an adaptive run)"""
+    return (
+        "multi",
+        tuple(tuple(_normalize_value(c[k]) for k in CAMPAIGN_KEYS) for c in campaigns),
+        int(n_simulations),
+        seed,
+        target_se,
+        deadline,
+        sampler,
+    )
@@ -0,0 +1,43 @@
+"""
+Model parameters shared by the app and the simulation engine
+"""
+
+# Fixed parameters for MVP
+DISCOUNT_RATE = 0.03  # 3% annual discount rate
+N_SIMULATIONS = 10_000  # Affordable now that acquisition no longer draws every day
+SIMULATION_SEED = 20240101  # Default session seed: identical inputs give identical (cacheable) results
+SIMULATION_BATCH_SIZE = 512  # Paths per batch; every batch draws from its own spawned RNG stream (a power of 2 for Sobol nets)
+TARGET_NPV_STANDARD_ERROR = 1_000  # Adaptive runs stop once the mean NPV is this precise (CHF)
+SIMULATION_DEADLINE = 1.0  # ... or after this many seconds
+MAX_SIMULATIONS = 200_000  # ... or at this many paths
+COMPARE_N_SIMULATIONS = 4_096  # Scenario comparisons share random numbers, so far fewer paths suffice (ERROR_REPLICATIONS batches)
+CONFIDENCE_Z = 1.96  # Normal quantile of the reported 95% confidence intervals
+SIMULATION_SAMPLER = "sobol"  # Default sampler of the app, see srk_prognose.sampling.SAMPLERS
+ERROR_REPLICATIONS = 8  # Independent groups of batches that the standard error of the antithetic and Sobol samplers is estimated from
+CONVERGENCE_SIMULATIONS = 2_048  # Paths per replication in the convergence report
+CONVERGENCE_REPLICATIONS = 20  # Independent replications per sampler in the convergence report
+SENSITIVITY_CHANGE = 0.10  # Relative up/down change of every input in the tornado analysis
+BATCH_CHUNK_SIZE = 256  # Plans read, evaluated and written per round by the batch CLI
+SIMULATION_CACHE_SIZE = 128  # Max cached simulation results per server process
+PARALLEL_MIN_SIMULATIONS = 50_000  # Smaller runs stay in-process, pool start-up would dominate
+SKETCH_MIN_SIMULATIONS = 500_000  # Larger runs keep percentile sketches instead of every path (constant memory)
+SKETCH_COMPRESSION = 200  # t-digest compression of the sketches (more centroids per year = more accurate)
+SKETCH_BUFFER_ROWS = 8_192  # Paths collected before they are compressed into a sketch
+OPTIMIZER_SIMULATIONS = 2_048  # Paths shared by all candidate schedules of the optimizer
+OPTIMIZER_DAY_OPTIONS = 41  # Booth day values per campaign the optimizer chooses from
+OPTIMIZER_MAX_ITERATIONS = 100  # Improvement steps of the schedule search
+OPTIMIZER_CHUNK_SIZE = 512  # Candidate schedules evaluated per (paths x candidates) block
+
+# Empirical parameters for GS (National)
+EMPIRICAL_DONORS_MEAN = 3.5
+EMPIRICAL_DONORS_STD = 0.75
+EMPIRICAL_DONATION_MEAN = 261.48  # Annual donation
+EMPIRICAL_DONATION_STD = 320.87
+EMPIRICAL_RETENTION = {
+    1: (83.0, 0.7),      # Year 1: 83.0% retention, 0.7% std dev
+    2: (81.9, 0.7),      # Year 2: 81.9% y-o-y
+    3: (85.3, 0.7)       # Year 3+: 85.3% y-o-y stable
+}
+EPSILON = 0.0001
+CAMPAIGN_YEARS = 11  # Year 0 (acquisition) plus 10 years of retention
+ACQUISITION_EXACT_MAX_DAYS = 10  # Shorter campaigns draw every day individually
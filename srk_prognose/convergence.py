@@ -0,0 +1,38 @@
+"""
+Convergence report: how precise each sampler is for a given path budget
+"""
+import numpy as np
+
+from .config import CONVERGENCE_REPLICATIONS
+from .parallel import simulate
+from .sampling import SAMPLERS
+
+def convergence_report(params, n_years, n_simulations, n_replications=CONVERGENCE_REPLICATIONS, seed=None):
+    """
+    Run every sampler n_replications times with n_simulations paths each and
+    independent seeds. The spread of the replication results estimates the
+    standard error of the mean NPV and of the 10%/90% percentile bands (averaged
+    over the years). Efficiency is the variance ratio against plain MC, i.e.
+    how many times more paths MC needs for the same precision.
+    """
+    replication_seeds = np.random.SeedSequence(seed).generate_state(n_replications)
+    rows = []
+    for sampler in SAMPLERS:
+        npvs, lower, upper = [], [], []
+        for replication_seed in replication_seeds:
+            _, cumulative = simulate(params, n_years, n_simulations, int(replication_seed), sampler=sampler)
+            npvs.append(np.mean(cumulative[:, -1]))
+            lower.append(np.percentile(cumulative, 10, axis=0))
+            upper.append(np.percentile(cumulative, 90, axis=0))
+        rows.append({
+            "sampler": sampler,
+            "n_simulations": n_simulations,
+            "mean_npv": float(np.mean(npvs)),
+            "npv_standard_error": float(np.std(npvs, ddof=1)),
+            "band_standard_error": float(np.mean(np.std(lower, axis=0, ddof=1) + np.std(upper, axis=0, ddof=1)) / 2),
+        })
+
+    for row in rows:
+        row["npv_efficiency"] = (rows[0]["npv_standard_error"] / row["npv_standard_error"]) ** 2 if row["npv_standard_error"] > 0 else np.inf
+        row["band_efficiency"] = (rows[0]["band_standard_error"] / row["band_standard_error"]) ** 2 if row["band_standard_error"] > 0 else np.inf
+    return rows
@@ -0,0 +1,301 @@
+"""
+Closed-form expected values of the donor cohort model.
+
+The mean trajectories follow from the inputs without simulation: expected
+acquisition (rectified normal daily draws), the expected retention clipped
+to [0, 1], the expected donation with its CHF 50 floor, the 2-3 months of
+year 0 and the discount rate. Donors, retention and donation draws are
+independent, so their expectations multiply. Donor counts are truncated to
+whole donors every year, which loses less than half a donor on average in
+small cohorts and with retention near 100%, so the donor count is carried
+as its exact distribution over whole donors from year to year.
+
+The evaluator is cheap enough to render before any simulation and serves as
+a correctness oracle for the stochastic engines:
+
+    python -m srk_prognose.expected
+"""
+import functools
+import math
+import sys
+
+import numpy as np
+
+from .config import (
+    ACQUISITION_EXACT_MAX_DAYS,
+    CAMPAIGN_YEARS,
+    DISCOUNT_RATE,
+    EMPIRICAL_DONATION_STD,
+    EMPIRICAL_DONORS_STD,
+)
+from .aggregate import RunningAggregate
+from .model import single_campaign
+from .parallel import simulate_aggregate, simulate_shifted
+from .sampling import SAMPLERS
+from .simulation import campaign_arrays, portfolio_years, rectified_normal_moments
+
+DONATION_FLOOR = 50  # CHF, see cohorts_from_shocks
+ORACLE_SIMULATIONS = 20_000
+ORACLE_MAX_Z = 4.0  # Allowed deviation of a simulated mean NPV, in standard errors
+COHORT_SMOOTH_SPREAD = 2.0  # Donors, see _expected_donors
+COHORT_TAIL_Z = 9.0  # Donor counts further than this many standard deviations out are dropped (probability < 1e-18)
+ACQUISITION_GRID_STEP = 1 / 256  # Donors, grid of the daily draws convolved for short campaigns
+
+@functools.lru_cache(maxsize=1024)
+def _rectified_mean_scalar(mean, std):
+    """E[max(X, 0)] for X ~ N(mean, std^2); plans repeat few distinct values"""
+    return rectified_normal_moments(mean, std)[0]
+
+def _rectified_mean(mean, std):
+    """E[max(X, 0)] for X ~ N(mean, std^2), element-wise"""
+    mean, std = np.broadcast_arrays(np.asarray(mean, dtype=float), np.asarray(std, dtype=float))
+    return np.array([_rectified_mean_scalar(m, s) for m, s in zip(mean.ravel().tolist(), std.ravel().tolist())]).reshape(mean.shape)
+
+def _initial_donors_distribution(donors_per_day, booth_days):
+    """
+    (first count, probabilities) of the whole year-0 donors, floor of the
+    acquisition total drawn by sample_initial_donors
+    """
+    from scipy.special import ndtr
+
+    if booth_days < ACQUISITION_EXACT_MAX_DAYS:
+        # Sum of booth_days rectified daily draws, convolved (by FFT) on a fine grid
+        # whose cells each carry their probability at the centre
+        edges = np.arange(0.0, donors_per_day + COHORT_TAIL_Z * EMPIRICAL_DONORS_STD + ACQUISITION_GRID_STEP, ACQUISITION_GRID_STEP)
+        daily = np.diff(ndtr((edges - donors_per_day) / EMPIRICAL_DONORS_STD))
+        daily[0] += ndtr(-donors_per_day / EMPIRICAL_DONORS_STD)
+        size = booth_days * (len(daily) - 1) + 1
+        total = np.maximum(np.fft.irfft(np.fft.rfft(daily, size) ** booth_days, size), 0)
+        # Centres of the total's cells: the first cell holds the zero atom of every day
+        centres = np.maximum((np.arange(len(total)) + booth_days / 2) * ACQUISITION_GRID_STEP, 0)
+        centres[0] = 0.0
+        counts = np.floor(centres).astype(int)
+        return 0, np.bincount(counts, total)
+
+    # The total is mean + std * (z + c (z^2 - 1)): P(total >= k) from the roots in z
+    mean, variance, third_central = rectified_normal_moments(donors_per_day, EMPIRICAL_DONORS_STD)
+    total_mean, total_std = booth_days * mean, math.sqrt(booth_days * variance)
+    c = third_central / variance ** 1.5 / math.sqrt(booth_days) / 6
+    first = max(int(total_mean - COHORT_TAIL_Z * total_std), 0)
+    counts = np.arange(first, int(total_mean + COHORT_TAIL_Z * total_std * (1 + c)) + 2)
+    y = (counts - total_mean) / total_std
+    if c > 0:
+        root = np.sqrt(np.maximum(1 + 4 * c * (c + y), 0))
+        upper = 2 * (c + y) / (1 + root)
+        survival = np.where(1 + 4 * c * (c + y) > 0, ndtr(-upper) + ndtr(-(1 + root) / (2 * c)), 1.0)
+    else:
+        survival = ndtr(-y)
+    survival[counts <= 0] = 1.0
+    return first, -np.diff(np.append(survival, 0.0))
+
+def _moments(first, probabilities):
+    """Mean and variance of a whole-donor distribution"""
+    counts = np.arange(first, first + len(probabilities))
+    mean = float(probabilities @ counts)
+    return mean, float(probabilities @ (counts - mean) ** 2)
+
+def _retained_survival(n, k, ret_mean, ret_std):
+    """P(floor(n R) >= k) for whole donors n (column) and counts k (row), R ~ N(ret_mean, ret_std^2) clipped to [0, 1]"""
+    from scipy.special import ndtr
+
+    # P(n R >= k) = P(R >= k / n) for 0 < k <= n, 1 below and 0 above
+    with np.errstate(divide="ignore", invalid="ignore"):
+        survival = ndtr((ret_mean - k[None, :] / n[:, None]) / ret_std)
+    survival[:, k <= 0] = 1.0
+    survival[k[None, :] > n[:, None]] = 0.0
+    return survival
+
+def _retained_distribution(first, probabilities, ret_mean, ret_std):
+    """
+    (first count, probabilities) of floor(n R) for whole donors n distributed
+    as given and retention R ~ N(ret_mean, ret_std^2) clipped to [0, 1]
+    """
+    n = np.arange(first, first + len(probabilities))
+    low = max(int(n[0] * (ret_mean - COHORT_TAIL_Z * ret_std)), 0)
+    high = int(min(n[-1] * (ret_mean + COHORT_TAIL_Z * ret_std), n[-1])) + 1
+    survival = _retained_survival(n, np.arange(low, high + 2), ret_mean, ret_std)
+    retained = probabilities @ (survival[:, :-1] - survival[:, 1:])
+    # Drop the negligible tails so that the support stays narrow
+    keep = np.flatnonzero(retained > 1e-18 * retained.max())
+    return low + keep[0], retained[keep[0]:keep[-1] + 1]
+
+def _retained_mean(n, ret_mean, ret_std):
+    """E[floor(n R)] for n whole donors, as the sum of P(floor(n R) >= k) over k >= 1"""
+    low = max(int(n * (ret_mean - COHORT_TAIL_Z * ret_std)), 1)
+    high = int(min(n * (ret_mean + COHORT_TAIL_Z * ret_std), n))
+    survival = _retained_survival(np.array([n]), np.arange(low, high + 1), ret_mean, ret_std)
+    return low - 1 + float(np.sum(survival))
+
+@functools.lru_cache(maxsize=256)
+def _expected_donors(donors_per_day, booth_days, ret_mean, ret_std):
+    """
+    Expected whole donors in every year since the start of one campaign
+    (tuple); plans repeat few distinct campaigns. Small cohorts carry their
+    exact distribution. In cohorts whose retained count spreads over at
+    least COHORT_SMOOTH_SPREAD donors even at the low end of their range,
+    the fractional part of n R is all but uniform (its Fourier terms fall
+    like exp(-2 pi^2 spread^2)), so the truncation loss
+    n E[R] - E[floor(n R)] changes smoothly with n: it is averaged over a
+    three-point normal quadrature of the count instead.
+    """
+    first, probabilities = _initial_donors_distribution(donors_per_day, booth_days)
+    mean, variance = _moments(first, probabilities)
+    donors = [mean]
+    for year_mean, year_std in zip(ret_mean, ret_std):
+        low = mean - COHORT_TAIL_Z * math.sqrt(variance) if probabilities is None else first
+        if low * year_std >= COHORT_SMOOTH_SPREAD:
+            retention = _rectified_mean_scalar(year_mean, year_std) - _rectified_mean_scalar(year_mean - 1, year_std)
+            step = math.sqrt(3 * variance)
+            loss = sum(
+                weight * (round(n) * retention - _retained_mean(round(n), year_mean, year_std))
+                for n, weight in ((mean - step, 1 / 6), (mean, 2 / 3), (mean + step, 1 / 6))
+            )
+            variance = retention ** 2 * variance + (variance + mean ** 2) * year_std ** 2 + 1 / 12
+            mean = mean * retention - loss
+            probabilities = None
+        else:
+            if probabilities is None:
+                # Leaving the smooth regime: continue from a discretized normal count
+                first = max(int(mean - COHORT_TAIL_Z * math.sqrt(variance)), 0)
+                counts = np.arange(first, int(mean + COHORT_TAIL_Z * math.sqrt(variance)) + 2)
+                probabilities = np.exp(-0.5 * (counts - mean) ** 2 / variance)
+                probabilities /= probabilities.sum()
+            first, probabilities = _retained_distribution(first, probabilities, year_mean, year_std)
+            mean, variance = _moments(first, probabilities)
+        donors.append(mean)
+    return tuple(donors)
+
+def expected_cohorts(params):
+    """Expected donors and revenue (campaigns x years since start) of every campaign"""
+    n_campaigns = len(params["booth_days"])
+    donors = np.array([
+        _expected_donors(
+            float(params["donors_per_day"][c]), int(params["booth_days"][c]),
+            tuple((params["ret_mean"][c] / 100).tolist()), tuple((params["ret_std"][c] / 100).tolist()),
+        )
+        for c in range(n_campaigns)
+    ]).reshape(n_campaigns, CAMPAIGN_YEARS)
+
+    # max(donation, 50) = 50 + max(donation - 50, 0); donors are whole, so a
+    # cohort below one donor (none) gives nothing
+    donation = DONATION_FLOOR + _rectified_mean(params["annual_donation"] - DONATION_FLOOR, np.full(n_campaigns, EMPIRICAL_DONATION_STD))
+    revenue = donors * donation[:, None]
+    revenue[:, 0] *= 2.5 / 12
+    return donors, revenue
+
+def expected_multi_year_metrics(campaigns):
+    """
+    Expected-value counterpart of calculate_multi_year_metrics: the same
+    result dict, with the percentile band collapsed onto the mean, plus the
+    discounted break-even year (None if not reached)
+    """
+    params = campaign_arrays(campaigns)
+    n_years = portfolio_years(campaigns)
+    donors, revenue = expected_cohorts(params)
+
+    n_campaigns = len(campaigns)
+    camp_index = np.arange(n_campaigns)[:, None]
+    year_index = params["start_year"][:, None] + np.arange(CAMPAIGN_YEARS)
+    campaign_donors = np.zeros((n_campaigns, n_years))
+    campaign_revenue = np.zeros((n_campaigns, n_years))
+    campaign_donors[camp_index, year_index] = donors
+    campaign_revenue[camp_index, year_index] = revenue
+
+    cash_flows = np.sum(campaign_revenue, axis=0) - np.bincount(params["start_year"], weights=params["investment"], minlength=n_years)
+    mean_cumulative = np.cumsum(cash_flows * (1 + DISCOUNT_RATE) ** (-np.arange(n_years)))
+    return {
+        "mean_cumulative": mean_cumulative,
+        "lower_ci": mean_cumulative,
+        "upper_ci": mean_cumulative,
+        "campaign_donors": campaign_donors,
+        "campaign_revenue": campaign_revenue,
+        "campaign_investment": params["investment"].copy(),
+        "yearly_donors": np.sum(campaign_donors, axis=0),
+        "yearly_revenue": np.sum(campaign_revenue, axis=0),
+        "mean_npv": float(mean_cumulative[-1]),
+        "total_investment": float(np.sum(params["investment"])),
+        "break_even": next((year for year, value in enumerate(mean_cumulative) if value > 0), None),
+    }
+
+def expected_metrics(booth_days, retention_rate, donors_per_day, booth_cost, annual_donation):
+    """
+    Expected-value counterpart of calculate_metrics: the same result tuple,
+    with the percentile band collapsed onto the mean
+    """
+    results = expected_multi_year_metrics([single_campaign(booth_days, retention_rate, donors_per_day, booth_cost, annual_donation)])
+    investment = results["total_investment"]
+    cum_disc = results["mean_cumulative"]
+    cum_undisc = np.cumsum(results["yearly_revenue"]) - investment
+    return (
+        results["yearly_donors"], results["yearly_revenue"], investment,
+        cum_disc, cum_disc, cum_disc, cum_undisc, results["mean_npv"],
+    )
+
+def oracle_deviation(precision, simulated_npv, expected_npv):
+    """Deviation of a simulated mean NPV from the expected one in standard errors"""
+    deviation = abs(simulated_npv - expected_npv)
+    return deviation / precision["npv_standard_error"] if deviation else 0.0
+
+def oracle_plans():
+    """(name, campaigns) of the plans the oracle checks"""
+    def campaign(start_year, booth_days, retention_rate=83.0, donors_per_day=3.5, annual_donation=261.48):
+        return {
+            "start_year": start_year,
+            "booth_days": booth_days,
+            "annual_donation": annual_donation,
+            "retention_rate": retention_rate,
+            "donors_per_day": donors_per_day,
+            "booth_cost_per_day": 830.0,
+        }
+
+    return [
+        ("short campaign", [campaign(0, ACQUISITION_EXACT_MAX_DAYS - 1)]),
+        ("small cohort", [campaign(0, ACQUISITION_EXACT_MAX_DAYS, retention_rate=100.0, donors_per_day=1.0, annual_donation=10.0)]),
+        ("single day", [campaign(0, 1, donors_per_day=0.5)]),
+        ("default campaign", [campaign(0, 1000)]),
+        ("custom inputs", [campaign(0, 400, retention_rate=70.0, donors_per_day=6.0, annual_donation=120.0)]),
+        ("staggered plan", [campaign(year, 1000) for year in range(3)]),
+        ("repeated campaigns", [campaign(year, 500) for year in range(8)]),
+        ("mixed plan", [campaign(0, 300), campaign(2, 1500, retention_rate=90.0), campaign(2, 300)]),
+    ]
+
+def run_oracle(n_simulations=ORACLE_SIMULATIONS, seed=1, samplers=SAMPLERS):
+    """
+    Mean NPV of every engine and sampler against the expected value on
+    oracle_plans(). Returns (name, engine, sampler, simulated, expected,
+    deviation in standard errors) rows.
+    """
+    rows = []
+    for name, campaigns in oracle_plans():
+        expected = expected_multi_year_metrics(campaigns)["mean_npv"]
+        params = campaign_arrays(campaigns)
+        n_years = portfolio_years(campaigns)
+        for sampler in samplers:
+            shifted = RunningAggregate(len(campaigns), n_years, sampler=sampler)
+            sums, cumulative, npvs = simulate_shifted(params, n_years, n_simulations, seed, sampler)
+            shifted.add(sums, cumulative, npvs)
+            engines = {
+                "exact": simulate_aggregate(params, n_years, n_simulations, seed, sampler=sampler, sketch=False),
+                "sketch": simulate_aggregate(params, n_years, n_simulations, seed, sampler=sampler, sketch=True),
+                "shift-sum": shifted,
+            }
+            for engine, aggregate in engines.items():
+                simulated = float(aggregate.mean_cumulative[-1])
+                precision = {"npv_standard_error": aggregate.npv_standard_error}
+                rows.append((name, engine, sampler, simulated, expected, oracle_deviation(precision, simulated, expected)))
+    return rows
+
+def main():
+    """Print the oracle table; exit code 1 if any engine deviates by more than ORACLE_MAX_Z"""
+    failed = False
+    print(f"{'plan':<20} {'engine':<10} {'sampler':<11} {'simulated':>14} {'expected':>14} {'z':>6}")
+    for name, engine, sampler, simulated, expected, deviation in run_oracle():
+        flag = ""
+        if deviation > ORACLE_MAX_Z or not math.isfinite(simulated):
+            flag = "  FAIL"
+            failed = True
+        print(f"{name:<20} {engine:<10} {sampler:<11} {simulated:>14,.0f} {expected:>14,.0f} {deviation:>6.2f}{flag}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
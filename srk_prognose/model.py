@@ -0,0 +1,203 @@
+"""
+Financial model of the booth campaigns: NPV, payback and ROI helpers and the
+single-campaign, multi-year and scenario-comparison engines.
+Headless: safe to import from tools, benchmarks and pool workers.
+"""
+import numpy as np
+
+from .aggregate import RunningAggregate, iter_aggregates, npv_difference
+from .config import CAMPAIGN_YEARS, COMPARE_N_SIMULATIONS, DISCOUNT_RATE, N_SIMULATIONS, SKETCH_MIN_SIMULATIONS
+from .parallel import simulate, simulate_aggregate, simulate_shifted
+from .simulation import campaign_arrays, portfolio_years
+from .timing import timed
+
+def calculate_npv(cash_flows, discount_rate=DISCOUNT_RATE):
+    """Calculate Net Present Value of cash flows (per row for 2-D input)"""
+    years = np.arange(np.shape(cash_flows)[-1])
+    discount_factors = (1 + discount_rate) ** (-years)
+    return np.sum(cash_flows * discount_factors, axis=-1)
+
+def calculate_payback_period(cumulative_discounted, cumulative_undiscounted):
+    """Calculate both simple and discounted payback periods"""
+    simple_payback = next((i for i, x in enumerate(cumulative_undiscounted) if x > 0), None)
+    disc_payback = next((i for i, x in enumerate(cumulative_discounted) if x > 0), None)
+    return simple_payback, disc_payback
+
+def calculate_roi_metrics(total_revenue, total_investment, npv):
+    """Calculate various ROI metrics"""
+    simple_roi = ((total_revenue - total_investment) / total_investment) * 100 if total_investment > 0 else 0
+    npv_roi = (npv / total_investment) * 100 if total_investment > 0 else 0
+    revenue_multiple = total_revenue / total_investment if total_investment > 0 else 0
+    return simple_roi, npv_roi, revenue_multiple
+
+def single_campaign(booth_days, retention_rate, donors_per_day, booth_cost, annual_donation):
+    """Campaign dict of a single campaign starting in year 0"""
+    return {
+        "start_year": 0,
+        "booth_days": booth_days,
+        "annual_donation": annual_donation,
+        "retention_rate": retention_rate,
+        "donors_per_day": donors_per_day,
+        "booth_cost_per_day": booth_cost,
+    }
+
+@timed("aggregate")
+def _metrics_from_aggregate(aggregate, total_investment):
+    """calculate_metrics result tuple from the (running) aggregate of a single campaign"""
+    # Mean cash flows already include the year 0 investment
+    mean_cash_flows = aggregate.mean("cash_flows")
+    
+    # Calculate statistics
+    mean_cum_disc = aggregate.mean_cumulative
+    mean_cum_undisc = np.cumsum(mean_cash_flows)
+    lower = aggregate.percentile(10)
+    upper = aggregate.percentile(90)
+    mean_don = aggregate.mean("donors")[0]
+    mean_rev = aggregate.mean("revenue")[0]
+    
+    return mean_don, mean_rev, total_investment, mean_cum_disc, lower, upper, mean_cum_undisc, calculate_npv(mean_cash_flows)
+
+def _precision(aggregate):
+    """Path count and achieved standard error of the mean NPV of an aggregate"""
+    return {"n_simulations": aggregate.n_paths, "npv_standard_error": aggregate.npv_standard_error}
+
+def calculate_metrics(booth_days, retention_rate, donors_per_day, booth_cost, annual_donation, n_simulations=N_SIMULATIONS, seed=None, sampler="mc", progress=None, sketch=None):
+    """
+    Calculate campaign metrics with empirical parameters.
+    Simulations are computed in batches of (simulations x years) arrays.
+    All randomness is derived from seed, so equal seeds give equal results.
+    progress(completed paths, total paths) is called as the batches finish.
+    With sketch the percentile bands come from streaming sketches (constant
+    memory); by default runs of SKETCH_MIN_SIMULATIONS paths or more are sketched.
+    """
+    campaign = single_campaign(booth_days, retention_rate, donors_per_day, booth_cost, annual_donation)
+    aggregate = simulate_aggregate(campaign_arrays([campaign]), CAMPAIGN_YEARS, n_simulations, seed, sampler=sampler, progress=progress, sketch=sketch)
+    return _metrics_from_aggregate(aggregate, float(booth_days) * float(booth_cost))
+
+def iter_metrics(booth_days, retention_rate, donors_per_day, booth_cost, annual_donation, n_simulations=N_SIMULATIONS, seed=None, target_se=None, deadline=None, sampler="mc", progress=None, sketch=None):
+    """
+    Progressive calculate_metrics: yields (precision, result tuple) after
+    every batch, precision being the path count and the standard error of the
+    mean NPV so far. The last result equals calculate_metrics for the same seed.
+    With target_se and/or deadline the run stops as soon as the NPV is precise
+    enough or the time is up (adaptive mode, n_simulations is the upper limit).
+    progress is passed on to iter_aggregates; sketch works as in calculate_metrics.
+    """
+    campaign = single_campaign(booth_days, retention_rate, donors_per_day, booth_cost, annual_donation)
+    total_investment = float(booth_days) * float(booth_cost)
+    if sketch is None:
+        sketch = n_simulations >= SKETCH_MIN_SIMULATIONS
+    for aggregate in iter_aggregates(campaign_arrays([campaign]), CAMPAIGN_YEARS, n_simulations, seed, target_se, deadline, sampler=sampler, progress=progress, sketch=sketch):
+        yield _precision(aggregate), _metrics_from_aggregate(aggregate, total_investment)
+
+def _empty_multi_year_results():
+    """Result of calculate_multi_year_metrics without any campaign"""
+    return {
+        "mean_cumulative": np.zeros(10),
+        "lower_ci": np.zeros(10),
+        "upper_ci": np.zeros(10),
+        "campaign_donors": np.zeros((0, 10)),
+        "campaign_revenue": np.zeros((0, 10)),
+        "campaign_investment": np.zeros(0),
+        "yearly_donors": np.zeros(10),
+        "yearly_revenue": np.zeros(10),
+        "mean_npv": 0,
+        "total_investment": 0
+    }
+
+@timed("aggregate")
+def _multi_year_results(aggregate, params):
+    """
+    calculate_multi_year_metrics result dict from a (running) aggregate.
+    Campaign contributions are (campaigns x years) arrays of mean donors and
+    revenue; the yearly totals are their sums over the campaigns.
+    """
+    mean_camp_donors = aggregate.mean("donors")
+    mean_camp_revenue = aggregate.mean("revenue")
+    return {
+        "mean_cumulative": aggregate.mean_cumulative,
+        "lower_ci": aggregate.percentile(10),
+        "upper_ci": aggregate.percentile(90),
+        "campaign_donors": mean_camp_donors,
+        "campaign_revenue": mean_camp_revenue,
+        "campaign_investment": params["investment"].copy(),
+        "yearly_donors": np.sum(mean_camp_donors, axis=0),
+        "yearly_revenue": np.sum(mean_camp_revenue, axis=0),
+        "mean_npv": calculate_npv(aggregate.mean("cash_flows")),
+        "total_investment": float(np.sum(params["investment"]))
+    }
+
+def calculate_multi_year_metrics(campaigns, n_simulations=N_SIMULATIONS, seed=None, sampler="mc", max_workers=None, progress=None, sketch=None):
+    """
+    Multi-campaign Monte Carlo simulation.
+    All simulations, campaigns and years are computed as batched
+    (simulations x campaigns x years) tensors. All randomness is derived
+    from seed, so equal seeds give equal results. Large runs are spread
+    over a process pool. progress(completed paths, total paths) is called
+    as the batches finish; sketch works as in calculate_metrics.
+    """
+    if not campaigns:
+        return _empty_multi_year_results()
+
+    params = campaign_arrays(campaigns)
+    n_years = portfolio_years(campaigns)
+    aggregate = simulate_aggregate(params, n_years, n_simulations, seed, max_workers, sampler, progress, sketch)
+    return _multi_year_results(aggregate, params)
+
+def iter_multi_year_metrics(campaigns, n_simulations=N_SIMULATIONS, seed=None, target_se=None, deadline=None, sampler="mc", progress=None, sketch=None):
+    """
+    Progressive calculate_multi_year_metrics: yields (precision, result dict)
+    after every batch. The last result equals calculate_multi_year_metrics for
+    the same seed. target_se, deadline, progress and sketch work as in
+    iter_metrics.
+    """
+    if not campaigns:
+        yield {"n_simulations": 0, "npv_standard_error": 0.0}, _empty_multi_year_results()
+        return
+
+    params = campaign_arrays(campaigns)
+    if sketch is None:
+        sketch = n_simulations >= SKETCH_MIN_SIMULATIONS
+    for aggregate in iter_aggregates(params, portfolio_years(campaigns), n_simulations, seed, target_se, deadline, sampler=sampler, progress=progress, sketch=sketch):
+        yield _precision(aggregate), _multi_year_results(aggregate, params)
+
+def calculate_scenario_comparison(campaigns1, campaigns2, n_simulations=COMPARE_N_SIMULATIONS, seed=None, sampler="mc", progress=None, shift_sum=False):
+    """
+    Evaluate two campaign plans on common random numbers: both are simulated
+    from the same seed, so campaign i of either plan sees the same acquisition,
+    retention and donation shocks on every path. Returns both result dicts and
+    the NPV difference (plan 2 - plan 1) with its confidence interval.
+    progress(completed paths, total paths) counts the paths of both plans.
+    With shift_sum both plans use the shift-and-sum engine, which simulates
+    every campaign type once instead of every campaign (common random numbers
+    then hold type by type). Its shuffled copies are correlated, so at the
+    same path count the confidence interval of the difference is about 3-4x
+    wider on the compare page's plans (one campaign per year); matching the
+    full engine's precision takes about 14x the paths with the "mc" sampler
+    (much slower) and 4x with "sobol" (about as fast).
+    """
+    params1 = campaign_arrays(campaigns1)
+    params2 = campaign_arrays(campaigns2)
+    n_years = max(portfolio_years(campaigns1), portfolio_years(campaigns2))
+    progress1 = progress2 = None
+    if progress is not None:
+        progress1 = lambda completed, total: progress(completed, 2 * total)
+        progress2 = lambda completed, total: progress(total + completed, 2 * total)
+
+    def run(params, plan_progress):
+        aggregate = RunningAggregate(len(params["booth_days"]), n_years, sampler=sampler)
+        if shift_sum:
+            sums, cumulative, npvs = simulate_shifted(params, n_years, n_simulations, seed, sampler, plan_progress)
+        else:
+            sums, cumulative = simulate(params, n_years, n_simulations, seed, sampler=sampler, progress=plan_progress)
+            npvs = cumulative[:, -1]
+        aggregate.add(sums, cumulative, npvs)
+        return aggregate, npvs
+
+    aggregate1, npvs1 = run(params1, progress1)
+    aggregate2, npvs2 = run(params2, progress2)
+    return (
+        _multi_year_results(aggregate1, params1),
+        _multi_year_results(aggregate2, params2),
+        npv_difference(npvs2, npvs1, sampler),
+    )
@@ -0,0 +1,313 @@
+"""
+Budget-constrained search for the start years and booth days of a campaign plan.
+
+A plan's NPV is the sum of its campaigns' NPVs, each discounted to its start
+year. So the per-path NPV of every campaign is simulated once for every
+booth day option, on the shocks calculate_multi_year_metrics uses for it
+with the same seed and sampler (common random numbers). A candidate schedule
+is then just a discounted sum of those stored paths. This makes evaluating
+thousands of candidates a matter of array lookups, and the optimized NPV
+matches a calculate_multi_year_metrics run of the optimized plan.
+
+The search is a local search from the current plan. Each step evaluates, in
+one batch, every move of one campaign to another start year or booth day
+option, every budget shift from one campaign to another, and every swap of
+two start years, and takes the best one. Infeasible schedules (over the
+total budget or the yearly liquidity cap) always rank below feasible ones,
+ordered by how far they overshoot, so an infeasible start plan is repaired
+first. The current booth days of every campaign are one of its options, so
+the search starts from the current plan itself and never returns a plan
+worse than a feasible current one.
+
+The regression check runs the search on reference plans:
+
+    python -m srk_prognose.optimizer
+"""
+import itertools
+import sys
+
+import numpy as np
+
+from .config import (
+    ACQUISITION_EXACT_MAX_DAYS,
+    CAMPAIGN_YEARS,
+    DISCOUNT_RATE,
+    OPTIMIZER_CHUNK_SIZE,
+    OPTIMIZER_DAY_OPTIONS,
+    OPTIMIZER_MAX_ITERATIONS,
+    OPTIMIZER_SIMULATIONS,
+    SIMULATION_SEED,
+)
+from .sampling import draw_shocks
+from .simulation import batch_streams, campaign_arrays, cohorts_from_shocks
+
+OBJECTIVES = ("mean", "p10")  # Mean NPV, or its 10% percentile (risk-averse)
+
+class ScheduleEvaluator:
+    """
+    Per-path NPVs of every campaign and booth day option of a plan, and
+    batched evaluation of candidate schedules on them.
+    Candidates are (candidates x campaigns) arrays of start years and of
+    indices into days_options. Every row of days_options holds an evenly
+    spaced grid within the bounds plus the campaign's current booth days
+    (if within the bounds), in ascending order.
+    """
+
+    def __init__(self, campaigns, bounds, n_simulations=OPTIMIZER_SIMULATIONS, seed=None, sampler="mc"):
+        self.start_bounds = np.array([bound["start_year"] for bound in bounds], dtype=int)
+        day_bounds = np.array([bound["booth_days"] for bound in bounds], dtype=float)
+        if np.any(day_bounds[:, 0] < ACQUISITION_EXACT_MAX_DAYS):
+            # Shorter campaigns draw other shocks than longer ones, which
+            # would break the common random numbers between the options
+            raise ValueError(f"Booth day bounds must be at least {ACQUISITION_EXACT_MAX_DAYS} days")
+        grid = np.round(np.linspace(day_bounds[:, 0], day_bounds[:, 1], OPTIMIZER_DAY_OPTIONS, axis=1))
+        current = np.clip([float(c["booth_days"]) for c in campaigns], day_bounds[:, 0], day_bounds[:, 1])
+        self.days_options = np.sort(np.column_stack([grid, current]), axis=1)
+        costs = np.array([float(c["booth_cost_per_day"]) for c in campaigns])
+        self.investments = self.days_options * costs[:, None]
+        self.discount_factors = (1 + DISCOUNT_RATE) ** (-np.arange(self.start_bounds.max() + 1))
+
+        n_campaigns, n_options = self.days_options.shape
+        options = [dict(campaign, start_year=0, booth_days=days) for campaign, row in zip(campaigns, self.days_options) for days in row]
+        params = campaign_arrays(options)
+        cohort_discount = (1 + DISCOUNT_RATE) ** (-np.arange(CAMPAIGN_YEARS))
+        # Campaigns x options x paths, so that the paths of one option are contiguous
+        self.values = np.empty((n_campaigns, n_options, n_simulations))
+        row = 0
+        for n_paths, batch_seed in batch_streams(seed, n_simulations):
+            shocks = draw_shocks(sampler, self.days_options[:, -1].astype(int), n_paths, batch_seed)
+            _, revenue = cohorts_from_shocks(params, n_paths, [s for s in shocks for _ in range(n_options)])
+            npvs = revenue @ cohort_discount - params["investment"]
+            self.values[:, :, row:row + n_paths] = npvs.T.reshape(n_campaigns, n_options, n_paths)
+            row += n_paths
+        self.mean_values = np.mean(self.values, axis=2)
+
+    def investment(self, options):
+        """Investment of every campaign of every candidate (candidates x campaigns)"""
+        return self.investments[np.arange(options.shape[1]), options]
+
+    def violation(self, start_years, options, budget, year_cap=None):
+        """CHF by which each candidate exceeds the total budget and the yearly liquidity cap"""
+        investment = self.investment(options)
+        excess = np.maximum(np.sum(investment, axis=1) - budget, 0)
+        if year_cap is not None:
+            by_year = np.zeros((len(options), len(self.discount_factors)))
+            rows = np.repeat(np.arange(len(options)), options.shape[1])
+            np.add.at(by_year, (rows, start_years.ravel()), investment.ravel())
+            excess += np.sum(np.maximum(by_year - year_cap, 0), axis=1)
+        return excess
+
+    def mean_npv(self, start_years, options):
+        """Mean NPV of every candidate"""
+        campaign_npvs = self.mean_values[np.arange(options.shape[1]), options]
+        return np.sum(campaign_npvs * self.discount_factors[start_years], axis=1)
+
+    def _campaign_paths(self, c, start_year, option):
+        """Per-path NPV of campaign c with one option and start year"""
+        return self.values[c, option] * self.discount_factors[start_year]
+
+    def npv_percentile(self, start_years, options, q):
+        """
+        q% percentile of the NPV of every candidate, in blocks of candidates x
+        paths. Every block starts from the path NPVs of its first candidate and
+        only adds the campaigns that differ from it, which makes neighboring
+        schedules (one or two campaigns changed) cheap to evaluate.
+        """
+        n_campaigns = options.shape[1]
+        result = np.empty(len(options))
+        for start in range(0, len(options), OPTIMIZER_CHUNK_SIZE):
+            block_starts = start_years[start:start + OPTIMIZER_CHUNK_SIZE]
+            block_options = options[start:start + OPTIMIZER_CHUNK_SIZE]
+            reference = [self._campaign_paths(c, block_starts[0, c], block_options[0, c]) for c in range(n_campaigns)]
+            npvs = np.tile(np.sum(reference, axis=0), (len(block_options), 1))
+            for c in range(n_campaigns):
+                changed = np.flatnonzero((block_starts[:, c] != block_starts[0, c]) | (block_options[:, c] != block_options[0, c]))
+                if len(changed):
+                    discount = self.discount_factors[block_starts[changed, c]][:, None]
+                    npvs[changed] += self.values[c, block_options[changed, c]] * discount - reference[c]
+            result[start:start + len(block_options)] = np.percentile(npvs, q, axis=1)
+        return result
+
+    def objective(self, start_years, options, objective="mean"):
+        """Objective (see OBJECTIVES) of every candidate"""
+        if objective == "mean":
+            return self.mean_npv(start_years, options)
+        if objective == "p10":
+            return self.npv_percentile(start_years, options, 10)
+        raise ValueError(f"Unknown objective {objective!r}, expected one of {OBJECTIVES}")
+
+def _neighbors(evaluator, start_years, options, budget):
+    """All candidates one move away from a schedule (start years, option indices)"""
+    n_campaigns, n_options = evaluator.days_options.shape
+    candidates = []
+
+    def moved(n):
+        return np.repeat(start_years[None], n, axis=0), np.repeat(options[None], n, axis=0)
+
+    for c in range(n_campaigns):
+        # Another start year or booth day option for one campaign
+        low, high = evaluator.start_bounds[c]
+        years = np.arange(low, high + 1)
+        s, o = moved(len(years))
+        s[:, c] = years
+        candidates.append((s, o))
+        s, o = moved(n_options)
+        o[:, c] = np.arange(n_options)
+        candidates.append((s, o))
+
+    # Budget shifted from one campaign to another: a takes any option and b
+    # the largest one that the rest of the budget still pays for
+    total = np.sum(evaluator.investment(options[None]))
+    for a, b in itertools.permutations(range(n_campaigns), 2):
+        rest = budget - total + evaluator.investments[a, options[a]] + evaluator.investments[b, options[b]]
+        s, o = moved(n_options)
+        o[:, a] = np.arange(n_options)
+        o[:, b] = np.clip(np.searchsorted(evaluator.investments[b], rest - evaluator.investments[a], side="right") - 1, 0, n_options - 1)
+        candidates.append((s, o))
+
+    # Start years of two campaigns swapped
+    for a, b in itertools.combinations(range(n_campaigns), 2):
+        (low_a, high_a), (low_b, high_b) = evaluator.start_bounds[a], evaluator.start_bounds[b]
+        if start_years[a] != start_years[b] and low_a <= start_years[b] <= high_a and low_b <= start_years[a] <= high_b:
+            s, o = moved(1)
+            s[0, [a, b]] = start_years[[b, a]]
+            candidates.append((s, o))
+
+    return np.concatenate([s for s, _ in candidates]), np.concatenate([o for _, o in candidates])
+
+def _summary(evaluator, start_years, options, budget, year_cap):
+    """Mean NPV, 10% percentile and feasibility of one schedule"""
+    s, o = start_years[None], options[None]
+    return {
+        "mean_npv": float(evaluator.mean_npv(s, o)[0]),
+        "npv_p10": float(evaluator.npv_percentile(s, o, 10)[0]),
+        "feasible": bool(evaluator.violation(s, o, budget, year_cap)[0] < 1),
+    }
+
+def optimize_schedule(campaigns, bounds, budget, year_cap=None, objective="mean", n_simulations=OPTIMIZER_SIMULATIONS, seed=None, sampler="mc", max_iterations=OPTIMIZER_MAX_ITERATIONS):
+    """
+    Start years and booth days of a campaign plan that maximize the objective
+    (see OBJECTIVES) within the total budget and, if given, the per-year
+    liquidity cap (investment of all campaigns starting in one year, CHF).
+    bounds holds one {"start_year": (min, max), "booth_days": (min, max)}
+    dict per campaign; everything else about the campaigns stays fixed.
+    Returns the optimized plan with its NPV, the NPV of the current plan on
+    the same paths and the number of evaluated candidates. A feasible current
+    plan that no schedule within the bounds beats is returned unchanged.
+    """
+    evaluator = ScheduleEvaluator(campaigns, bounds, n_simulations, seed, sampler)
+    current_starts = np.array([int(float(c["start_year"])) for c in campaigns])
+    current_days = np.array([float(c["booth_days"]) for c in campaigns])
+    start_years = np.clip(current_starts, evaluator.start_bounds[:, 0], evaluator.start_bounds[:, 1])
+    options = np.argmin(np.abs(evaluator.days_options - current_days[:, None]), axis=1)
+
+    def score(s, o):
+        # Whole CHF, so that rounding noise does not rank feasible schedules
+        return np.round(evaluator.violation(s, o, budget, year_cap)), evaluator.objective(s, o, objective)
+
+    if np.array_equal(start_years, current_starts) and np.array_equal(evaluator.days_options[np.arange(len(campaigns)), options], current_days):
+        baseline_evaluator, baseline_starts, baseline_options = evaluator, start_years, options
+    else:
+        # The current plan lies outside the bounds: evaluate it on its own (same paths)
+        exact = [{"start_year": (s, s), "booth_days": (d, d)} for s, d in zip(current_starts, current_days)]
+        baseline_evaluator = ScheduleEvaluator(campaigns, exact, n_simulations, seed, sampler)
+        baseline_starts, baseline_options = current_starts, np.zeros(len(campaigns), dtype=int)
+    baseline = _summary(baseline_evaluator, baseline_starts, baseline_options, budget, year_cap)
+    (baseline_value,) = baseline_evaluator.objective(baseline_starts[None], baseline_options[None], objective)
+
+    (violation,), (value,) = score(start_years[None], options[None])
+    n_candidates = 1
+    iterations = 0
+    while iterations < max_iterations:
+        iterations += 1
+        candidate_starts, candidate_options = _neighbors(evaluator, start_years, options, budget)
+        violations, values = score(candidate_starts, candidate_options)
+        n_candidates += len(values)
+        best = np.lexsort((-values, violations))[0]
+        if violations[best] > violation or (violations[best] == violation and values[best] <= value + 1e-6):
+            break
+        start_years, options = candidate_starts[best], candidate_options[best]
+        violation, value = violations[best], values[best]
+
+    if baseline["feasible"] and (violation >= 1 or baseline_value >= value):
+        evaluator, start_years, options, value = baseline_evaluator, baseline_starts, baseline_options, baseline_value
+
+    investment = evaluator.investment(options[None])[0]
+    plan = [
+        dict(campaign, start_year=float(start_years[c]), booth_days=float(evaluator.days_options[c, options[c]]))
+        for c, campaign in enumerate(campaigns)
+    ]
+    return {
+        "campaigns": plan,
+        "objective": objective,
+        "objective_value": float(value),
+        **_summary(evaluator, start_years, options, budget, year_cap),
+        "total_investment": float(np.sum(investment)),
+        "investment_by_year": np.bincount(start_years, weights=investment, minlength=len(evaluator.discount_factors)),
+        "baseline": baseline,
+        "n_candidates": n_candidates,
+        "iterations": iterations,
+    }
+
+def regression_plans():
+    """
+    (name, campaigns, bounds, budget, year cap, objective, witness) of the
+    reference cases; witness is a feasible plan the result must not fall
+    below (None: only the current plan)
+    """
+    def campaign(start_year, booth_days=1000.0):
+        return {
+            "start_year": float(start_year),
+            "booth_days": booth_days,
+            "annual_donation": 261.48,
+            "retention_rate": 83.0,
+            "donors_per_day": 3.5,
+            "booth_cost_per_day": 830.0,
+        }
+
+    # The app's default plan spends exactly the default budget
+    default_plan = [campaign(year) for year in range(3)]
+    default_bounds = [{"start_year": (0, 10), "booth_days": (10.0, 5000.0)}] * 3
+    default_budget = 3 * 1000 * 830.0
+    same_year = [campaign(0) for _ in range(3)]
+    return [
+        ("default plan", default_plan, default_bounds, default_budget, None, "mean", same_year),
+        ("default plan, p10", default_plan, default_bounds, default_budget, None, "p10", None),
+        ("default plan, year cap", default_plan, default_bounds, default_budget, 1000 * 830.0, "mean", None),
+        ("outside the bounds", default_plan, [{"start_year": (0, 5), "booth_days": (1200.0, 3000.0)}] * 3, default_budget, None, "mean", None),
+    ]
+
+def run_regression(seed=SIMULATION_SEED, sampler="sobol"):
+    """
+    Optimize every regression plan. Returns (name, objective value of the
+    current plan, of the witness (or None), of the result, result feasible)
+    rows.
+    """
+    rows = []
+    for name, campaigns, bounds, budget, year_cap, objective, witness in regression_plans():
+        result = optimize_schedule(campaigns, bounds, budget, year_cap, objective, seed=seed, sampler=sampler)
+        key = "mean_npv" if objective == "mean" else "npv_p10"
+        witness_value = None
+        if witness is not None:
+            exact = [{"start_year": (int(c["start_year"]),) * 2, "booth_days": (c["booth_days"],) * 2} for c in witness]
+            evaluator = ScheduleEvaluator(witness, exact, seed=seed, sampler=sampler)
+            starts = np.array([int(c["start_year"]) for c in witness])
+            witness_value = _summary(evaluator, starts, np.zeros(len(witness), dtype=int), budget, year_cap)[key]
+        rows.append((name, result["baseline"][key], witness_value, result[key], result["feasible"]))
+    return rows
+
+def main():
+    """Print the regression table; exit code 1 if a result is infeasible or worse than the current plan or witness"""
+    failed = False
+    print(f"{'plan':<24} {'current':>14} {'witness':>14} {'optimized':>14}")
+    for name, current, witness, optimized, feasible in run_regression():
+        flag = ""
+        if not feasible or optimized < current or (witness is not None and optimized < witness):
+            flag = "  FAIL"
+            failed = True
+        witness_text = f"{witness:>14,.0f}" if witness is not None else f"{'-':>14}"
+        print(f"{name:<24} {current:>14,.0f} {witness_text} {optimized:>14,.0f}{flag}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
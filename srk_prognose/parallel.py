@@ -0,0 +1,190 @@
+"""
+Process pool execution of large simulation runs.
+Batches are sharded across worker processes. Every worker writes its paths'
+cumulative discounted cash flows into one shared memory block and only sends
+back small per-campaign sums, so no per-path data is pickled. Sketched runs
+keep no per-path data at all: every worker returns a sketched aggregate of
+its shard and the parent merges them.
+"""
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .aggregate import RunningAggregate
+from .config import PARALLEL_MIN_SIMULATIONS, SIMULATION_BATCH_SIZE, SKETCH_MIN_SIMULATIONS
+from .simulation import BatchWorkspace, batch_streams, run_batches, run_shifted_batches
+from .timing import timed
+
+# One pool per worker count: runs of other sessions may still be using a
+# pool, so a run asking for a different size never replaces it
+_executors = {}
+_executor_lock = threading.Lock()
+
+def _pool_context():
+    """
+    Prefer fork: spawned workers re-run the main module, which under Streamlit
+    is the app script itself. Fork is unavailable on Windows and unsafe on macOS.
+    """
+    if sys.platform.startswith("linux"):
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("spawn")
+
+def _get_executor(workers):
+    """Process pool with this many workers shared by all runs of this process, created on demand"""
+    with _executor_lock:
+        if workers not in _executors:
+            _executors[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context())
+        return _executors[workers]
+
+def _reset_executor(executor):
+    """Drop a broken pool so that the next run starts a fresh one (unless another run already has)"""
+    with _executor_lock:
+        for workers, pool in list(_executors.items()):
+            if pool is executor:
+                del _executors[workers]
+
+def _run_shard(shm_name, shape, params, n_years, row_offset, batches, sampler):
+    """Worker entry point: simulate a shard of batches into the shared output block"""
+    # Workers share the parent's resource tracker, which unlinks the block
+    # only if the parent dies without doing so itself
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        n_rows = sum(n_paths for n_paths, _ in batches)
+        cumulative = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)[row_offset:row_offset + n_rows]
+        sums = run_batches(params, n_years, batches, cumulative, sampler)
+        del cumulative
+        return sums
+    finally:
+        shm.close()
+
+def _shard_batches(batches, n_shards):
+    """Split batches into n_shards contiguous shards as (row offset, batches) pairs"""
+    shards = []
+    row_offset = 0
+    for shard in np.array_split(np.arange(len(batches)), n_shards):
+        shard_batches = [batches[i] for i in shard]
+        shards.append((row_offset, shard_batches))
+        row_offset += sum(n_paths for n_paths, _ in shard_batches)
+    return shards
+
+@timed("simulate")
+def simulate(params, n_years, n_simulations, seed, max_workers=None, sampler="mc", progress=None):
+    """
+    Run all batches of a simulation and return (sums, cumulative discounted
+    cash flows per path). Runs with at least PARALLEL_MIN_SIMULATIONS paths are
+    sharded across a process pool; smaller runs, or machines with a single
+    core, use the in-process path. Both give identical paths for a seed
+    because every batch has its own spawned RNG stream.
+    progress(completed paths, total paths) is called after every batch of
+    the in-process path and after every shard of the pool.
+    """
+    batches = list(batch_streams(seed, n_simulations))
+    workers = min(max_workers or os.cpu_count() or 1, len(batches))
+    cumulative = np.empty((n_simulations, n_years))
+
+    if n_simulations < PARALLEL_MIN_SIMULATIONS or workers < 2:
+        return run_batches(params, n_years, batches, cumulative, sampler, progress), cumulative
+
+    shm = shared_memory.SharedMemory(create=True, size=cumulative.nbytes)
+    try:
+        executor = _get_executor(workers)
+        shards = _shard_batches(batches, workers)
+        futures = [
+            executor.submit(_run_shard, shm.name, cumulative.shape, params, n_years, row_offset, shard_batches, sampler)
+            for row_offset, shard_batches in shards
+        ]
+        partials = []
+        completed = 0
+        try:
+            for future, (_, shard_batches) in zip(futures, shards):
+                partials.append(future.result())
+                completed += sum(n_paths for n_paths, _ in shard_batches)
+                if progress is not None:
+                    progress(completed, n_simulations)
+        except BrokenProcessPool:
+            _reset_executor(executor)
+            raise
+        finally:
+            # After an error (or an aborting progress callback) skip the shards that have not started
+            for future in futures:
+                future.cancel()
+        cumulative[:] = np.ndarray(cumulative.shape, dtype=np.float64, buffer=shm.buf)
+    finally:
+        shm.close()
+        shm.unlink()
+
+    sums = {key: np.sum([partial[key] for partial in partials], axis=0) for key in partials[0]}
+    return sums, cumulative
+
+@timed("simulate")
+def simulate_shifted(params, n_years, n_simulations, seed, sampler="mc", progress=None):
+    """
+    Shift-and-sum simulation of a plan with repeated campaigns (see
+    run_shifted_batches), in-process. Returns (sums, cumulative discounted
+    cash flows per path, per-path NPVs for the error of the mean).
+    """
+    cumulative = np.empty((n_simulations, n_years))
+    npvs = np.empty(n_simulations)
+    sums = run_shifted_batches(params, n_years, list(batch_streams(seed, n_simulations)), cumulative, npvs, sampler, progress)
+    return sums, cumulative, npvs
+
+def _sketch_batches(params, n_years, batches, sampler, progress=None, n_total=None):
+    """Sketched aggregate of (n_paths, seed) batches, simulated through one reused batch buffer"""
+    aggregate = RunningAggregate(len(params["booth_days"]), n_years, sketch=True, sampler=sampler)
+    workspace = BatchWorkspace(len(params["booth_days"]), n_years)
+    buffer = np.empty((SIMULATION_BATCH_SIZE, n_years))
+    for n_paths, batch_seed in batches:
+        cumulative = buffer[:n_paths]
+        aggregate.add(run_batches(params, n_years, [(n_paths, batch_seed)], cumulative, sampler, workspace=workspace), cumulative)
+        if progress is not None:
+            progress(aggregate.n_paths, n_total)
+    return aggregate
+
+@timed("simulate")
+def simulate_sketched(params, n_years, n_simulations, seed, max_workers=None, sampler="mc", progress=None):
+    """
+    Run all batches of a simulation into a sketched RunningAggregate, in
+    constant memory. Large runs are sharded across the process pool like in
+    simulate; the shard aggregates are merged in batch order.
+    """
+    batches = list(batch_streams(seed, n_simulations))
+    workers = min(max_workers or os.cpu_count() or 1, len(batches))
+    if n_simulations < PARALLEL_MIN_SIMULATIONS or workers < 2:
+        return _sketch_batches(params, n_years, batches, sampler, progress, n_simulations)
+
+    executor = _get_executor(workers)
+    shards = _shard_batches(batches, workers)
+    futures = [executor.submit(_sketch_batches, params, n_years, shard_batches, sampler) for _, shard_batches in shards]
+    aggregate = RunningAggregate(len(params["booth_days"]), n_years, sketch=True, sampler=sampler)
+    try:
+        for future in futures:
+            aggregate.merge(future.result())
+            if progress is not None:
+                progress(aggregate.n_paths, n_simulations)
+    except BrokenProcessPool:
+        _reset_executor(executor)
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
+    return aggregate
+
+def simulate_aggregate(params, n_years, n_simulations, seed, max_workers=None, sampler="mc", progress=None, sketch=None):
+    """
+    RunningAggregate of a full simulation run. sketch=None sketches runs of
+    at least SKETCH_MIN_SIMULATIONS paths and keeps every path of smaller
+    runs (exact percentiles).
+    """
+    if sketch is None:
+        sketch = n_simulations >= SKETCH_MIN_SIMULATIONS
+    if sketch:
+        return simulate_sketched(params, n_years, n_simulations, seed, max_workers, sampler, progress)
+    aggregate = RunningAggregate(len(params["booth_days"]), n_years, sampler=sampler)
+    aggregate.add(*simulate(params, n_years, n_simulations, seed, max_workers, sampler, progress))
+    return aggregate
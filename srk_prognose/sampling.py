@@ -0,0 +1,122 @@
+"""
+Random shocks of the donor cohort model.
+Every campaign needs standard normal shocks for retention (one per year after
+acquisition), donation (one per year), acquisition (one, or one per booth day
+for short campaigns) and a uniform for the year-0 donation months. The
+samplers produce the same shocks with different variance reduction:
+
+- "mc": independent pseudo-random draws, one PCG64 stream per campaign
+- "antithetic": the second half of every batch mirrors the first (z -> -z, u -> 1 - u)
+- "sobol": ERROR_REPLICATIONS independently scrambled Sobol sequences per
+  run, mapped through the inverse normal CDF; batch i continues sequence
+  i mod ERROR_REPLICATIONS (randomized QMC)
+
+The paths of the antithetic and Sobol samplers are not independent, so their
+standard error comes from the spread between independent groups of batches
+(see batch_groups).
+"""
+import threading
+import warnings
+
+import numpy as np
+
+from .config import ACQUISITION_EXACT_MAX_DAYS, CAMPAIGN_YEARS, ERROR_REPLICATIONS, SIMULATION_BATCH_SIZE
+
+SAMPLERS = ("mc", "antithetic", "sobol")
+
+# Sobol engines of the last run of each thread: consecutive batches of a run
+# continue them instead of re-scrambling and fast-forwarding from the start
+_sobol_state = threading.local()
+
+def batch_groups(sampler):
+    """
+    Number of independent groups (batch i belongs to group i mod groups)
+    that the standard error is estimated from; None if paths are independent
+    """
+    return None if sampler == "mc" else ERROR_REPLICATIONS
+
+def acquisition_dims(booth_days_int):
+    """Number of acquisition shocks: one per day for short campaigns, else one for the total"""
+    return booth_days_int if booth_days_int < ACQUISITION_EXACT_MAX_DAYS else 1
+
+def _split_campaign(z, u):
+    """(retention, donation, months, acquisition) shocks from a campaign's normal block and uniform"""
+    return z[:, :CAMPAIGN_YEARS - 1], z[:, CAMPAIGN_YEARS - 1:2 * CAMPAIGN_YEARS - 1], u, z[:, 2 * CAMPAIGN_YEARS - 1:]
+
+def _mc_shocks(booth_days, n_paths, batch_seed):
+    """Pseudo-random shocks, every campaign from its own stream spawned from batch_seed"""
+    shocks = []
+    for days, campaign_seed in zip(booth_days, batch_seed.spawn(len(booth_days))):
+        rng = np.random.Generator(np.random.PCG64(campaign_seed))
+        z = rng.standard_normal((n_paths, 2 * CAMPAIGN_YEARS - 1 + acquisition_dims(days)))
+        u = rng.random(n_paths)
+        shocks.append(_split_campaign(z, u))
+    return shocks
+
+def _antithetic_shocks(booth_days, n_paths, batch_seed):
+    """Pseudo-random shocks for half the paths, mirrored for the other half"""
+    shocks = []
+    for retention, donation, months, acquisition in _mc_shocks(booth_days, -(-n_paths // 2), batch_seed):
+        shocks.append((
+            np.concatenate([retention, -retention])[:n_paths],
+            np.concatenate([donation, -donation])[:n_paths],
+            np.concatenate([months, 1.0 - months])[:n_paths],
+            np.concatenate([acquisition, -acquisition])[:n_paths],
+        ))
+    return shocks
+
+def _sobol_shocks(booth_days, n_paths, batch_seed):
+    """
+    Scrambled Sobol shocks. batch_streams spawns batch i as child i of the run
+    seed, so the run seed and the batch's position are recovered from
+    batch_seed. Batch i continues sequence i mod ERROR_REPLICATIONS, each
+    scrambled from its own child of the run seed.
+    """
+    from scipy.special import ndtri
+    from scipy.stats import qmc
+
+    dims = [2 * CAMPAIGN_YEARS + acquisition_dims(days) for days in booth_days]
+    run_key = batch_seed.spawn_key[:-1]
+    key = (batch_seed.entropy, run_key, tuple(dims))
+    if getattr(_sobol_state, "key", None) != key:
+        _sobol_state.key, _sobol_state.engines = key, {}
+    position, replication = divmod(batch_seed.spawn_key[-1], ERROR_REPLICATIONS)
+    engine = _sobol_state.engines.get(replication)
+    if engine is None:
+        replication_seed = np.random.SeedSequence(batch_seed.entropy, spawn_key=run_key + (replication,))
+        engine = _sobol_state.engines[replication] = qmc.Sobol(sum(dims), scramble=True, seed=np.random.Generator(np.random.PCG64(replication_seed)))
+
+    offset = position * SIMULATION_BATCH_SIZE
+    if engine.num_generated != offset:
+        engine.reset()
+        if offset > 0:
+            engine.fast_forward(offset)
+    with warnings.catch_warnings():
+        # Runs shorter than one full batch do not form a complete net
+        warnings.simplefilter("ignore", UserWarning)
+        points = engine.random(n_paths)
+    # Scrambled points may be exactly 0, which has no finite normal quantile
+    points = np.clip(points, 2.0 ** -53, 1.0 - 2.0 ** -53)
+
+    shocks = []
+    start = 0
+    for dim in dims:
+        block = points[:, start:start + dim]
+        shocks.append(_split_campaign(ndtri(block[:, 1:]), block[:, 0]))
+        start += dim
+    return shocks
+
+def draw_shocks(sampler, booth_days, n_paths, batch_seed):
+    """
+    Shocks of one batch for every campaign as (retention (paths x years - 1),
+    donation (paths x years), months uniform (paths), acquisition
+    (paths x acquisition_dims)) tuples. Equal seeds and campaign layouts give
+    equal shocks, which the scenario comparison relies on.
+    """
+    if sampler == "mc":
+        return _mc_shocks(booth_days, n_paths, batch_seed)
+    if sampler == "antithetic":
+        return _antithetic_shocks(booth_days, n_paths, batch_seed)
+    if sampler == "sobol":
+        return _sobol_shocks(booth_days, n_paths, batch_seed)
+    raise ValueError(f"Unknown sampler {sampler!r}, expected one of {SAMPLERS}")
@@ -0,0 +1,95 @@
+"""
+One-at-a-time sensitivity (tornado) analysis of a single campaign.
+The base case and the low/high variant of every input are simulated together
+as extra "campaigns" of one batched run that all reuse the base campaign's
+random shocks, so every NPV difference is free of Monte Carlo noise between
+the variants (common random numbers).
+"""
+import numpy as np
+
+from .config import CAMPAIGN_YEARS, DISCOUNT_RATE, EMPIRICAL_RETENTION, EPSILON, N_SIMULATIONS, SENSITIVITY_CHANGE
+from .sampling import draw_shocks
+from .simulation import batch_streams, campaign_arrays, cohorts_from_shocks
+
+def sensitivity_parameters(campaign):
+    """
+    Inputs varied for a campaign. The empirical year 1/2/3+ retention rates
+    only apply (and are only varied) when the campaign uses them.
+    """
+    parameters = ["donors_per_day", "annual_donation", "retention_rate"]
+    if abs(float(campaign["retention_rate"]) - EMPIRICAL_RETENTION[1][0]) < EPSILON:
+        parameters += ["retention_year_1", "retention_year_2", "retention_year_3"]
+    return parameters + ["booth_cost", "discount_rate"]
+
+def _scale(params, discount_rates, row, parameter, factor):
+    """Scale one input of variant row by factor; returns the input's new value"""
+    if parameter == "donors_per_day":
+        params["donors_per_day"][row] *= factor
+        return params["donors_per_day"][row]
+    if parameter == "annual_donation":
+        params["annual_donation"][row] *= factor
+        return params["annual_donation"][row]
+    if parameter == "retention_rate":
+        params["ret_mean"][row] = np.minimum(params["ret_mean"][row] * factor, 100)
+        return params["ret_mean"][row, 0]
+    if parameter.startswith("retention_year_"):
+        # The year 3 rate applies to all years from 3 on
+        year = int(parameter[-1])
+        years = slice(year - 1, None) if year == 3 else slice(year - 1, year)
+        params["ret_mean"][row, years] = np.minimum(params["ret_mean"][row, years] * factor, 100)
+        return params["ret_mean"][row, year - 1]
+    if parameter == "booth_cost":
+        params["investment"][row] *= factor
+        return params["investment"][row] / params["booth_days"][row]
+    if parameter == "discount_rate":
+        discount_rates[row] *= factor
+        return discount_rates[row]
+    raise ValueError(f"Unknown sensitivity parameter {parameter!r}")
+
+def tornado_analysis(campaign, change=SENSITIVITY_CHANGE, n_simulations=N_SIMULATIONS, seed=None, sampler="mc"):
+    """
+    NPV of the campaign with every input moved down and up by change (relative),
+    all 2k + 1 variants in one batched run on shared random numbers.
+    Returns the base NPV and one row per input, sorted by NPV swing.
+    """
+    parameters = sensitivity_parameters(campaign)
+    base = campaign_arrays([campaign])
+    n_variants = 2 * len(parameters) + 1
+    params = {key: np.repeat(value, n_variants, axis=0) for key, value in base.items()}
+    discount_rates = np.full(n_variants, DISCOUNT_RATE)
+
+    # Variant 0 is the base case, 2i + 1 / 2i + 2 the low / high case of input i
+    values = []
+    for i, parameter in enumerate(parameters):
+        low = _scale(params, discount_rates, 2 * i + 1, parameter, 1 - change)
+        high = _scale(params, discount_rates, 2 * i + 2, parameter, 1 + change)
+        # Factor 1 leaves the base case unchanged and just reads its value
+        values.append((_scale(params, discount_rates, 0, parameter, 1.0), low, high))
+
+    discount_factors = (1 + discount_rates[:, None]) ** (-np.arange(CAMPAIGN_YEARS))
+    npvs = np.empty((n_simulations, n_variants))
+    row = 0
+    for n_paths, batch_seed in batch_streams(seed, n_simulations):
+        shocks = draw_shocks(sampler, base["booth_days"], n_paths, batch_seed) * n_variants
+        _, revenue = cohorts_from_shocks(params, n_paths, shocks)
+        revenue[:, :, 0] -= params["investment"]
+        npvs[row:row + n_paths] = np.sum(revenue * discount_factors, axis=2)
+        row += n_paths
+
+    mean_npvs = np.mean(npvs, axis=0)
+    rows = []
+    for i, (parameter, (base_value, low_value, high_value)) in enumerate(zip(parameters, values)):
+        differences = npvs[:, [2 * i + 1, 2 * i + 2]] - npvs[:, [0]]
+        rows.append({
+            "parameter": parameter,
+            "base_value": float(base_value),
+            "low_value": float(low_value),
+            "high_value": float(high_value),
+            "npv_low": float(mean_npvs[2 * i + 1]),
+            "npv_high": float(mean_npvs[2 * i + 2]),
+            "delta_low": float(mean_npvs[2 * i + 1] - mean_npvs[0]),
+            "delta_high": float(mean_npvs[2 * i + 2] - mean_npvs[0]),
+            "delta_standard_error": float(np.max(np.std(differences, axis=0, ddof=1)) / np.sqrt(n_simulations)),
+        })
+    rows.sort(key=lambda r: abs(r["delta_high"] - r["delta_low"]), reverse=True)
+    return {"base_npv": float(mean_npvs[0]), "change": change, "rows": rows}
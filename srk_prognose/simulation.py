@@ -0,0 +1,319 @@
+"""
+Batched Monte Carlo kernel of the donor cohort model.
+Everything here works on plain numpy arrays so that batches can be run in
+this process or shipped to process pool workers.
+"""
+import math
+
+import numpy as np
+
+from .config import (
+    ACQUISITION_EXACT_MAX_DAYS,
+    CAMPAIGN_YEARS,
+    DISCOUNT_RATE,
+    EMPIRICAL_DONATION_MEAN,
+    EMPIRICAL_DONATION_STD,
+    EMPIRICAL_DONORS_MEAN,
+    EMPIRICAL_DONORS_STD,
+    EMPIRICAL_RETENTION,
+    EPSILON,
+    SIMULATION_BATCH_SIZE,
+)
+from .sampling import draw_shocks
+
+def retention_schedule(retention_rate, n_years):
+    """
+    Retention mean and std (in %) for each year 1..n_years after acquisition
+    """
+    if abs(retention_rate - EMPIRICAL_RETENTION[1][0]) < EPSILON:
+        # Year 1 and 2 have their own rates, year 3+ is stable
+        schedule = [EMPIRICAL_RETENTION[min(year, 3)] for year in range(1, n_years + 1)]
+        ret_mean = np.array([mean for mean, _ in schedule])
+        ret_std = np.array([std for _, std in schedule])
+    else:
+        ret_mean = np.full(n_years, float(retention_rate))
+        ret_std = np.full(n_years, EMPIRICAL_RETENTION[1][1])
+    return ret_mean, ret_std
+
+def rectified_normal_moments(mean, std):
+    """
+    Mean, variance and third central moment of max(X, 0) with X ~ N(mean, std^2)
+    """
+    a = mean / std
+    pdf = math.exp(-0.5 * a * a) / math.sqrt(2 * math.pi)
+    cdf = 0.5 * math.erfc(-a / math.sqrt(2))
+    # Partial moments E[Z^k; Z > -a] of the standard normal
+    m0, m1, m2, m3 = cdf, pdf, cdf - a * pdf, (a * a + 2) * pdf
+    raw1 = mean * m0 + std * m1
+    raw2 = mean ** 2 * m0 + 2 * mean * std * m1 + std ** 2 * m2
+    raw3 = mean ** 3 * m0 + 3 * mean ** 2 * std * m1 + 3 * mean * std ** 2 * m2 + std ** 3 * m3
+    variance = raw2 - raw1 ** 2
+    third_central = raw3 - 3 * raw1 * raw2 + 2 * raw1 ** 3
+    return raw1, variance, third_central
+
+def sample_initial_donors(actual_donors, booth_days_int, shocks):
+    """
+    Total of the (non-negative) daily donor draws for every simulation, from
+    standard normal shocks (simulations x acquisition_dims(booth_days_int)).
+    Short campaigns use one shock per day. Otherwise the sum of booth_days_int
+    rectified normals is drawn from a single shock, using its exact mean and
+    variance with a Cornish-Fisher (Edgeworth) skewness correction, so the
+    cost does not grow with booth_days.
+    """
+    if booth_days_int < ACQUISITION_EXACT_MAX_DAYS:
+        daily_donors = actual_donors + EMPIRICAL_DONORS_STD * shocks
+        return np.floor(np.sum(np.maximum(daily_donors, 0), axis=1))
+
+    mean, variance, third_central = rectified_normal_moments(actual_donors, EMPIRICAL_DONORS_STD)
+    skewness = third_central / variance ** 1.5 / math.sqrt(booth_days_int)
+    z = shocks[:, 0] + skewness / 6 * (shocks[:, 0] ** 2 - 1)
+    total = booth_days_int * mean + math.sqrt(booth_days_int * variance) * z
+    return np.floor(np.maximum(total, 0))
+
+def campaign_arrays(campaigns):
+    """
+    Model parameters of every campaign as arrays, with empirical values substituted
+    """
+    n_campaigns = len(campaigns)
+    params = {
+        "donors_per_day": np.empty(n_campaigns),
+        "annual_donation": np.empty(n_campaigns),
+        "booth_days": np.empty(n_campaigns, dtype=int),
+        "ret_mean": np.empty((n_campaigns, CAMPAIGN_YEARS - 1)),
+        "ret_std": np.empty((n_campaigns, CAMPAIGN_YEARS - 1)),
+        "start_year": np.empty(n_campaigns, dtype=int),
+        "investment": np.empty(n_campaigns),
+    }
+    for c, camp in enumerate(campaigns):
+        # Determine if using empirical data
+        using_empirical_donors = abs(float(camp["donors_per_day"]) - EMPIRICAL_DONORS_MEAN) < EPSILON
+        using_empirical_donation = abs(float(camp["annual_donation"]) - EMPIRICAL_DONATION_MEAN) < EPSILON
+        params["donors_per_day"][c] = EMPIRICAL_DONORS_MEAN if using_empirical_donors else float(camp["donors_per_day"])
+        params["annual_donation"][c] = EMPIRICAL_DONATION_MEAN if using_empirical_donation else float(camp["annual_donation"])
+        params["booth_days"][c] = int(float(camp["booth_days"]))
+        params["ret_mean"][c], params["ret_std"][c] = retention_schedule(float(camp["retention_rate"]), CAMPAIGN_YEARS - 1)
+        params["start_year"][c] = int(float(camp.get("start_year", 0)))
+        params["investment"][c] = float(camp["booth_days"]) * float(camp["booth_cost_per_day"])
+    return params
+
+def batch_streams(seed, n_simulations):
+    """
+    Split a run into batches of at most SIMULATION_BATCH_SIZE paths.
+    Yields (batch size, SeedSequence) pairs; every batch gets its own stream
+    spawned from the run seed, so batches are independent and reproducible.
+    """
+    n_batches = -(-n_simulations // SIMULATION_BATCH_SIZE)
+    for i, batch_seed in enumerate(np.random.SeedSequence(seed).spawn(n_batches)):
+        yield min(SIMULATION_BATCH_SIZE, n_simulations - i * SIMULATION_BATCH_SIZE), batch_seed
+
+class BatchWorkspace:
+    """
+    Preallocated arrays for simulating batches of up to n_paths paths of a
+    plan, reused from batch to batch instead of allocating new ones
+    """
+
+    def __init__(self, n_campaigns, n_years, n_paths=SIMULATION_BATCH_SIZE):
+        self.donors = np.empty((n_paths, n_campaigns, CAMPAIGN_YEARS))
+        self.revenue = np.empty((n_paths, n_campaigns, CAMPAIGN_YEARS))
+        self.retention = np.empty((n_paths, n_campaigns, CAMPAIGN_YEARS - 1))
+        self.months = np.empty((n_paths, n_campaigns))
+        self.cash_flows = np.empty((n_paths, n_years))
+
+def simulate_cohort_batch(params, n_paths, batch_seed, sampler="mc", workspace=None):
+    """
+    Simulate one batch of donor cohorts over their own CAMPAIGN_YEARS.
+    The random shocks come from draw_shocks in a fixed layout per campaign, so
+    plans simulated with the same seed and sampler share their shocks campaign
+    by campaign (common random numbers).
+    Returns donors and revenue as (paths x campaigns x years since start) arrays.
+    """
+    return cohorts_from_shocks(params, n_paths, draw_shocks(sampler, params["booth_days"], n_paths, batch_seed), workspace)
+
+def cohorts_from_shocks(params, n_paths, shocks, workspace=None):
+    """
+    Donors and revenue (paths x campaigns x years since start) of every
+    campaign, given its (retention, donation, months, acquisition) shocks.
+    With a BatchWorkspace the results are views into its arrays, valid until
+    the next batch is simulated into it.
+    """
+    n_campaigns = len(params["booth_days"])
+    if workspace is None:
+        workspace = BatchWorkspace(n_campaigns, 0, n_paths)
+    donors = workspace.donors[:n_paths]
+    retention_decimal = workspace.retention[:n_paths]
+    # The donation draws are turned into revenue in place
+    revenue = workspace.revenue[:n_paths]
+    months_of_donation = workspace.months[:n_paths]
+    for c, (z_retention, z_donation, u_months, z_acquisition) in enumerate(shocks):
+        retention_decimal[:, c] = (params["ret_mean"][c] + params["ret_std"][c] * z_retention) / 100
+        revenue[:, c] = params["annual_donation"][c] + EMPIRICAL_DONATION_STD * z_donation
+        months_of_donation[:, c] = (2.0 + u_months) / 12.0
+        donors[:, c, 0] = sample_initial_donors(params["donors_per_day"][c], params["booth_days"][c], z_acquisition)
+
+    # Subsequent years: retention clipped to [0, 1], applied with truncation
+    np.clip(retention_decimal, 0, 1, out=retention_decimal)
+    for year in range(1, CAMPAIGN_YEARS):
+        np.multiply(donors[:, :, year - 1], retention_decimal[:, :, year - 1], out=donors[:, :, year])
+        np.floor(donors[:, :, year], out=donors[:, :, year])
+
+    # Donations are floored at CHF 50.
+    # A cohort that dropped below one donor contributes nothing from then on.
+    np.maximum(revenue, 50, out=revenue)
+    revenue *= donors
+    revenue[donors < 1] = 0.0
+
+    # Only 2-3 months of donations in year 0 due to processing delay
+    revenue[:, :, 0] *= months_of_donation
+
+    return donors, revenue
+
+def portfolio_years(campaigns):
+    """Number of calendar years covered by a campaign plan (year 0 included)"""
+    return int(max(float(c.get("start_year", 0)) for c in campaigns) + CAMPAIGN_YEARS - 1) + 1
+
+def simulate_portfolio_batch(params, n_years, n_paths, batch_seed, sampler="mc", workspace=None):
+    """
+    Simulate one batch of a campaign plan in calendar years.
+    Returns the donors and revenue per campaign summed over the paths
+    (campaigns x n_years) and the plan's cash flows (paths x n_years) with
+    each investment in its start year. Cohorts are only shifted to calendar
+    years after the reduction over paths, so no (paths x campaigns x n_years)
+    array is built.
+    """
+    n_campaigns = len(params["booth_days"])
+    if workspace is None:
+        workspace = BatchWorkspace(n_campaigns, n_years, n_paths)
+    donors, revenue = simulate_cohort_batch(params, n_paths, batch_seed, sampler, workspace)
+
+    camp_index = np.arange(n_campaigns)[:, None]
+    year_index = params["start_year"][:, None] + np.arange(CAMPAIGN_YEARS)
+    donor_sums = np.zeros((n_campaigns, n_years))
+    revenue_sums = np.zeros((n_campaigns, n_years))
+    donor_sums[camp_index, year_index] = np.sum(donors, axis=0)
+    revenue_sums[camp_index, year_index] = np.sum(revenue, axis=0)
+
+    # Cash flows: the revenue of all campaigns starting in the same year, shifted once
+    cash_flows = workspace.cash_flows[:n_paths]
+    cash_flows[:] = -np.bincount(params["start_year"], weights=params["investment"], minlength=n_years)
+    for start_year in np.unique(params["start_year"]):
+        cohort = params["start_year"] == start_year
+        cash_flows[:, start_year:start_year + CAMPAIGN_YEARS] += np.sum(revenue[:, cohort], axis=1)
+    return donor_sums, revenue_sums, cash_flows
+
+def run_batches(params, n_years, batches, cumulative_out, sampler="mc", progress=None, workspace=None):
+    """
+    Simulate (n_paths, seed) batches back to back with the given sampler
+    (see sampling.SAMPLERS).
+    Each path's cumulative discounted cash flow is written to consecutive rows
+    of cumulative_out; donors, revenue (campaigns x years) and cash flows
+    (years) are returned summed over all paths.
+    progress, if given, is called as progress(completed paths, total paths)
+    after every batch; an exception raised by it aborts the run.
+    workspace, a BatchWorkspace of the plan, can be passed in to reuse it
+    across calls.
+    """
+    discount_factors = (1 + DISCOUNT_RATE) ** (-np.arange(n_years))
+    n_campaigns = len(params["booth_days"])
+    sums = {
+        "donors": np.zeros((n_campaigns, n_years)),
+        "revenue": np.zeros((n_campaigns, n_years)),
+        "cash_flows": np.zeros(n_years),
+    }
+    if workspace is None:
+        workspace = BatchWorkspace(n_campaigns, n_years, max((n_paths for n_paths, _ in batches), default=0))
+    row = 0
+    for n_paths, batch_seed in batches:
+        donor_sums, revenue_sums, cash_flows = simulate_portfolio_batch(params, n_years, n_paths, batch_seed, sampler, workspace)
+        sums["donors"] += donor_sums
+        sums["revenue"] += revenue_sums
+        sums["cash_flows"] += np.sum(cash_flows, axis=0)
+        cash_flows *= discount_factors
+        np.cumsum(cash_flows, axis=1, out=cumulative_out[row:row + n_paths])
+        row += n_paths
+        if progress is not None:
+            progress(row, len(cumulative_out))
+    return sums
+
+# Parameters that shape a cohort; campaigns equal in all of them are of one type
+COHORT_KEYS = ("donors_per_day", "annual_donation", "booth_days", "ret_mean", "ret_std")
+
+def campaign_types(params):
+    """
+    Distinct cohort types of a plan: the cohort parameters of every type (in
+    order of first appearance), the type of every campaign and the number of
+    earlier campaigns of the same type (its copy index)
+    """
+    types = {}
+    type_campaigns, type_of, copy_index, n_copies = [], [], [], []
+    for c in range(len(params["booth_days"])):
+        key = tuple(tuple(np.ravel(params[name][c]).tolist()) for name in COHORT_KEYS)
+        if key not in types:
+            types[key] = len(types)
+            type_campaigns.append(c)
+            n_copies.append(0)
+        t = types[key]
+        type_of.append(t)
+        copy_index.append(n_copies[t])
+        n_copies[t] += 1
+    type_params = {name: params[name][type_campaigns] for name in COHORT_KEYS}
+    return type_params, np.array(type_of, dtype=int), np.array(copy_index, dtype=int)
+
+def run_shifted_batches(params, n_years, batches, cumulative_out, npvs_out, sampler="mc", progress=None):
+    """
+    Shift-and-sum variant of run_batches for plans that repeat campaigns:
+    one cohort per campaign type is simulated per batch, and the plan is
+    assembled by shifting it to every start year of that type and summing.
+    The cost grows with the number of types instead of campaigns.
+    Every further copy of a type takes the cohort paths in a fixed shuffled
+    order (rotations would line up neighboring Sobol points, which are
+    strongly correlated), so the paths of cumulative_out sum different
+    cohort draws and give the spread of independent campaigns.
+    The mean NPV, however, rests on one cohort sample per type, so its error
+    is judged from npvs_out: the per-path plan NPVs with every copy on the
+    same row, whose mean is the same estimate and whose spread reflects its
+    actual Monte Carlo error. Sums are returned as in run_batches.
+    """
+    type_params, type_of, copy_index = campaign_types(params)
+    n_campaigns = len(type_of)
+    discount_factors = (1 + DISCOUNT_RATE) ** (-np.arange(n_years))
+    cohort_discount = discount_factors[:CAMPAIGN_YEARS]
+    investment_by_year = np.bincount(params["start_year"], weights=params["investment"], minlength=n_years)
+    investment_pv = float(investment_by_year @ discount_factors)
+    sums = {
+        "donors": np.zeros((n_campaigns, n_years)),
+        "revenue": np.zeros((n_campaigns, n_years)),
+        "cash_flows": np.zeros(n_years),
+    }
+    workspace = BatchWorkspace(len(type_params["booth_days"]), 0, max((n_paths for n_paths, _ in batches), default=0))
+    orders = {}
+    row = 0
+    for n_paths, batch_seed in batches:
+        donors, revenue = simulate_cohort_batch(type_params, n_paths, batch_seed, sampler, workspace)
+        donor_sums = np.sum(donors, axis=0)
+        revenue_sums = np.sum(revenue, axis=0)
+        cohort_npvs = revenue @ cohort_discount
+
+        cash_flows = np.empty((n_paths, n_years))
+        cash_flows[:] = -investment_by_year
+        npvs = npvs_out[row:row + n_paths]
+        npvs[:] = -investment_pv
+        for c, (t, start_year) in enumerate(zip(type_of, params["start_year"])):
+            years = slice(start_year, start_year + CAMPAIGN_YEARS)
+            sums["donors"][c, years] += donor_sums[t]
+            sums["revenue"][c, years] += revenue_sums[t]
+            if copy_index[c]:
+                key = (copy_index[c], n_paths)
+                if key not in orders:
+                    orders[key] = np.random.default_rng(copy_index[c]).permutation(n_paths)
+                cash_flows[:, years] += revenue[orders[key], t]
+            else:
+                cash_flows[:, years] += revenue[:, t]
+            npvs += cohort_npvs[:, t] * discount_factors[start_year]
+
+        sums["cash_flows"] += np.sum(cash_flows, axis=0)
+        cash_flows *= discount_factors
+        np.cumsum(cash_flows, axis=1, out=cumulative_out[row:row + n_paths])
+        row += n_paths
+        if progress is not None:
+            progress(row, len(cumulative_out))
+    return sums
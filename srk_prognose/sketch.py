@@ -0,0 +1,101 @@
+"""
+Mergeable streaming quantile sketch (a merging t-digest per column).
+
+Values are summarized by centroids (mean, weight) that are small near the
+tails and large around the median, so the 10%/90% percentiles the charts
+need stay accurate while the memory is bounded by the compression,
+independent of the number of paths. Sketches of separate runs (e.g. the
+shards of a process pool) merge into the sketch of the combined run.
+"""
+import numpy as np
+
+from .config import SKETCH_BUFFER_ROWS, SKETCH_COMPRESSION
+
+def _compress(means, weights, compression):
+    """Sorted centroids of (means, weights), merged under the t-digest k1 scale function"""
+    order = np.argsort(means, kind="stable")
+    means = means[order]
+    weights = weights[order]
+    cumulative = np.cumsum(weights)
+    q = (cumulative - weights / 2) / cumulative[-1]
+    # k1 is steep near q = 0 and 1, so the tails keep (nearly) single values
+    k = compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+    cluster = np.floor(k)
+    starts = np.flatnonzero(np.r_[True, cluster[1:] != cluster[:-1]])
+    merged_weights = np.add.reduceat(weights, starts)
+    return np.add.reduceat(means * weights, starts) / merged_weights, merged_weights
+
+class QuantileSketch:
+    """Streaming percentiles of every column of (rows x columns) batches"""
+
+    def __init__(self, n_columns, compression=SKETCH_COMPRESSION):
+        self.compression = compression
+        self.n = 0
+        self.means = [np.empty(0) for _ in range(n_columns)]
+        self.weights = [np.empty(0) for _ in range(n_columns)]
+        self.minimum = np.full(n_columns, np.inf)
+        self.maximum = np.full(n_columns, -np.inf)
+        # Added rows are compressed in blocks of at least SKETCH_BUFFER_ROWS
+        self._buffer = []
+        self._buffered = 0
+
+    def add(self, values):
+        """Add the rows of a (rows x columns) array"""
+        if not len(values):
+            return
+        self.n += len(values)
+        self.minimum = np.minimum(self.minimum, np.min(values, axis=0))
+        self.maximum = np.maximum(self.maximum, np.max(values, axis=0))
+        self._buffer.append(np.array(values, dtype=float))
+        self._buffered += len(values)
+        if self._buffered >= SKETCH_BUFFER_ROWS:
+            self._flush()
+
+    def _flush(self):
+        """Compress the buffered rows into the centroids"""
+        if not self._buffer:
+            return
+        values = np.concatenate(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        ones = np.ones(len(values))
+        for c in range(len(self.means)):
+            self.means[c], self.weights[c] = _compress(
+                np.concatenate([self.means[c], values[:, c]]),
+                np.concatenate([self.weights[c], ones]),
+                self.compression,
+            )
+
+    def merge(self, other):
+        """Add the values summarized by another sketch of the same columns"""
+        if not other.n:
+            return
+        self._flush()
+        other._flush()
+        self.n += other.n
+        self.minimum = np.minimum(self.minimum, other.minimum)
+        self.maximum = np.maximum(self.maximum, other.maximum)
+        for c in range(len(self.means)):
+            self.means[c], self.weights[c] = _compress(
+                np.concatenate([self.means[c], other.means[c]]),
+                np.concatenate([self.weights[c], other.weights[c]]),
+                self.compression,
+            )
+
+    def percentile(self, q):
+        """
+        Per-column q% percentile, interpolated like np.percentile (exact as
+        long as every centroid still holds a single value)
+        """
+        # np.percentile's rank q * (n - 1) in units where the i-th single value sits at i + 0.5
+        self._flush()
+        rank = q / 100 * (self.n - 1) + 0.5
+        result = np.empty(len(self.means))
+        for c, (means, weights) in enumerate(zip(self.means, self.weights)):
+            positions = np.cumsum(weights) - weights / 2
+            result[c] = np.interp(
+                rank,
+                np.r_[0.0, positions, self.n],
+                np.r_[self.minimum[c], means, self.maximum[c]],
+            )
+        return result
@@ -0,0 +1,129 @@
+"""
+Precomputed response surface of the single-campaign model for instant
+estimates while the exact simulation runs.
+
+The grid spans the input ranges of the single-campaign page (booth days,
+donors per day, donation, retention; the empirical retention schedule is a
+separate slice). Only the percentile band needs simulating: the means come
+from the closed form of srk_prognose.expected. Booth cost only enters
+through the year 0 investment, so it is not a grid dimension: the grid
+stores the band of the cumulative discounted revenue relative to its mean
+(float16, smooth across the grid), interpolated multilinearly (booth days
+on a log scale), and the investment is subtracted at query time.
+
+Build the file offline with
+
+    python -m srk_prognose.surface
+"""
+import os
+
+import numpy as np
+
+from .config import CAMPAIGN_YEARS, DISCOUNT_RATE, EMPIRICAL_RETENTION, EPSILON
+from .expected import expected_metrics
+from .sampling import draw_shocks
+from .simulation import batch_streams, campaign_arrays, cohorts_from_shocks
+
+RESPONSE_SURFACE_PATH = os.path.join(os.path.dirname(__file__), "response_surface.npz")
+SURFACE_SIMULATIONS = 8_192
+SURFACE_SEED = 20240101
+SURFACE_CHUNK = 32  # Grid points simulated together
+
+SURFACE_AXES = {
+    "booth_days": np.array([10, 20, 35, 60, 100, 175, 300, 500, 850, 1500, 2700, 5000], dtype=float),
+    "donors_per_day": np.linspace(1, 10, 10),
+    "annual_donation": np.array([10, 50, 100, 150, 200, 261.48, 325, 400, 500, 650, 800, 1000]),
+    "retention_rate": np.linspace(50, 100, 11),
+}
+# Per grid point and year: the 10%/90% percentiles of the cumulative
+# discounted revenue, divided by its mean
+SURFACE_QUANTITIES = ("lower", "upper")
+
+def _simulate_points(points, n_simulations, seed, sampler):
+    """Surface quantities (points x quantities x years) of (days, donors, donation, retention) points"""
+    campaigns = [
+        {"booth_days": days, "donors_per_day": donors, "annual_donation": donation, "retention_rate": retention, "booth_cost_per_day": 0.0}
+        for days, donors, donation, retention in points
+    ]
+    params = campaign_arrays(campaigns)
+    discount_factors = (1 + DISCOUNT_RATE) ** (-np.arange(CAMPAIGN_YEARS))
+    cumulative = np.empty((n_simulations, len(points), CAMPAIGN_YEARS))
+    row = 0
+    for n_paths, batch_seed in batch_streams(seed, n_simulations):
+        # Every grid point reuses the same shocks, which keeps the surface smooth
+        shocks = draw_shocks(sampler, params["booth_days"][:1], n_paths, batch_seed) * len(points)
+        _, revenue = cohorts_from_shocks(params, n_paths, shocks)
+        np.cumsum(revenue * discount_factors, axis=2, out=cumulative[row:row + n_paths])
+        row += n_paths
+
+    mean = np.mean(cumulative, axis=0)
+    return np.stack([
+        np.percentile(cumulative, 10, axis=0) / mean,
+        np.percentile(cumulative, 90, axis=0) / mean,
+    ], axis=1)
+
+def _simulate_grid(axes, n_simulations, seed, sampler):
+    """Surface quantities over the full grid of axes (grid shape x quantities x years)"""
+    grid = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, len(axes))
+    values = np.concatenate([
+        _simulate_points(grid[start:start + SURFACE_CHUNK], n_simulations, seed, sampler)
+        for start in range(0, len(grid), SURFACE_CHUNK)
+    ])
+    return values.reshape(tuple(len(axis) for axis in axes) + values.shape[1:]).astype(np.float16)
+
+def build_response_surface(path=RESPONSE_SURFACE_PATH, n_simulations=SURFACE_SIMULATIONS, seed=SURFACE_SEED, sampler="sobol"):
+    """Simulate the grid (custom retention rates and the empirical schedule) and save it"""
+    axes = SURFACE_AXES
+    custom = _simulate_grid([axes["booth_days"], axes["donors_per_day"], axes["annual_donation"], axes["retention_rate"]], n_simulations, seed, sampler)
+    empirical_axes = [axes["booth_days"], axes["donors_per_day"], axes["annual_donation"], np.array([EMPIRICAL_RETENTION[1][0]])]
+    empirical = _simulate_grid(empirical_axes, n_simulations, seed, sampler)[..., 0, :, :]
+    np.savez_compressed(path, custom=custom, empirical=empirical, **axes)
+
+def _interpolate(values, axes, point):
+    """Multilinear interpolation of values (grid shape x ...) at point, clipped to the grid"""
+    result = 0.0
+    corners = []
+    for axis, x in zip(axes, point):
+        x = min(max(x, axis[0]), axis[-1])
+        i = min(max(np.searchsorted(axis, x) - 1, 0), len(axis) - 2)
+        weight = (x - axis[i]) / (axis[i + 1] - axis[i])
+        corners.append(((i, 1 - weight), (i + 1, weight)))
+    for corner in np.ndindex(*(2,) * len(axes)):
+        index = tuple(corners[d][c][0] for d, c in enumerate(corner))
+        weight = np.prod([corners[d][c][1] for d, c in enumerate(corner)])
+        if weight:
+            result = result + weight * values[index]
+    return result
+
+class ResponseSurface:
+    """Loaded response surface; estimate() mirrors calculate_metrics"""
+
+    def __init__(self, arrays):
+        self.axes = {name: arrays[name] for name in SURFACE_AXES}
+        self.custom = arrays["custom"].astype(float)
+        self.empirical = arrays["empirical"].astype(float)
+
+    @classmethod
+    def load(cls, path=RESPONSE_SURFACE_PATH):
+        """Load a surface file, or return None if it has not been built"""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as arrays:
+            return cls(arrays)
+
+    def estimate(self, booth_days, retention_rate, donors_per_day, booth_cost, annual_donation):
+        """Interpolated calculate_metrics result tuple (no simulation)"""
+        point = [np.log(float(booth_days)), float(donors_per_day), float(annual_donation)]
+        axes = [np.log(self.axes["booth_days"]), self.axes["donors_per_day"], self.axes["annual_donation"]]
+        if abs(float(retention_rate) - EMPIRICAL_RETENTION[1][0]) < EPSILON:
+            lower, upper = _interpolate(self.empirical, axes, point)
+        else:
+            lower, upper = _interpolate(self.custom, axes + [self.axes["retention_rate"]], point + [float(retention_rate)])
+
+        donors, revenue, investment, cum_disc, _, _, cum_undisc, npv = expected_metrics(booth_days, retention_rate, donors_per_day, booth_cost, annual_donation)
+        cum_revenue = cum_disc + investment
+        return donors, revenue, investment, cum_disc, lower * cum_revenue - investment, upper * cum_revenue - investment, cum_undisc, npv
+
+if __name__ == "__main__":
+    build_response_surface()
+    print(f"Response surface written to {RESPONSE_SURFACE_PATH}")
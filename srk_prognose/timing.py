@@ -0,0 +1,120 @@
+"""
+Lightweight span timers for the hot paths.
+
+    with span("simulate", n_simulations=n):
+        ...
+
+Spans are recorded into the SpanRecorder of the current run (one page run of
+the app), which sums them by name and nesting depth, and are logged as JSON
+lines on the "srk_prognose.timing" logger: every span at DEBUG level, the
+summary of a finished run at INFO level. Without a recorder and with the
+logger above DEBUG a span costs two clock reads.
+"""
+import contextvars
+import functools
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+_recorder = contextvars.ContextVar("span_recorder", default=None)
+_depth = contextvars.ContextVar("span_depth", default=0)
+
+def _json_line(record):
+    """One JSON log line; numpy scalars and other objects are written as strings"""
+    return json.dumps(record, default=str, ensure_ascii=False)
+
+class SpanRecorder:
+    """
+    Span totals (count and seconds per name and depth) of one run, e.g. one
+    Streamlit rerun of a page. fields are logged with the summary and can be
+    extended while the run is going (parameters, path counts).
+    """
+
+    def __init__(self, name, **fields):
+        self.name = name
+        self.fields = fields
+        self.spans = {}
+        self.seconds = None
+        self._started = None
+        self._token = None
+
+    def start(self):
+        """Make this the recorder of the current context and start the clock"""
+        self._token = _recorder.set(self)
+        self._started = time.perf_counter()
+        return self
+
+    def open(self, name, depth):
+        """Register a span when it starts, so that spans are listed before the spans they contain"""
+        self.spans.setdefault((depth, name), [0, 0.0])
+
+    def add(self, name, depth, seconds):
+        """Count one finished span"""
+        entry = self.spans.setdefault((depth, name), [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def finish(self):
+        """Stop the clock, detach from the context and log the summary"""
+        self.seconds = time.perf_counter() - self._started
+        if _recorder.get() is self:
+            _recorder.reset(self._token)
+        logger.info(_json_line({"event": self.name, "ms": round(self.seconds * 1000, 3), **self.fields, "spans": self.breakdown()}))
+        return self
+
+    def breakdown(self):
+        """Spans in order of their first start as dicts, plus the unaccounted rest of the run"""
+        rows = [
+            {"span": name, "depth": depth, "count": count, "ms": round(seconds * 1000, 3)}
+            for (depth, name), (count, seconds) in self.spans.items()
+        ]
+        if self.seconds is not None:
+            accounted = sum(seconds for (depth, _), (_, seconds) in self.spans.items() if depth == 0)
+            rows.append({"span": "other", "depth": 0, "count": 1, "ms": round((self.seconds - accounted) * 1000, 3)})
+        return rows
+
+@contextmanager
+def span(name, **fields):
+    """
+    Time the block as span name. Yields the fields dict, so values known only
+    inside the block (cache hit, path count) can be added to the log line.
+    """
+    depth = _depth.get()
+    recorder = _recorder.get()
+    if recorder is not None:
+        recorder.open(name, depth)
+    token = _depth.set(depth + 1)
+    started = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        seconds = time.perf_counter() - started
+        _depth.reset(token)
+        if recorder is not None:
+            recorder.add(name, depth, seconds)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(_json_line({"event": "span", "span": name, "depth": depth, "ms": round(seconds * 1000, 3), **fields}))
+
+def timed(name):
+    """Decorator that times every call of a function as span name"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def configure_logging(level=logging.INFO, stream=None):
+    """Write the timing log lines (bare JSON) to stream (default stderr)"""
+    if not any(getattr(handler, "_srk_timing", False) for handler in logger.handlers):
+        handler = logging.StreamHandler(stream or sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        handler._srk_timing = True
+        logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False